@@ -0,0 +1,362 @@
+"""End-to-end pipeline benchmark
+
+Generates synthetic corpora of a controlled size and measurement
+density from a seed text, times each stage of the pipeline (reading,
+formatting, prefiltering, parsing, tagging, locating and conversion)
+for each measurement type, as instrumented by ``Stats``, and the whole
+extraction run serially and in parallel. Each run is made in a fresh
+process, so its peak memory is its own. Lines and measurements per
+second and the peak memory of each run are written to a JSON results
+file, by default in ``benchmarks/results``, which can be compared with
+the results of an earlier run.
+
+    python benchmarks/pipeline.py [-m d,t] [--lines 1000,10000]
+        [--densities 0.1,1] [--results results.json] [--compare old.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import multiprocessing
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = os.path.join(ROOT, "benchmarks", "results", "pipeline.json")
+sys.path.insert(0, ROOT)
+
+from modules.pipeline import NLP
+from modules.pipeline import MODEL
+from modules.pipeline import PROFILES
+from modules.pipeline import DEFAULT_PROFILE
+from modules.stats import Stats
+from modules.stats import STAGES
+from modules.extractor import Extractor
+from modules.extractor import MultiExtractor
+from modules.params import load_params
+from modules.params import build_pipelines
+
+
+def synthesize(seed_lines, n_lines, density, units, seed=0):
+    """A synthetic corpus of lines drawn from a seed text, with
+    "<number> <unit>" measurements inserted between their words.
+
+    Arguments:
+        seed_lines {List[str]} -- non-empty lines of the seed text
+        n_lines {int} -- the number of lines of the corpus
+        density {float} --
+            the mean number of measurements inserted in each line
+        units {List[str]} -- the units of the inserted measurements
+        seed {int} -- random seed (default = 0)
+
+    Returns:
+        {List[str]} -- the lines of the corpus
+    """
+
+    rng = random.Random(seed)
+    whole, fraction = int(density), density - int(density)
+    corpus = []
+    for _ in range(n_lines):
+        words = rng.choice(seed_lines).split()
+        for _ in range(whole + (rng.random() < fraction)):
+            value = rng.choice([str(rng.randint(1, 999)),
+                                "{:.1f}".format(rng.uniform(0, 100))])
+            words.insert(rng.randint(0, len(words)),
+                         "{} {}".format(value, rng.choice(units)))
+        corpus.append(" ".join(words) + "\n")
+    return corpus
+
+
+def time_stages(path, pipeline, nlp_config, fast_path=False):
+    """Time each stage of the extraction of a text file for one
+    measurement type, as instrumented by ``Stats``.
+
+    Arguments:
+        path {str} -- path to the text file
+        pipeline {Tuple[Tagger, Formatter, Converter]} --
+            tagging, formatting and conversion classes
+        nlp_config {Tuple} -- configuration of the Spacy pipeline
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+
+    Returns:
+        {Tuple[Stats, int]} --
+            the statistics of the extraction, and the number
+            of measurements
+    """
+
+    NLP.configure(*nlp_config)
+    NLP.load()
+    tagger, formatter, converter = pipeline
+    stats = Stats()
+    extractor = Extractor(path, tagger, formatter, converter,
+                          fast_path=fast_path, stats=stats)
+    n_measures = sum(1 for _ in extractor.extract())
+    return stats, n_measures
+
+
+def time_extraction(path, pipelines, nlp_config, parallel_opts=None,
+                    fast_path=False):
+    """Time the whole extraction of a text file.
+
+    Arguments:
+        path {str} -- path to the text file
+        pipelines {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+        nlp_config {Tuple} -- configuration of the Spacy pipeline
+        parallel_opts {Optional[Tuple]} --
+            (batch_size, n_jobs) pair, or None to run serially
+            (default = None)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+
+    Returns:
+        {Tuple[float, int]} -- seconds and number of measurements
+    """
+
+    NLP.configure(*nlp_config)
+    if parallel_opts is None:
+        # the workers of a parallel extraction load their own model
+        NLP.load()
+    if len(pipelines) > 1:
+        extractor = MultiExtractor(path, pipelines, parallel_opts, fast_path)
+    else:
+        (tagger, formatter, converter), = pipelines.values()
+        extractor = Extractor(path, tagger, formatter, converter,
+                              parallel_opts, fast_path)
+    start = time.perf_counter()
+    n_measures = sum(1 for _ in extractor.extract())
+    return time.perf_counter() - start, n_measures
+
+
+def time_load(nlp_config):
+    """Seconds to load the Spacy model"""
+    NLP.configure(*nlp_config)
+    start = time.perf_counter()
+    NLP.load()
+    return time.perf_counter() - start
+
+
+def isolated(func, *args):
+    """Run a function in a fresh process, so that the peak memory
+    measured is that of the run alone, rather than the highest of
+    every run so far.
+
+    Raises:
+        RuntimeError -- when the process exits without a result
+
+    Arguments:
+        func {Callable} -- a function of this module
+        args {Any} -- the function's arguments
+
+    Returns:
+        {Tuple[Any, Tuple[float, float]]} --
+            the function's result, and the peak resident memory in
+            megabytes of the process and of its largest worker process
+    """
+
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_isolated, args=(sender, func, args))
+    process.start()
+    sender.close()
+    try:
+        value, rss = receiver.recv()
+    except EOFError:
+        raise RuntimeError("Benchmark process failed! {}".format(
+            func.__name__)) from None
+    finally:
+        process.join()
+    if isinstance(value, BaseException):
+        raise value
+    return value, rss
+
+
+def _run_isolated(conn, func, args):
+    """Send the result of a function, or its exception,
+    and the peak memory of the process"""
+    try:
+        value = func(*args)
+    except Exception as e:
+        value = e
+    conn.send((value, peak_rss()))
+    conn.close()
+
+
+def peak_rss():
+    """Peak resident memory in megabytes of this process, and of
+    its largest finished worker process"""
+    import resource
+
+    # kilobytes on Linux, bytes on macOS
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return tuple(resource.getrusage(who).ru_maxrss / scale
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+
+def result(corpus, measurement_type, mode, stage, seconds, lines,
+           measurements, rss, counts=None):
+    """A record of the results file. Throughputs are of the lines and
+    measurements of the whole corpus, ``rss`` is the peak memory of
+    the run, and ``counts`` the counts of the run's ``Stats``"""
+    rss, children_rss = rss
+    return {"corpus": corpus, "measurement_type": measurement_type,
+            "mode": mode, "stage": stage, "seconds": round(seconds, 6),
+            "lines": lines, "measurements": measurements,
+            "lines_per_sec": round(lines / seconds, 2) if seconds else None,
+            "measurements_per_sec":
+                round(measurements / seconds, 2) if seconds else None,
+            "peak_rss_mb": round(rss, 1),
+            "peak_children_rss_mb": round(children_rss, 1),
+            "counts": counts}
+
+
+def compare(results, previous):
+    """Print the ratio of the throughput of each result to
+    that of the same result in an earlier run.
+
+    Arguments:
+        results {List[Dict]} -- records of this run
+        previous {List[Dict]} -- records of the earlier run
+    """
+
+    def key(record):
+        return (record["corpus"], record["measurement_type"],
+                record["mode"], record["stage"])
+
+    earlier = {key(record): record for record in previous}
+    for record in results:
+        old = earlier.get(key(record))
+        if not old or not old["lines_per_sec"] or not record["lines_per_sec"]:
+            continue
+        print("{:<24}{:<5}{:<10}{:<10}{:>7.2f}x lines/s  "
+              "peak {:.0f} -> {:.0f} MB".format(
+                  *key(record), record["lines_per_sec"] / old["lines_per_sec"],
+                  old["peak_rss_mb"], record["peak_rss_mb"]))
+
+
+def git_commit():
+    """The commit of the working tree, if it is a git repository"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--measurement_type", default="d",
+                        help="Comma separated measurement types, or all (default = d)")
+    parser.add_argument("--text", default=os.path.join(ROOT, "text", "wiki.txt"),
+                        help="Text file to draw the corpora from (default = text/wiki.txt)")
+    parser.add_argument("--lines", default="1000,10000",
+                        help="Comma separated numbers of lines of the corpora")
+    parser.add_argument("--densities", default="0.1,1",
+                        help="Comma separated mean numbers of measurements "
+                        "inserted in each line")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed of the corpora (default = 0)")
+    parser.add_argument("--model", default=MODEL,
+                        help="Name or path of the Spacy model (default = {})".format(MODEL))
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="Spacy pipeline profile (default = {})".format(DEFAULT_PROFILE))
+    parser.add_argument("--fast_path", action="store_true",
+                        help="Run the extractions with the fast path")
+    parser.add_argument("--batch_size", type=int, default=1000,
+                        help="Lines in each batch of the parallel extraction (default = 1000)")
+    parser.add_argument("--n_jobs", type=int, default=3,
+                        help="Cores of the parallel extraction (default = 3)")
+    parser.add_argument("--results", default=RESULTS,
+                        help="File to write the results to "
+                        "(default = benchmarks/results/pipeline.json)")
+    parser.add_argument("--compare", default=None,
+                        help="Results file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    params = load_params()
+    if args.measurement_type == "all":
+        measurement_types = list(params)
+    else:
+        measurement_types = args.measurement_type.split(",")
+    pipelines = build_pipelines(params, measurement_types)
+
+    NLP.configure(args.model, args.profile)
+    load, _ = isolated(time_load, NLP.config)
+
+    with open(args.text) as f:
+        seed_lines = [line.strip() for line in f if line.strip()]
+    # units which are only tagged as such, so the inserted
+    # measurements are found without their parse mattering
+    units = sorted(tag for tagger, _, _ in pipelines.values()
+                   for tag in tagger.tags if tag not in tagger.ambiguous_tags)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_lines in map(int, args.lines.split(",")):
+            for density in map(float, args.densities.split(",")):
+                corpus = "lines={},density={}".format(n_lines, density)
+                lines = synthesize(seed_lines, n_lines, density, units,
+                                   args.seed)
+                path = os.path.join(tmp_dir, "corpus.txt")
+                with open(path, "w") as f:
+                    f.writelines(lines)
+
+                for key, pipeline in pipelines.items():
+                    (stats, n_measures), rss = isolated(
+                        time_stages, path, pipeline, NLP.config,
+                        args.fast_path)
+                    stages = [s for s in STAGES if s in stats.times]
+                    for stage in stages:
+                        results.append(result(corpus, key, "stage", stage,
+                                              stats.times[stage], n_lines,
+                                              n_measures, rss,
+                                              dict(stats.counts)))
+                    print("{:<24}{:<5}".format(corpus, key) + "  ".join(
+                        "{} {:.3f}s".format(stage, stats.times[stage])
+                        for stage in stages))
+
+                selections = [{key: p} for key, p in pipelines.items()]
+                if len(pipelines) > 1:
+                    selections.append(pipelines)
+                for selection in selections:
+                    key = ",".join(selection)
+                    for mode, opts in (("serial", None), ("parallel", (
+                            args.batch_size, args.n_jobs))):
+                        (seconds, n_measures), rss = isolated(
+                            time_extraction, path, selection, NLP.config,
+                            opts, args.fast_path)
+                        results.append(result(corpus, key, mode, "extract",
+                                              seconds, n_lines, n_measures,
+                                              rss))
+                        print("{:<24}{:<5}{:<10}{:.0f} lines/s  {:.0f} "
+                              "measurements/s".format(
+                                  corpus, key, mode,
+                                  results[-1]["lines_per_sec"] or 0,
+                                  results[-1]["measurements_per_sec"] or 0))
+
+    import spacy
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    with open(args.results, "w") as f:
+        json.dump({"commit": git_commit(), "time": time.time(),
+                   "python": platform.python_version(),
+                   "spacy": spacy.__version__, "model": args.model,
+                   "profile": args.profile, "load_seconds": round(load, 6),
+                   "seed": args.seed, "fast_path": args.fast_path,
+                   "batch_size": args.batch_size, "n_jobs": args.n_jobs,
+                   "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Spacy pipeline profile benchmark
+
+Times loading the Spacy model and parsing a text with each
+pipeline profile.
+
+    python benchmarks/profiles.py [--model en] [--text text/wiki.txt]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modules.pipeline import MODEL
+from modules.pipeline import PROFILES
+from modules.pipeline import Pipeline
+from modules.formatter import DistanceFormatter
+
+
+def time_profile(model, profile, lines, batch_size=None):
+    """Time loading and parsing with a pipeline profile.
+
+    Arguments:
+        model {str} -- name or path of the Spacy model
+        profile {str} -- name of the pipeline profile
+        lines {List[str]} -- formatted lines to parse
+        batch_size {Optional[int]} --
+            ``nlp.pipe`` batch size (default = the profile's)
+
+    Returns:
+        {Tuple[float, float]} -- seconds to load and to parse
+    """
+
+    nlp = Pipeline(model, profile)
+    start = time.perf_counter()
+    nlp.load()
+    loaded = time.perf_counter()
+    kwargs = {"batch_size": batch_size} if batch_size else {}
+    for _ in nlp.pipe(lines, **kwargs):
+        pass
+    return loaded - start, time.perf_counter() - loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL,
+                        help="Name or path of the Spacy model (default = {})".format(MODEL))
+    parser.add_argument("--text", default=os.path.join(ROOT, "text", "wiki.txt"),
+                        help="Text file to parse (default = text/wiki.txt)")
+    parser.add_argument("--batch_sizes", default="",
+                        help="Comma separated nlp.pipe batch sizes to compare "
+                        "(default = the profile's)")
+    args = parser.parse_args()
+
+    formatter = DistanceFormatter()
+    with open(args.text) as f:
+        lines = [formatter.format(line) for line in f]
+
+    batch_sizes = [int(n) for n in args.batch_sizes.split(",") if n] or [None]
+    for profile in PROFILES:
+        for batch_size in batch_sizes:
+            load, parse = time_profile(args.model, profile, lines, batch_size)
+            print("{:<8}batch {:<6}load {:.2f}s  parse {:.2f}s  {:.0f} lines/s".format(
+                profile, batch_size or PROFILES[profile].batch_size,
+                load, parse, len(lines) / parse))
+
+
+if __name__ == "__main__":
+    main()
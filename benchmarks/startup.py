@@ -0,0 +1,59 @@
+"""Startup time benchmark
+
+Times importing the extraction pipeline and running ``main.py --help``
+in fresh interpreters, neither of which should load Spacy.
+
+    python benchmarks/startup.py [--repeat 10]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "interpreter": [sys.executable, "-c", "pass"],
+    "import extractor": [sys.executable, "-c", "import modules.extractor"],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+}
+
+
+def time_command(command, repeat):
+    """Time a command in a fresh process.
+
+    Arguments:
+        command {List[str]} -- the command to run
+        repeat {int} -- the number of runs
+
+    Returns:
+        {List[float]} -- wall-clock seconds of each run
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="The number of runs of each command (default = 10)")
+    args = parser.parse_args()
+
+    for name, command in COMMANDS.items():
+        times = time_command(command, args.repeat)
+        print("{:<20}median {:.3f}s  min {:.3f}s".format(
+            name, statistics.median(times), min(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Tagger benchmark on long sentences
+
+Times ``Tagger.tag`` on synthetic sentences with many measurements,
+like the tables and lists of wiki dumps, against the original
+algorithm which deleted matched n-grams from the sentence.
+
+    python benchmarks/tagger.py [--measurements 10,100,1000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import spacy
+from spacy.tokens import Doc
+
+from modules.tagger import Tagger
+from modules.sentence import Sentence
+from modules.utils import ints, join, overlapping
+
+
+TAGS = ["mile", "nautical mile", "inch", "foot", "fathom"]
+
+
+def long_sentence(n_measurements):
+    """A parsed sentence listing ``n_measurements`` measurements,
+    i.e. "5 miles , 2 nautical miles , 3 inches , ..."
+
+    Arguments:
+        n_measurements {int} -- the number of measurements
+
+    Returns:
+        {spacy.tokens.Doc} -- the parsed sentence
+    """
+
+    units = [["miles"], ["nautical", "miles"], ["inches"], ["fathoms"]]
+    words, lemmas, heads, deps = [], [], [], []
+    root = None
+    for idx in range(n_measurements):
+        unit = units[idx % len(units)]
+        start = len(words)
+        end = start + len(unit)
+        root = end if root is None else root
+        words += [str(idx)] + unit + [","]
+        lemmas += [str(idx)] + [w.rstrip("s").replace("inche", "inch")
+                                for w in unit] + [","]
+        heads += [end] + [end] * (len(unit) - 1) + [root, end]
+        deps += ["nummod"] + ["amod"] * (len(unit) - 1) + \
+            ["ROOT" if end == root else "conj", "punct"]
+    vocab = spacy.blank("en").vocab
+    return Doc(vocab, words=words, lemmas=lemmas, heads=heads, deps=deps)
+
+
+def deletion_tag(tagger, sentence):
+    """The original ``Tagger.tag``, which deleted matched n-grams
+    from the list of tokens while iterating over it"""
+    measurements = []
+    tokens = list(sentence)
+    parsed = Sentence.from_span(sentence)
+    for n in reversed(ints(1, tagger.index.max_gram)):
+        for idx, n_gram in enumerate(overlapping(tokens, n)):
+            subset = join([tok.lemma_ for tok in n_gram])
+            if subset in tagger.index:
+                measure = tagger._measurements(parsed, n_gram[-1].i, subset)
+                if measure:
+                    measurements.append(measure)
+                    del tokens[idx: min(idx + n, len(tokens) - 1)]
+    return measurements
+
+
+def best_of(func, repeat):
+    """Best wall-clock seconds of ``repeat`` calls"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--measurements", default="10,100,1000",
+                        help="Comma separated numbers of measurements per sentence")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="The number of runs of each sentence (default = 5)")
+    args = parser.parse_args()
+
+    tagger = Tagger(TAGS, 2, {"foot": "inch"})
+    for n in map(int, args.measurements.split(",")):
+        doc = long_sentence(n)
+        sentence = Sentence.from_span(doc)
+        found = len(tagger.tag(sentence))
+        deleted = len(deletion_tag(tagger, doc))
+        tag = best_of(lambda: tagger.tag(sentence), args.repeat)
+        convert = best_of(lambda: tagger.tag(doc), args.repeat)
+        deletion = best_of(lambda: deletion_tag(tagger, doc), args.repeat)
+        print("{:>5} measurements {:>6} tokens  found {:>5} ({:>5} by deletion)  "
+              "tag {:.4f}s  with conversion {:.4f}s  deletion {:.4f}s".format(
+                  n, len(doc), found, deleted, tag, convert, deletion))
+
+
+if __name__ == "__main__":
+    main()
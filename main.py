@@ -2,68 +2,257 @@
 
 import os
 import sys
-import json
+import time
 import argparse
+from contextlib import ExitStack
 
-from modules.tagger import Tagger
-from modules.converter import Converter
 from modules.extractor import Extractor
+from modules.extractor import MultiExtractor
 
-from modules.utils import join
-from modules.utils import hyponyms
-from modules.utils import get_class
+from modules.pipeline import NLP
+from modules.pipeline import MODEL
+from modules.pipeline import PROFILES
+from modules.pipeline import DEFAULT_PROFILE
+
+from modules.cache import TagCache
+from modules.cache import ParseCache
+from modules.cache import default_cache_dir
+from modules.checkpoint import Checkpoint
+from modules.corpus import SHARD_SIZE
+from modules.corpus import CorpusExtractor
+from modules.sinks import SINKS
+from modules.sinks import BATCH_SIZE
+from modules.stats import Stats
+from modules.stats import Progress
+from modules.stats import sampling
+from modules.stats import profiling
+
+from modules.params import load_params
+from modules.params import build_pipelines
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("-m", "--measurement_type", default="d", choices=["d", "t", "m", "e", "v"],
-                        help="Type of measurement to tag (default = distance)")
+    parser.add_argument("-m", "--measurement_type", default="d",
+                        help="Type of measurement to tag: one of d, t, m, e, v, "
+                        "a comma separated list (e.g. d,t) or all (default = distance)")
     parser.add_argument(
-        "-t", "--text", help="Name of text file to tag (required)", required=True)
+        "-t", "--text", nargs="+", required=True,
+        help="Text files, directories, glob patterns or - for stdin to tag (required). "
+        "A text file which is not found is looked for in the text directory")
+    parser.add_argument("-o", "--output", default=None,
+                        help="File to write measurements to (default = stdout)")
+    parser.add_argument("--format", default="text", choices=sorted(SINKS),
+                        help="Output format: text prints each measurement, jsonl, csv and "
+                        "parquet write a record of each measurement with its file, line, "
+                        "character offsets, and value and unit before and after conversion "
+                        "(default = text)")
+    parser.add_argument("--output_batch_size", default=BATCH_SIZE, type=int,
+                        help="The number of measurements written to the output at a time "
+                        "(default = {})".format(BATCH_SIZE))
     parser.add_argument("--max_gram", type=int, default=2,
                         help="The maximum n-gram measurement unit to tag (default = 2)")
+    parser.add_argument("--cache_dir", default=default_cache_dir(),
+                        help="Directory to cache unit tags built from WordNet "
+                        "(default = $MEASUREMENT_TAGGER_CACHE or ~/.cache/measurement_tagger)")
+    parser.add_argument("--model", default=MODEL,
+                        help="Name or path of the Spacy model (default = {})".format(MODEL))
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="Spacy pipeline profile: parse loads only the components "
+                        "needed for tagging, lemmas does not load the parser and tags "
+                        "the numbers next to units, full loads the whole model "
+                        "(default = {})".format(DEFAULT_PROFILE))
+    parser.add_argument("--pipe_batch_size", default=None, type=int,
+                        help="The number of texts Spacy parses at a time "
+                        "(default = the profile's)")
+    parser.add_argument("--disable", default="",
+                        help="Comma separated Spacy pipeline components to exclude "
+                        "as well as those excluded by the profile")
+    parser.add_argument("--parse_cache", action="store_true",
+                        help="Cache the parsed text in cache_dir, so later runs over the same "
+                        "text only tag and convert measurements. Every line is parsed when "
+                        "the text is cached, whatever the prefilter and --fast_path")
     parser.add_argument("--return_unconverted", action="store_true",
                         help="Return measurements that have not been normalised")
+    parser.add_argument("--fast_path", action="store_true",
+                        help="Tag unambiguous '<number> <unit>' measurements without a dependency parse")
+    parser.add_argument("--no_prefilter", action="store_true",
+                        help="Parse every line, including lines which do not mention a unit")
+    parser.add_argument("--max_chars", type=int, default=None,
+                        help="Parse consecutive lines together in documents of up to max_chars "
+                        "characters and tag each sentence (default = parse each line on its own)")
     parser.add_argument("--parallel", action="store_true",
-                        help="Flag to run the tokeniser on the multiple cores")
+                        help="Flag to run the extraction pipeline on multiple cores")
     parser.add_argument("--batch_size", default=1000, type=int,
-                        help="The number of sentences to pass to each tokeniser subprocess (default = 1000)")
+                        help="The number of sentences to pass to each worker process (default = 1000)")
     parser.add_argument("--n_jobs", default=3, type=int,
                         help="The number of cores (default = 3)")
+    parser.add_argument("--queue_depth", default=None, type=int,
+                        help="The maximum number of batches in flight (default = 2 * n_jobs)")
+    parser.add_argument("--shard_size", default=SHARD_SIZE, type=int,
+                        help="The number of bytes of text passed to each worker process when "
+                        "tagging several texts (default = {})".format(SHARD_SIZE))
+    parser.add_argument("--unordered", action="store_true",
+                        help="Return measurements as soon as any batch completes, ignoring their order")
+    parser.add_argument("--checkpoint", default=None,
+                        help="File to save the position of the extraction in, to resume it later")
+    parser.add_argument("--checkpoint_every", default=10, type=int,
+                        help="The number of batches of lines between checkpoints (default = 10)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume from the checkpoint, truncating the output "
+                        "to the measurements returned before it")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only extract the lines appended to the text since the checkpoint, "
+                        "leaving an incomplete last line to the next run")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print a summary of the lines filtered, documents parsed, units "
+                        "probed and matched, conversions and conversion failures by unit, "
+                        "and the time spent in each stage")
+    parser.add_argument("--progress", default=None, type=float,
+                        help="Report the lines read and measurements returned every "
+                        "progress seconds. With --parallel, lines are counted as their "
+                        "batches complete, so the batches are reported (default = no reports)")
+    parser.add_argument("--cprofile", default=None,
+                        help="File to write a cProfile profile of the run to, to read with pstats")
+    parser.add_argument("--sample", default=None,
+                        help="File to write call stacks sampled during the run to, in the "
+                        "collapsed format of flame graph tools. Only the main process is sampled")
 
     args = parser.parse_args()
-    params_path = os.path.join(os.getcwd(), "modules/params.json")
-    params = json.load(open(params_path, "r"))
+    NLP.configure(args.model, args.profile,
+                  filter(None, args.disable.split(",")), args.pipe_batch_size)
+    params = load_params(os.path.join(os.getcwd(), "modules/params.json"))
+    tag_cache = TagCache(args.cache_dir)
 
-    name = args.text
     text_dir = os.path.join(os.getcwd(), "text")
-    path = os.path.join(text_dir, name)
+    path = args.text[0] if len(args.text) == 1 else None
+    if path is not None and not os.path.isfile(path):
+        path = os.path.join(text_dir, path)
+    # several texts are extracted as a corpus
+    corpus = path is None or not os.path.isfile(path)
+
+    if args.measurement_type == "all":
+        measurement_types = list(params)
+    else:
+        measurement_types = args.measurement_type.split(",")
 
     try:
-        m = params[args.measurement_type]
+        pipelines = build_pipelines(params, measurement_types, args.max_gram,
+                                    tag_cache, args.return_unconverted)
     except KeyError:
         print("Invalid measurement type!")
         sys.exit()
 
-    container = get_class("measurement.measures", m["container"])
-    formatter = get_class("modules.formatter", m["formatter"])
-    converter = Converter(container, args.return_unconverted)
+    if (args.resume or args.incremental) and not args.checkpoint:
+        parser.error("--resume and --incremental need a --checkpoint file!")
+    if args.max_chars and not PROFILES[args.profile].parses:
+        parser.error("--max_chars needs a profile with the parser to split sentences!")
+    if args.checkpoint and args.parallel and args.unordered:
+        parser.error("--unordered extraction cannot be checkpointed!")
+    if corpus and (args.checkpoint or args.parse_cache):
+        parser.error("--checkpoint and --parse_cache need a single text file!")
+    if args.format == "parquet" and args.checkpoint:
+        parser.error("Parquet output cannot be checkpointed!")
+
+    binary = args.format == "parquet"
+    output = sys.stdout.buffer if binary else sys.stdout
+    header = True
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpoint(args.checkpoint, path, args.checkpoint_every,
+                                args.incremental, lambda: sink.flush())
+        if args.resume or args.incremental:
+            checkpoint.load()
+        if args.output:
+            keep = checkpoint.measurements
+            if args.format == "csv" and keep:
+                # keep the header of the records
+                header = False
+                keep += 1
+            output = open_output(args.output, keep)
+    elif args.output:
+        output = open(args.output, "wb" if binary else "w")
+
+    if args.format == "text":
+        sink_opts = {"sources": corpus, "types": len(pipelines) > 1}
+    else:
+        sink_opts = {"source": path}
+        if args.format == "csv":
+            sink_opts["header"] = header
+    sink = SINKS[args.format](output, args.output_batch_size, **sink_opts)
 
-    tags = m["tags"]
-    if not tags:
-        tags = hyponyms(m["synset"])
-        params[args.measurement_type]["tags"] = list(tags)
-        json.dump(params, open(params_path, "w"))
-    tagger = Tagger(tags, args.max_gram, m["right_mods"])
+    parse_cache = None
+    if args.parse_cache:
+        parse_cache = ParseCache(os.path.join(args.cache_dir, "parses"))
 
+    parallel_opts = None
     if args.parallel:
-        extractor = Extractor(path, tagger, formatter,
-                              converter, (args.batch_size, args.n_jobs))
+        parallel_opts = (args.batch_size, args.n_jobs,
+                         args.queue_depth, not args.unordered)
+    stats = Stats() if args.stats else None
+    if corpus:
+        extractor = CorpusExtractor(args.text, pipelines, parallel_opts,
+                                    args.fast_path, not args.no_prefilter,
+                                    args.max_chars, args.shard_size, text_dir,
+                                    stats)
+    elif len(pipelines) > 1:
+        extractor = MultiExtractor(path, pipelines, parallel_opts,
+                                   args.fast_path, not args.no_prefilter,
+                                   args.max_chars, parse_cache, checkpoint,
+                                   stats)
     else:
-        extractor = Extractor(path, tagger, formatter, converter)
+        (tagger, formatter, converter), = pipelines.values()
+        extractor = Extractor(path, tagger, formatter, converter,
+                              parallel_opts, args.fast_path,
+                              not args.no_prefilter, args.max_chars,
+                              parse_cache, checkpoint, stats)
+
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        if args.cprofile:
+            stack.enter_context(profiling(args.cprofile))
+        if args.sample:
+            stack.enter_context(sampling(args.sample))
+        progress = None
+        if args.progress:
+            progress = stack.enter_context(
+                Progress(extractor.counts, args.progress,
+                         batches=args.parallel))
+        with sink:
+            for measure in extractor.extract():
+                sink.write(measure)
+                if progress is not None:
+                    progress.update()
+    elapsed = time.perf_counter() - start
+    if output not in (sys.stdout, sys.stdout.buffer):
+        output.close()
+
+    counts = extractor.counts
+    print("Skipped {} of {} lines without a unit".format(
+        counts["skipped"], counts["lines"]), file=sys.stderr)
+    if stats is not None:
+        print(stats.summary(counts, elapsed), file=sys.stderr)
+
+
+def open_output(path, keep):
+    """Open an output file to append measurements to, keeping
+    only its first ``keep`` lines.
+
+    Arguments:
+        path {str} -- path to the output file
+        keep {int} -- the number of lines to keep
+
+    Returns:
+        {TextIO} -- the output file
+    """
 
-    for measure in extractor.extract():
-        print(join(measure) if isinstance(measure, tuple) else measure)
+    output = open(path, "a+")
+    output.seek(0)
+    for _ in range(keep):
+        if not output.readline():
+            break
+    output.truncate(output.tell())
+    return output
 
 
 if __name__ == "__main__":
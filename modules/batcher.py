@@ -0,0 +1,220 @@
+"""Micro-batching extraction"""
+
+import time
+import queue
+import threading
+from collections import deque
+from collections import Counter
+from concurrent.futures import Future
+
+from .extractor import extract_texts
+from .loader import check_max_chars
+
+
+# maximum number of texts extracted together
+BATCH_SIZE = 64
+# seconds a text waits for other texts to batch it with
+MAX_LATENCY = 0.005
+
+
+class Batcher:
+    """Extract measurements from texts held in memory as they arrive,
+    i.e. documents received by a service, without writing them to a
+    file. Each text submitted is returned a future of its measurements.
+
+    Texts are extracted in micro-batches by a background thread. Once
+    a text arrives, further texts are collected for up to
+    ``max_latency`` seconds, or until ``batch_size`` texts are
+    collected, and the texts of the batch are parsed together in one
+    Spacy pipe, see ``extract_texts``.
+
+    Raises:
+        ValueError -- when max_chars is set without a parsing profile
+
+    Arguments:
+        pipelines {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        batch_size {int} --
+            maximum number of texts extracted together
+            (default = BATCH_SIZE)
+        max_latency {float} --
+            seconds a text waits for other texts to be batched with
+            (default = MAX_LATENCY)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction (default = None)
+    """
+
+    def __init__(self, pipelines, fast_path=False, prefilter=True,
+                 max_chars=None, batch_size=BATCH_SIZE,
+                 max_latency=MAX_LATENCY, stats=None):
+        check_max_chars(max_chars)
+        self._pipelines = {key: (tagger, converter)
+                           for key, (tagger, _, converter) in pipelines.items()}
+        self._formatters = {key: formatter
+                            for key, (_, formatter, _) in pipelines.items()}
+        self._fast_path = fast_path
+        self._prefilter = prefilter
+        self._max_chars = max_chars
+        self._batch_size = batch_size
+        self._max_latency = max_latency
+        self._stats = stats
+        self._counts = Counter()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, text, types=None):
+        """Queue a text to be extracted in the next batch.
+
+        Raises:
+            KeyError -- when a measurement type is not extracted
+            RuntimeError -- when the batcher is closed
+
+        Arguments:
+            text {str} -- the text, of one or more lines
+            types {Optional[Iterable[str]]} --
+                the measurement types to extract, or None for
+                every type (default = None)
+
+        Returns:
+            {Future} --
+                future of the text's labelled measurements, with line
+                numbers counted from the start of the text
+        """
+
+        types = frozenset(self._pipelines if types is None else types)
+        for key in types:
+            if key not in self._pipelines:
+                raise KeyError("Invalid measurement type! {}".format(key))
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Batcher is closed!")
+            self._queue.put((text, types, future))
+        return future
+
+    def map(self, texts, types=None, window=None):
+        """Extract measurements from an iterable of texts, submitting
+        up to ``window`` texts ahead of the results returned. A queue
+        of documents is read with ``map(iter(documents.get, None))``,
+        until None is put on it.
+
+        Arguments:
+            texts {Iterable[str]} -- the texts
+            types {Optional[Iterable[str]]} --
+                the measurement types to extract, or None for
+                every type (default = None)
+            window {Optional[int]} --
+                maximum number of texts in flight
+                (default = 2 * batch_size)
+
+        Yields:
+            {List[Union[Measurement, Tuple[Measurement]]]} --
+                the measurements of each text, in order
+        """
+
+        window = window or 2 * self._batch_size
+        pending = deque()
+        try:
+            for text in texts:
+                pending.append(self.submit(text, types))
+                while pending and (len(pending) >= window or
+                                   pending[0].done()):
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        """Extract the texts already submitted, and stop"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def counts(self):
+        """Counts of the batches and texts extracted, and of
+        the lines read and skipped"""
+        return self._counts
+
+    @property
+    def stats(self):
+        """Counts and times of the stages of the extraction,
+        or None if they are not instrumented"""
+        return self._stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        """Collect submitted texts into batches and extract them,
+        until the batcher is closed"""
+        closed = False
+        while not closed:
+            request = self._queue.get()
+            if request is None:
+                return
+            batch = [request]
+            deadline = time.monotonic() + self._max_latency
+            while len(batch) < self._batch_size:
+                try:
+                    request = self._queue.get(
+                        timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    closed = True
+                    break
+                batch.append(request)
+            self._extract_batch(batch)
+
+    def _extract_batch(self, batch):
+        """Extract the texts of a batch, with the measurement types of
+        any text, and return each text the measurements of its types"""
+        batch = [(text, types, future) for text, types, future in batch
+                 if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        # in the order of the pipelines, so the measurements of each
+        # line are in the same order in every batch
+        types = [key for key in self._pipelines
+                 if any(key in keys for _, keys, _ in batch)]
+        try:
+            results = extract_texts(
+                {key: self._formatters[key] for key in types},
+                {key: self._pipelines[key] for key in types},
+                [text for text, _, _ in batch], self._fast_path,
+                self._prefilter, self._max_chars, self._counts, self._stats)
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        self._counts['batches'] += 1
+        self._counts['texts'] += len(batch)
+        for (_, keys, future), measures in zip(batch, results):
+            future.set_result([m for m in measures
+                               if _measurement_type(m) in keys])
+
+
+def _measurement_type(measure):
+    """The measurement type of a labelled measurement"""
+    first = measure[0] if isinstance(measure, tuple) else measure
+    return first.measurement_type
@@ -0,0 +1,355 @@
+"""Persistent caches"""
+
+import os
+import re
+import sys
+import mmap
+import struct
+import pickle
+import hashlib
+import zipfile
+import tempfile
+
+from .index import UnitIndex
+from .utils import hyponyms
+from .utils import partition
+
+
+# format of tag cache entries, bumped when ``UnitIndex`` changes
+TAG_CACHE_FORMAT = 1
+
+# format of parse cache entries, bumped when ``Sentence`` changes
+PARSE_CACHE_FORMAT = 2
+
+# number of lines in each chunk of a parse cache entry
+PARSE_CHUNK_SIZE = 1000
+
+# footer of a parse cache entry, the offset of its chunk index
+FOOTER = struct.Struct('<Q')
+
+
+def default_cache_dir():
+    """The cache directory, set by the ``MEASUREMENT_TAGGER_CACHE``
+    environment variable (default = ~/.cache/measurement_tagger)
+
+    Returns:
+        {str} -- path to the cache directory
+    """
+
+    return os.environ.get(
+        "MEASUREMENT_TAGGER_CACHE",
+        os.path.join(os.path.expanduser("~"), ".cache", "measurement_tagger"))
+
+
+class TagCache:
+    """Cache of the unit tags of a WordNet synset and their compiled
+    ``UnitIndex``, keyed by synset name, WordNet version, maximum
+    n-gram and ``TAG_CACHE_FORMAT``. Only an entry of the installed
+    WordNet version is loaded, and once it is built, loading it only
+    reads the version of WordNet, without loading the corpus.
+
+    Arguments:
+        cache_dir {Optional[str]} --
+            directory to store the cache in (default = default_cache_dir())
+    """
+
+    def __init__(self, cache_dir=None):
+        self._cache_dir = cache_dir or default_cache_dir()
+
+    def get(self, synset_name, max_gram):
+        """Load the tags and index of a synset, building them
+        from WordNet if they are not cached for the installed
+        WordNet version.
+
+        Arguments:
+            synset_name {str} -- a high-level synset
+            max_gram {int} -- maximum n-gram unit to index
+
+        Returns:
+            {Tuple[Set[str], UnitIndex]} -- the tags and their index
+        """
+
+        version = wordnet_version()
+        cached = None
+        if version is not None:
+            cached = self.load(synset_name, version, max_gram)
+        return cached or self.build(synset_name, max_gram, version)
+
+    def load(self, synset_name, wordnet_version, max_gram):
+        """Load the tags and index of a synset, if they are
+        cached for the WordNet version.
+
+        Arguments:
+            synset_name {str} -- a high-level synset
+            wordnet_version {str} -- version of WordNet the tags are from
+            max_gram {int} -- maximum n-gram unit to index
+
+        Returns:
+            {Optional[Tuple[Set[str], UnitIndex]]} --
+                the tags and their index, or None if not cached
+        """
+
+        path = self._path(synset_name, wordnet_version, max_gram)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+        if entry.get("format") != TAG_CACHE_FORMAT:
+            return None
+        return entry["tags"], entry["index"]
+
+    def build(self, synset_name, max_gram, wordnet_version=None):
+        """Build and cache the tags and index of a synset from WordNet.
+
+        Arguments:
+            synset_name {str} -- a high-level synset
+            max_gram {int} -- maximum n-gram unit to index
+            wordnet_version {Optional[str]} --
+                version of the installed WordNet, if already read
+                (default = None)
+
+        Returns:
+            {Tuple[Set[str], UnitIndex]} -- the tags and their index
+        """
+
+        from nltk.corpus import wordnet as wn
+
+        tags = hyponyms(synset_name)
+        return self.put(synset_name, wordnet_version or wn.get_version(),
+                        max_gram, tags)
+
+    def put(self, synset_name, wordnet_version, max_gram, tags):
+        """Compile and cache the index of a synset's tags. The entry
+        is written to a temporary file which is then moved into place,
+        so concurrent readers never see a partial entry.
+
+        Arguments:
+            synset_name {str} -- a high-level synset
+            wordnet_version {str} -- version of WordNet the tags are from
+            max_gram {int} -- maximum n-gram unit to index
+            tags {Iterable[str]} -- the synset's tags
+
+        Returns:
+            {Tuple[Set[str], UnitIndex]} -- the tags and their index
+        """
+
+        tags = set(tags)
+        index = UnitIndex(tags, max_gram)
+        entry = {"format": TAG_CACHE_FORMAT, "synset": synset_name,
+                 "wordnet_version": wordnet_version, "max_gram": max_gram,
+                 "tags": tags, "index": index}
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f)
+            os.replace(tmp_path, self._path(synset_name, wordnet_version,
+                                            max_gram))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tags, index
+
+    def _path(self, synset_name, wordnet_version, max_gram):
+        """Path of a cache entry"""
+        name = "{}.wn{}.{}gram.v{}.pickle".format(
+            synset_name, wordnet_version, max_gram, TAG_CACHE_FORMAT)
+        return os.path.join(self._cache_dir, name)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+
+class ParseCache:
+    """Cache of the parsed lines of text files, so that texts are
+    only parsed once however the tags, right modifiers or maximum
+    n-gram change. Entries are keyed by the file's content, the
+    formatters and the Spacy model and profile.
+
+    An entry holds the ``Sentence`` objects of every line, pickled in
+    chunks of ``PARSE_CHUNK_SIZE`` lines followed by an index of the
+    chunks. It is memory-mapped and unpickled a chunk at a time.
+
+    Arguments:
+        cache_dir {Optional[str]} --
+            directory to store the cache in
+            (default = default_cache_dir()/parses)
+    """
+
+    def __init__(self, cache_dir=None):
+        self._cache_dir = cache_dir or os.path.join(
+            default_cache_dir(), "parses")
+
+    def key(self, path, formatters, nlp_config, max_chars=None):
+        """The cache key of a text file.
+
+        Arguments:
+            path {str} -- path to a text file
+            formatters {Dict[str, Formatter]} --
+                text formatting classes keyed by measurement type
+            nlp_config {Tuple} -- configuration of the Spacy pipeline
+            max_chars {Optional[int]} --
+                maximum characters in each parsed document (default = None)
+
+        Returns:
+            {str} -- the key
+        """
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        model = nlp_config[0]
+        classes = sorted((str(key), "{}.{}".format(type(fmt).__module__,
+                                                  type(fmt).__qualname__))
+                         for key, fmt in formatters.items())
+        # the batch size does not change the parses
+        digest.update(repr((PARSE_CACHE_FORMAT, classes, nlp_config[:3],
+                            max_chars, _version("spacy"),
+                            _model_version(model))).encode())
+        return digest.hexdigest()
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def read(self, key):
+        """Read the parsed lines of a cache entry.
+
+        Arguments:
+            key {str} -- the cache key
+
+        Yields:
+            {Dict[str, List[Sentence]]} --
+                each line's sentences keyed by measurement type
+        """
+
+        with open(self._path(key), "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            index_start, = FOOTER.unpack(data[-FOOTER.size:])
+            offsets = pickle.loads(data[index_start: -FOOTER.size])
+            for start, end in zip(offsets, offsets[1:]):
+                yield from pickle.loads(data[start: end])
+
+    def write(self, key, parses):
+        """Write parsed lines to a cache entry as they are
+        yielded. The entry is written to a temporary file which is
+        moved into place once every line has been written, so an
+        interrupted run leaves no entry behind.
+
+        Arguments:
+            key {str} -- the cache key
+            parses {Iterable[Dict[str, List[Sentence]]]} --
+                each line's sentences keyed by measurement type
+
+        Yields:
+            {Dict[str, List[Sentence]]} -- the parsed lines
+        """
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                offsets = [0]
+                for chunk in partition(parses, PARSE_CHUNK_SIZE):
+                    yield from chunk
+                    f.write(pickle.dumps(list(chunk), pickle.HIGHEST_PROTOCOL))
+                    offsets.append(f.tell())
+                index_start = f.tell()
+                f.write(pickle.dumps(offsets, pickle.HIGHEST_PROTOCOL))
+                f.write(FOOTER.pack(index_start))
+            os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _path(self, key):
+        """Path of a cache entry"""
+        return os.path.join(self._cache_dir, "{}.parses".format(key))
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+
+def wordnet_version(data_dirs=None):
+    """The version of the installed WordNet, read from the header of
+    its adjective data file as NLTK does. The file is found in NLTK's
+    data directories without importing NLTK, so a cached startup
+    never imports it.
+
+    Arguments:
+        data_dirs {Optional[List[str]]} --
+            directories to find WordNet in (default = nltk_data_dirs())
+
+    Returns:
+        {Optional[str]} --
+            the version, or None if WordNet is not found
+    """
+
+    for data_dir in nltk_data_dirs() if data_dirs is None else data_dirs:
+        corpora = os.path.join(data_dir, "corpora")
+        path = os.path.join(corpora, "wordnet", "data.adj")
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                return _header_version(f)
+        path = os.path.join(corpora, "wordnet.zip")
+        if os.path.isfile(path):
+            with zipfile.ZipFile(path) as archive, \
+                    archive.open("wordnet/data.adj") as f:
+                return _header_version(f)
+    return None
+
+
+def nltk_data_dirs():
+    """The directories NLTK finds its data in by default, those
+    of ``NLTK_DATA`` first.
+
+    Returns:
+        {List[str]} -- the directories
+    """
+
+    dirs = [d for d in os.environ.get("NLTK_DATA", "").split(os.pathsep) if d]
+    dirs.append(os.path.join(os.path.expanduser("~"), "nltk_data"))
+    dirs.extend(os.path.join(sys.prefix, *parts, "nltk_data")
+                for parts in ((), ("share",), ("lib",)))
+    if sys.platform.startswith("win"):
+        dirs.extend(os.path.join(root, "nltk_data") for root in (
+            os.environ.get("APPDATA", "C:\\"), "C:\\", "D:\\", "E:\\"))
+    else:
+        dirs.extend(["/usr/share/nltk_data", "/usr/local/share/nltk_data",
+                     "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"])
+    return dirs
+
+
+def _header_version(f):
+    """The WordNet version in the licence header of a data file"""
+    for line in f:
+        if not line.startswith(b"  "):
+            # past the licence header
+            break
+        match = re.search(r"Word[nN]et (\d+\+?|\d+\.\d+) Copyright",
+                          line.decode("latin-1"))
+        if match is not None:
+            return match.group(1)
+    return None
+
+
+def _version(package):
+    """The installed version of a package, or None"""
+    try:
+        from importlib import metadata
+        return metadata.version(package)
+    except ImportError:
+        # Python < 3.8, or the package is not installed
+        return None
+
+
+def _model_version(model):
+    """The version of a Spacy model package or directory, or None"""
+    meta_path = os.path.join(model, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    return _version(model)
@@ -0,0 +1,133 @@
+"""Extraction checkpoints"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+from .reader import open_binary
+
+
+# number of bytes before the checkpoint which are checked on resume
+FINGERPRINT_SIZE = 4096
+
+
+class Checkpoint:
+    """Position of an extraction in a text file, saved every
+    ``every`` batches of lines, so that an interrupted extraction
+    can be resumed, or an append-only text extracted incrementally.
+
+    The checkpoint records the byte offset after the last line
+    whose measurements have all been returned, the number of lines
+    and measurements up to it, and a fingerprint of the bytes before
+    it to check that the text has not been changed.
+
+    Arguments:
+        path {str} -- path to the checkpoint file
+        text_path {str} -- path to the text file
+        every {int} -- number of batches between saves (default = 10)
+        incremental {bool} --
+            only extract lines which end with a newline, so that a
+            line which is still being appended is extracted by the
+            next run (default = False)
+        before_save {Optional[Callable[[], None]]} --
+            called before each save, i.e. to flush the output of
+            the measurements (default = None)
+    """
+
+    def __init__(self, path, text_path, every=10, incremental=False,
+                 before_save=None):
+        self._path = path
+        self._text_path = os.path.abspath(text_path)
+        self._every = every
+        self._incremental = incremental
+        self._before_save = before_save
+        self._batches = 0
+        self.offset = 0
+        self.lines = 0
+        self.measurements = 0
+
+    def load(self):
+        """Restore the saved position, if there is one.
+
+        Raises:
+            ValueError --
+                when the checkpoint is of another text, or the text
+                has changed before the checkpoint
+
+        Returns:
+            {bool} -- whether a saved position was restored
+        """
+
+        if not os.path.exists(self._path):
+            return False
+        with open(self._path, "r") as f:
+            state = json.load(f)
+        if state["text"] != self._text_path:
+            raise ValueError("Checkpoint is of another text! {}".format(
+                state["text"]))
+        if state["fingerprint"] != _fingerprint(self._text_path,
+                                                state["offset"]):
+            raise ValueError("Text has changed since the checkpoint! {}".format(
+                self._text_path))
+        self.offset = state["offset"]
+        self.lines = state["lines"]
+        self.measurements = state["measurements"]
+        return True
+
+    def update(self, offset, lines, measurements):
+        """Advance the position past a batch of lines whose
+        measurements have all been returned, saving it every
+        ``every`` batches.
+
+        Arguments:
+            offset {int} -- byte offset after the batch
+            lines {int} -- number of lines in the batch
+            measurements {int} -- number of measurements of the batch
+        """
+
+        self.offset = offset
+        self.lines += lines
+        self.measurements += measurements
+        self._batches += 1
+        if self._batches % self._every == 0:
+            self.save()
+
+    def save(self):
+        """Save the position. The checkpoint is written to a temporary
+        file which is then moved into place, so an interrupted save
+        leaves the previous checkpoint."""
+
+        if self._before_save is not None:
+            self._before_save()
+        state = {"text": self._text_path, "offset": self.offset,
+                 "lines": self.lines, "measurements": self.measurements,
+                 "fingerprint": _fingerprint(self._text_path, self.offset)}
+
+        directory = os.path.dirname(os.path.abspath(self._path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @property
+    def incremental(self):
+        return self._incremental
+
+
+def _fingerprint(path, offset):
+    """Hash of the bytes of a file before an offset"""
+    start = max(0, offset - FINGERPRINT_SIZE)
+    with open_binary(path) as f:
+        if f.seekable():
+            f.seek(start)
+        else:
+            # a compressed stream is read up to the start
+            while start and f.read(min(start, 1 << 20)):
+                start -= min(start, 1 << 20)
+        data = f.read(min(offset, FINGERPRINT_SIZE))
+    return hashlib.sha1(data).hexdigest()
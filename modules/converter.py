@@ -1,7 +1,10 @@
 """Converter class"""
 
+import numpy as np
+
 from .utils import two_round
 from .utils import Measurement
+from .numerals import parse_number
 
 
 class Converter:
@@ -10,7 +13,8 @@ class Converter:
     def __init__(self, measurement_container, return_unconverted=False):
         """Set up measurement converter according to
         type of measurement container passed. Establish its
-        standard unit to convert measurements to.
+        standard unit to convert measurements to, and precompute
+        the factor converting each of its units to standard form.
 
         Arguments:
             measurement_container {measurement.measures} --
@@ -23,6 +27,8 @@ class Converter:
         self._container = measurement_container
         self._standard_unit = self._container.STANDARD_UNIT
         self._return_unconverted = return_unconverted
+        self._factors, self._folded_factors = factor_tables(
+            self._container)
 
     def convert(self, measurements):
         """Convert list of measurements to standard form. If a
@@ -39,19 +45,80 @@ class Converter:
                 a converted measurement
         """
 
-        for measure in measurements:
-            try:
-                if isinstance(measure, tuple):
-                    val = sum(map(self._std, measure))
-                else:
-                    val = self._std(measure)
-                yield Measurement(two_round(val), self._standard_unit)
+        for measure in self.convert_batch(measurements):
+            if measure is not None:
+                yield measure
+
+    def convert_batch(self, measurements):
+        """Convert a batch of measurements to standard form in one
+        vectorised operation. Values are multiplied by their unit's
+        factor, and the parts of tuple measurements summed, together.
+
+        Arguments:
+            measurements {List[Union[Measurement, Tuple[Measurement]]]} --
+                list of measurements
 
+        Returns:
+            {List[Optional[Union[Measurement, Tuple[Measurement]]]]} --
+                the converted measurement for each measurement. A
+                measurement which cannot be converted is kept if
+                ``return_unconverted``, and is otherwise None
+        """
+
+        if not measurements:
+            return []
+
+        values, factors, groups = [], [], []
+        converted = []
+        for idx, measure in enumerate(measurements):
+            parts = measure if isinstance(measure, tuple) else (measure,)
+            try:
+                pairs = [self._value_factor(part) for part in parts]
             except (ValueError, AttributeError):
-                if self._return_unconverted:
-                    yield measure
-                else:
-                    pass
+                converted.append(False)
+                continue
+            converted.append(True)
+            for value, factor in pairs:
+                values.append(value)
+                factors.append(factor)
+                groups.append(idx)
+
+        totals = np.bincount(np.asarray(groups, dtype=np.intp),
+                             weights=np.multiply(values, factors),
+                             minlength=len(measurements)).tolist()
+
+        results = []
+        for measure, total, ok in zip(measurements, totals, converted):
+            if ok:
+                results.append(Measurement(two_round(total),
+                                           self._standard_unit))
+            else:
+                results.append(measure if self._return_unconverted else None)
+        return results
+
+    def _value_factor(self, measure):
+        """Get the numerical value of a ``Measurement`` and the
+        factor converting it to standard form. Units missing from
+        the precomputed tables are converted by the container.
+
+        Arguments:
+            measure {Measurement} -- a ``Measurement``
+
+        Raises:
+            ValueError -- when the value is not a number
+            AttributeError -- when the unit is unknown
+
+        Returns:
+            {Tuple[float, float]} -- (value, factor) pair
+        """
+
+        unit = measure.unit
+        factor = self._factors.get(unit)
+        if factor is None:
+            factor = self._folded_factors.get(unit.lower())
+        if factor is None:
+            return self._std(measure), 1.0
+        return parse_number(measure.value), factor
 
     def _std(self, measure):
         """Convert  ``Measurement`` to standard form.
@@ -63,4 +130,34 @@ class Converter:
             {float} -- measurement value in standard form
         """
 
-        return self._container.default_units({measure.unit: measure.value})[0]
+        value = parse_number(measure.value)
+        return self._container.default_units({measure.unit: value})[0]
+
+
+def factor_tables(measurement_container):
+    """Precompute the factors converting each unit of a measurement
+    container to its standard unit, following the container's own
+    resolution order: units, then aliases, then their lowercase
+    forms. Non-linear units are left to the container.
+
+    Arguments:
+        measurement_container {measurement.measures} --
+            measurement container from the Python `measurement' library
+
+    Returns:
+        {Tuple[Dict[str, float], Dict[str, float]]} --
+            factors keyed by unit, and by lowercase unit
+    """
+
+    units = measurement_container.get_units()
+    aliases = measurement_container.get_aliases()
+    lower_aliases = measurement_container.get_lowercase_aliases()
+
+    def linear(table):
+        return {unit: float(units[target]) for unit, target in table.items()
+                if isinstance(units.get(target), (int, float))}
+
+    identity = {unit: unit for unit in units}
+    factors = {**linear(aliases), **linear(identity)}
+    folded_factors = {**linear(lower_aliases), **linear(identity)}
+    return factors, folded_factors
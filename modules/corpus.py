@@ -0,0 +1,327 @@
+"""Corpus extraction"""
+
+import os
+import re
+import sys
+import glob
+from collections import Counter
+from dataclasses import dataclass
+
+from typing import Optional, Tuple
+
+from .reader import read_text
+from .reader import compression
+from .reader import MappedText
+from .loader import check_max_chars
+from .extractor import attribute
+from .extractor import extract_lines
+from .utils import partition
+
+
+# input which is read from stdin
+STDIN = "-"
+# bytes of text in each work item sent to a worker process
+SHARD_SIZE = 1 << 24
+GLOB_REGEX = re.compile(r"[*?[]")
+
+
+@dataclass(frozen=True)
+class Shard:
+    """The lines of a text file which begin in the byte range
+    [start, end), or a batch of lines read from stdin, after ``line``
+    lines of the text. A compressed file is read whole, with an end
+    of None"""
+    path: str
+    start: int = 0
+    end: Optional[int] = None
+    lines: Optional[Tuple[str, ...]] = None
+    line: int = 0
+
+    @property
+    def size(self):
+        if self.lines is not None:
+            return sum(map(len, self.lines))
+        if self.end is None:
+            return os.path.getsize(self.path) - self.start
+        return self.end - self.start
+
+    def read(self):
+        """Yields the lines of the shard"""
+        if self.lines is not None:
+            yield from self.lines
+            return
+        for line, _ in read_text(self.path, self.start, self.end):
+            yield line
+
+
+class CorpusExtractor:
+    """Measurement tagging pipeline class for a corpus of text files.
+    Files larger than ``shard_size`` are split into shards of lines,
+    smaller files are packed together, and each measurement is
+    attributed to the file it was extracted from.
+
+    Raises:
+        FileNotFoundError -- when an input matches no text file
+        ValueError -- when max_chars is set without a parsing profile
+
+    Arguments:
+        inputs {List[str]} --
+            text files, directories, glob patterns or ``-`` for stdin,
+            see ``expand_inputs``
+        pipelines {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+        parallel_opts {Tuple} --
+            options for parallel processing, (batch_size, n_jobs) pair
+            optionally followed by queue_depth and ordered, see
+            ``CorpusEngine``. The batch size is the number of lines of
+            stdin in each job. If None, pipeline is not run in
+            parallel (default = None)
+        fast_path {bool} --
+            tag unambiguous "<number> <unit>" measurements from the
+            text, only parsing lines which need it (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        shard_size {int} --
+            bytes of text in each job (default = SHARD_SIZE)
+        text_dir {Optional[str]} --
+            directory to look for text files in (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction, see ``Stats`` (default = None)
+    """
+
+    def __init__(self, inputs, pipelines, parallel_opts=None, fast_path=False,
+                 prefilter=True, max_chars=None, shard_size=SHARD_SIZE,
+                 text_dir=None, stats=None):
+        check_max_chars(max_chars)
+        self._paths = expand_inputs(inputs, text_dir)
+        self._parallel_opts = parallel_opts
+        self._fast_path = fast_path
+        self._prefilter = prefilter
+        self._max_chars = max_chars
+        self._shard_size = shard_size
+        self._stats = stats
+        self._counts = Counter()
+        self._pipelines = {key: (tagger, converter)
+                           for key, (tagger, _, converter) in pipelines.items()}
+        self._formatters = {key: formatter
+                            for key, (_, formatter, _) in pipelines.items()}
+
+    def extract(self):
+        """Extract measurements from each text of the corpus.
+
+        Yields:
+            {Union[Measurement, Tuple[Measurement]]} --
+                a measurement attributed to its text
+        """
+
+        if not self._parallel_opts:
+            for shards in schedule(self._paths, self._shard_size):
+                yield from extract_shards(
+                    self._formatters, self._pipelines, shards,
+                    self._fast_path, self._prefilter, self._max_chars,
+                    self._counts, self._stats)
+            return
+
+        # imported here to avoid a circular import
+        from .parallel import CorpusEngine
+
+        batch_size, *opts = self._parallel_opts
+        ordered = opts[2] if len(opts) > 2 else True
+        work = schedule(self._paths, self._shard_size, batch_size,
+                        largest_first=not ordered)
+        yield from CorpusEngine(
+            work, self._formatters, self._pipelines, *opts,
+            fast_path=self._fast_path, prefilter=self._prefilter,
+            max_chars=self._max_chars, counts=self._counts,
+            stats=self._stats)
+
+    @property
+    def paths(self):
+        """The text files of the corpus"""
+        return self._paths
+
+    @property
+    def counts(self):
+        """Counts of the lines read (``lines``) and the lines
+        skipped as they mention no unit (``skipped``)"""
+        return self._counts
+
+    @property
+    def stats(self):
+        """Counts and times of the stages of the extraction,
+        or None if they are not instrumented"""
+        return self._stats
+
+
+def expand_inputs(inputs, text_dir=None):
+    """Expand the inputs of an extraction to text files. An input
+    is ``-`` for stdin, a directory whose files are all read, a glob
+    pattern (``**`` matches any subdirectories) or a text file, which
+    is looked for in ``text_dir`` when it is not found.
+
+    Raises:
+        FileNotFoundError -- when an input matches no text file
+
+    Arguments:
+        inputs {Iterable[str]} -- the inputs
+        text_dir {Optional[str]} --
+            directory to look for text files in (default = None)
+
+    Returns:
+        {List[str]} -- paths of the text files, in input order
+    """
+
+    paths = []
+    for name in inputs:
+        if name == STDIN:
+            paths.append(name)
+        elif os.path.isdir(name):
+            paths.extend(_walk(name))
+        elif GLOB_REGEX.search(name):
+            matches = sorted(path for path in glob.iglob(name, recursive=True)
+                             if os.path.isfile(path))
+            if not matches:
+                raise FileNotFoundError("No files match! {}".format(name))
+            paths.extend(matches)
+        elif os.path.isfile(name):
+            paths.append(name)
+        elif text_dir is not None and os.path.isfile(
+                os.path.join(text_dir, name)):
+            paths.append(os.path.join(text_dir, name))
+        else:
+            raise FileNotFoundError("Invalid filepath! {}".format(name))
+    # read each text once
+    return list(dict.fromkeys(paths))
+
+
+def schedule(paths, shard_size=SHARD_SIZE, batch_size=1000,
+             largest_first=False, stdin=None):
+    """Divide text files into work items of about ``shard_size``
+    bytes. A larger file is split into shards of ``shard_size`` bytes,
+    aligned to its lines when read, and smaller files are packed
+    together, so that each worker process is kept equally busy
+    whatever the sizes of the files. Compressed files cannot be read
+    from an offset without decompressing the text before it, so are
+    never split.
+
+    Arguments:
+        paths {List[str]} -- paths of the text files, or ``-`` for stdin
+        shard_size {int} -- bytes of text in each work item
+            (default = SHARD_SIZE)
+        batch_size {int} --
+            lines of stdin in each work item (default = 1000)
+        largest_first {bool} --
+            schedule the largest work items first, rather than in
+            the order of the files. Stdin is read last (default = False)
+        stdin {Optional[BinaryIO]} --
+            stream read for ``-`` (default = sys.stdin.buffer)
+
+    Yields:
+        {Tuple[Shard]} -- the shards of a work item
+    """
+
+    if largest_first:
+        files = [path for path in paths if path != STDIN]
+        yield from sorted(schedule(files, shard_size),
+                          key=lambda shards: sum(s.size for s in shards),
+                          reverse=True)
+        if STDIN in paths:
+            yield from schedule([STDIN], shard_size, batch_size, stdin=stdin)
+        return
+
+    packed, packed_size = [], 0
+    for path in paths:
+        size = 0 if path == STDIN else os.path.getsize(path)
+        if packed and (path == STDIN or size > shard_size or
+                       packed_size + size > shard_size):
+            yield tuple(packed)
+            packed, packed_size = [], 0
+
+        if path == STDIN:
+            stream = sys.stdin.buffer if stdin is None else stdin
+            lines = (raw.decode("utf-8") for raw in stream)
+            number = 0
+            for batch in partition(lines, batch_size):
+                yield (Shard(path, lines=batch, line=number),)
+                number += len(batch)
+        elif compression(path) is not None:
+            if size > shard_size:
+                yield (Shard(path),)
+            else:
+                packed.append(Shard(path))
+                packed_size += size
+        elif size > shard_size:
+            yield from ((shard,) for shard in _split(path, size, shard_size))
+        else:
+            packed.append(Shard(path, 0, size))
+            packed_size += size
+    if packed:
+        yield tuple(packed)
+
+
+def extract_shards(formatters, pipelines, shards, fast_path=False,
+                   prefilter=True, max_chars=None, counts=None, stats=None):
+    """Extract measurements from shards of text files, attributing
+    each measurement to its file.
+
+    Arguments:
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        shards {Iterable[Shard]} -- the shards
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        counts {Optional[Counter]} --
+            updated with the number of lines read and skipped
+            (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction (default = None)
+
+    Yields:
+        {Union[Measurement, Tuple[Measurement]]} --
+            a measurement attributed to its text
+    """
+
+    for shard in shards:
+        for measure in extract_lines(formatters, pipelines, shard.read(),
+                                     fast_path, prefilter, max_chars, counts,
+                                     first_line=shard.line, stats=stats):
+            yield attribute(measure, shard.path)
+
+
+def _split(path, size, shard_size):
+    """Split a text file into shards of ``shard_size`` bytes,
+    counting the lines before each shard
+
+    Yields:
+        {Shard} -- a shard of the file
+    """
+
+    with MappedText(path) as text:
+        line, counted = 0, 0
+        for start in range(0, size, shard_size):
+            # the lines before the first line of the shard
+            first = text.align(start)
+            line += text.count(counted, first)
+            counted = first
+            yield Shard(path, start, min(start + shard_size, size), line=line)
+
+
+def _walk(directory):
+    """The paths of the files in a directory and its
+    subdirectories, in sorted order, skipping hidden files"""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if not name.startswith("."):
+                yield os.path.join(root, name)
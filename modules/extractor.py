@@ -1,39 +1,103 @@
 """Extractor pipeline"""
 
 import os
-from .loader import SentenceLoader
-from .loader import ParallelLoader
+from bisect import bisect_right
+from itertools import tee
+from itertools import islice
+from itertools import repeat
+from collections import deque
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import replace
 
+from .pipeline import NLP
+from .loader import parse_lines
+from .reader import read_text
+from .loader import cached_lines
+from .loader import check_max_chars
+from .formatter import original_offsets
+from .utils import join
+from .utils import partition
 
-class Extractor:
-    """Measurement tagging pipeline class.
+
+# number of lines whose measurements are converted together
+CONVERT_BATCH_SIZE = 256
+
+
+class MultiExtractor:
+    """Measurement tagging pipeline class for several measurement
+    types. Each sentence is parsed once and tagged by every selected
+    tagger, and measurements are labelled with their measurement type.
 
     Raises:
         FileNotFoundError -- when text file is not found
+        ValueError -- when max_chars is set without a parsing profile
 
     Arguements:
         path {str} -- path to text file to extract
-        tagger {Tagger} -- measurement tagging class
-        formatter {Formatter} -- text formatting class
-        converter {Converter} -- number conversion class
-        parallel_opts {Tuple[int, int]} --
-            options for parallel processing, (batch_size, n_jobs) pair.
-            If None, loader is not run in parallel (default = None)
+        pipelines {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+        parallel_opts {Tuple} --
+            options for parallel processing, (batch_size, n_jobs) pair
+            optionally followed by queue_depth and ordered, see
+            ``ParallelEngine``. If None, pipeline is not run in
+            parallel (default = None)
+        fast_path {bool} --
+            tag unambiguous "<number> <unit>" measurements from the
+            text, only parsing lines which need it (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            parse consecutive lines together in documents of up to
+            ``max_chars`` characters, and tag each sentence. If None,
+            each line is parsed and tagged on its own (default = None)
+        parse_cache {Optional[ParseCache]} --
+            cache of parsed lines. A cached text is tagged from the
+            cache without parsing, and otherwise is cached as it is
+            parsed, unless run in parallel (default = None)
+        checkpoint {Optional[Checkpoint]} --
+            checkpoint to start from and to advance as measurements
+            are returned. Not supported when run in parallel unordered
+            (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction, see ``Stats``. If None, the stages are not
+            instrumented (default = None)
     """
 
-    def __init__(self, path, tagger, formatter, converter, parallel_opts=None):
+    def __init__(self, path, pipelines, parallel_opts=None, fast_path=False,
+                 prefilter=True, max_chars=None, parse_cache=None,
+                 checkpoint=None, stats=None):
         if not os.path.exists(path):
             raise FileNotFoundError("Invalid filepath! {}".format(path))
 
-        self._tagger = tagger
-        self._converter = converter
+        check_max_chars(max_chars)
+
+        self._path = path
+        self._fast_path = fast_path
+        self._prefilter = prefilter
+        self._max_chars = max_chars
+        self._parse_cache = parse_cache
+        self._checkpoint = checkpoint
+        self._stats = stats
+        self._counts = Counter()
+        self._pipelines = {key: (tagger, converter)
+                           for key, (tagger, _, converter) in pipelines.items()}
+        self._formatters = {key: formatter
+                            for key, (_, formatter, _) in pipelines.items()}
 
         if parallel_opts:
-            batch_size, n_jobs = parallel_opts
-            self._sentences = ParallelLoader(
-                formatter, path, batch_size, n_jobs)
+            # imported here to avoid a circular import
+            from .parallel import ParallelEngine
+
+            self._measures = ParallelEngine(
+                path, self._formatters, self._pipelines, *parallel_opts,
+                fast_path=fast_path, prefilter=prefilter,
+                max_chars=max_chars, counts=self._counts,
+                checkpoint=checkpoint, stats=stats)
         else:
-            self._sentences = SentenceLoader(formatter, path)
+            self._measures = None
 
     def extract(self):
         """Extract measurements from each sentence text file.
@@ -43,7 +107,476 @@ class Extractor:
                 ``Measurement`` class containing (value, unit) pairs
         """
 
-        for sent in self._sentences:
-            measures = self._tagger.tag(sent)
-            if measures:
-                yield from self._converter.convert(measures)
+        key = None
+        if self._parse_cache is not None:
+            key = self._parse_cache.key(self._path, self._formatters,
+                                        NLP.config, self._max_chars)
+        cached = key is not None and key in self._parse_cache
+        if self._measures is not None and not cached:
+            yield from self._measures
+            return
+
+        checkpoint = self._checkpoint
+        start = checkpoint.offset if checkpoint is not None else 0
+        # byte offset after each line read but not yet returned
+        offsets = deque()
+        lines = _track(read_text(self._path, start,
+                                 complete=checkpoint is not None and
+                                 checkpoint.incremental), offsets)
+
+        parses = None
+        if cached:
+            parses = self._parse_cache.read(key)
+            if checkpoint is not None:
+                parses = islice(parses, checkpoint.lines, None)
+        elif key is not None and not start:
+            # parse every line, so the entry does not depend on the tags
+            lines, to_parse = tee(lines)
+            parsed = parse_lines(self._formatters, to_parse,
+                                 max_chars=self._max_chars,
+                                 stats=self._stats)
+            parses = self._parse_cache.write(
+                key, (sentences for sentences, _ in parsed))
+
+        on_batch = None
+        if checkpoint is not None:
+            def on_batch(n_lines, n_measures):
+                for _ in range(n_lines - 1):
+                    offsets.popleft()
+                checkpoint.update(offsets.popleft(), n_lines, n_measures)
+
+        yield from extract_lines(self._formatters, self._pipelines, lines,
+                                 self._fast_path, self._prefilter,
+                                 self._max_chars, self._counts, parses,
+                                 on_batch, checkpoint.lines
+                                 if checkpoint is not None else 0,
+                                 self._stats)
+        if checkpoint is not None:
+            checkpoint.save()
+
+    @property
+    def counts(self):
+        """Counts of the lines read (``lines``) and the lines
+        skipped as they mention no unit (``skipped``)"""
+        return self._counts
+
+    @property
+    def stats(self):
+        """Counts and times of the stages of the extraction,
+        or None if they are not instrumented"""
+        return self._stats
+
+
+class Extractor(MultiExtractor):
+    """Measurement tagging pipeline class.
+
+    Raises:
+        FileNotFoundError -- when text file is not found
+        ValueError -- when max_chars is set without a parsing profile
+
+    Arguements:
+        path {str} -- path to text file to extract
+        tagger {Tagger} -- measurement tagging class
+        formatter {Formatter} -- text formatting class
+        converter {Converter} -- number conversion class
+        parallel_opts {Tuple} --
+            options for parallel processing, (batch_size, n_jobs) pair
+            optionally followed by queue_depth and ordered, see
+            ``ParallelEngine``. If None, pipeline is not run in
+            parallel (default = None)
+        fast_path {bool} --
+            tag unambiguous "<number> <unit>" measurements from the
+            text, only parsing lines which need it (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            parse consecutive lines together in documents of up to
+            ``max_chars`` characters, and tag each sentence. If None,
+            each line is parsed and tagged on its own (default = None)
+        parse_cache {Optional[ParseCache]} --
+            cache of parsed lines. A cached text is tagged from the
+            cache without parsing, and otherwise is cached as it is
+            parsed, unless run in parallel (default = None)
+        checkpoint {Optional[Checkpoint]} --
+            checkpoint to start from and to advance as measurements
+            are returned. Not supported when run in parallel unordered
+            (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction, see ``Stats``. If None, the stages are not
+            instrumented (default = None)
+    """
+
+    def __init__(self, path, tagger, formatter, converter, parallel_opts=None,
+                 fast_path=False, prefilter=True, max_chars=None,
+                 parse_cache=None, checkpoint=None, stats=None):
+        super().__init__(path, {None: (tagger, formatter, converter)},
+                         parallel_opts, fast_path, prefilter, max_chars,
+                         parse_cache, checkpoint, stats)
+
+
+def extract_lines(formatters, pipelines, lines, fast_path=False,
+                  prefilter=True, max_chars=None, counts=None, parses=None,
+                  on_batch=None, first_line=0, stats=None):
+    """Extract measurements from lines of text for each
+    measurement type.
+
+    Arguments:
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        lines {Iterable[str]} -- unmodified lines
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        counts {Optional[Counter]} --
+            updated with the number of lines read and skipped
+            (default = None)
+        parses {Optional[Iterable[Dict[str, List[Sentence]]]]} --
+            each line's sentences from a ``ParseCache``. If given,
+            lines are tagged from them without parsing (default = None)
+        on_batch {Optional[Callable[[int, int], None]]} --
+            called with the number of lines and of measurements of
+            each batch of lines, once all of its measurements have
+            been returned (default = None)
+        first_line {int} --
+            the number of lines of the text before the lines, from
+            which measurements' line numbers are counted (default = 0)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction (default = None)
+
+    Yields:
+        {Union[Measurement, Tuple[Measurement]]} --
+            a labelled measurement, with its provenance
+    """
+
+    counts = Counter() if counts is None else counts
+    stage = _untimed if stats is None else stats.stage
+    if stats is not None:
+        lines = stats.timed(lines, 'read')
+    # lines read but not yet tagged
+    unread = deque()
+    lines = _keep(lines, unread)
+    taggers = None
+    if fast_path or prefilter:
+        taggers = {key: tagger for key, (tagger, _) in pipelines.items()}
+    if parses is not None:
+        parsed = cached_lines(formatters, lines, parses, taggers, fast_path,
+                              stats)
+    else:
+        parsed = parse_lines(formatters, lines, taggers, fast_path, max_chars,
+                             stats=stats)
+    if stats is not None:
+        parsed = stats.timed(parsed, 'parse')
+    number = first_line
+    for batch in partition(parsed, CONVERT_BATCH_SIZE):
+        measures = []
+        for sentences, tagged in batch:
+            counts['lines'] += 1
+            if not sentences and not any(tagged.values()):
+                counts['skipped'] += 1
+            with stage('tag'):
+                line_measures = tag_sentences(pipelines, sentences, tagged,
+                                              stats)
+            with stage('locate'):
+                measures.append(locate(formatters, unread.popleft(),
+                                       line_measures))
+        numbers = range(number + 1, number + len(batch) + 1)
+        number += len(batch)
+        n_measures = 0
+        for measure in convert_measures(pipelines, measures, numbers, stats):
+            n_measures += 1
+            yield measure
+        if on_batch is not None:
+            on_batch(len(batch), n_measures)
+
+
+def extract_texts(formatters, pipelines, texts, fast_path=False,
+                  prefilter=True, max_chars=None, counts=None, stats=None):
+    """Extract measurements from texts held in memory, i.e. documents
+    sent to a server. The lines of all the texts are parsed together,
+    so a batch of short texts is parsed in one Spacy pipe.
+
+    Arguments:
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        texts {Iterable[str]} -- the texts, of one or more lines
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        counts {Optional[Counter]} --
+            updated with the number of lines read and skipped
+            (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction (default = None)
+
+    Returns:
+        {List[List[Union[Measurement, Tuple[Measurement]]]]} --
+            the labelled measurements of each text, with line
+            numbers counted from the start of the text
+    """
+
+    lines, firsts = [], []
+    for text in texts:
+        firsts.append(len(lines))
+        lines.extend(split_lines(text))
+    results = [[] for _ in firsts]
+    for measure in extract_lines(formatters, pipelines, lines, fast_path,
+                                 prefilter, max_chars, counts, stats=stats):
+        first = measure[0] if isinstance(measure, tuple) else measure
+        # an empty text shares its first line with the next text
+        idx = bisect_right(firsts, first.line - 1) - 1
+        results[idx].append(_renumber(measure, firsts[idx]))
+    return results
+
+
+def split_lines(text):
+    """Split a text into lines, each ending with its newline
+    as when read from a file.
+
+    Arguments:
+        text {str} -- a text
+
+    Returns:
+        {List[str]} -- the lines of the text
+    """
+
+    lines = text.split("\n")
+    return [line + "\n" for line in lines[:-1]] + (
+        [lines[-1]] if lines[-1] else [])
+
+
+def _renumber(measure, lines):
+    """Count the line of a measurement after the first ``lines`` lines"""
+    if isinstance(measure, tuple):
+        return tuple(_renumber(m, lines) for m in measure)
+    return replace(measure, line=measure.line - lines)
+
+
+def _keep(lines, kept):
+    """Record each line in ``kept`` as it is read
+
+    Arguments:
+        lines {Iterable[str]} -- lines
+        kept {Deque[str]} -- the lines read
+
+    Yields:
+        {str} -- a line
+    """
+
+    for line in lines:
+        kept.append(line)
+        yield line
+
+
+def _track(lines, offsets):
+    """Record the offset after each line in ``offsets`` as it is read
+
+    Arguments:
+        lines {Iterable[Tuple[str, int]]} --
+            (line, offset after the line) pairs
+        offsets {Deque[int]} -- the offsets of the lines read
+
+    Yields:
+        {str} -- a line
+    """
+
+    for line, offset in lines:
+        offsets.append(offset)
+        yield line
+
+
+def _untimed(stage):
+    """A stage of an extraction which is not instrumented"""
+    return nullcontext()
+
+
+def tag_sentences(pipelines, sentences, tagged=None, stats=None):
+    """Tag the measurements in the sentences of a line for
+    each measurement type.
+
+    Arguments:
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        sentences {Dict[str, List[spacy.tokens.Span]]} --
+            the line's sentences keyed by measurement type
+        tagged {Optional[Dict[str, List[Measurement]]]} --
+            measurements already tagged from the text, keyed by
+            measurement type (default = None)
+        stats {Optional[Stats]} --
+            updated with the token positions probed for units and
+            the measurements tagged (default = None)
+
+    Returns:
+        {Dict[str, List[Union[Measurement, Tuple[Measurement]]]]} --
+            measurements keyed by measurement type
+    """
+
+    tagged = tagged or {}
+    measures = {key: tagged[key] if key in tagged else
+                [m for sent in sentences[key] for m in tagger.tag(sent)]
+                for key, (tagger, _) in pipelines.items()}
+    if stats is not None:
+        stats.counts['probes'] += sum(len(sent) for key in sentences
+                                      if key not in tagged
+                                      for sent in sentences[key])
+        stats.counts['matches'] += sum(map(len, measures.values()))
+    return measures
+
+
+def locate(formatters, line, measures):
+    """Map the character offsets of a line's measurements from
+    its formatted lines to the unmodified line.
+
+    Arguments:
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        line {str} -- the unmodified line
+        measures {Dict[str, List[Union[Measurement, Tuple[Measurement]]]]} --
+            the line's measurements keyed by measurement type
+
+    Returns:
+        {Dict[str, List[Union[Measurement, Tuple[Measurement]]]]} --
+            the measurements, with offsets in the unmodified line
+    """
+
+    located = {}
+    for key, line_measures in measures.items():
+        if line_measures:
+            _, offsets = formatters[key].format_offsets(line)
+            line_measures = [_locate(m, offsets) for m in line_measures]
+        located[key] = line_measures
+    return located
+
+
+def _locate(measure, offsets):
+    """Map the offsets of a measurement to the unmodified line"""
+    if isinstance(measure, tuple):
+        return tuple(_locate(m, offsets) for m in measure)
+    if measure.start is None or not offsets:
+        return measure
+    start, end = original_offsets(offsets, measure.start, measure.end)
+    return replace(measure, start=start, end=end)
+
+
+def convert_measures(pipelines, measures, lines=None, stats=None):
+    """Convert the measurements of a batch of sentences, with one
+    batch conversion per measurement type, keeping the order of
+    the sentences.
+
+    Arguments:
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        measures {List[Dict[str, List[Measurement]]]} --
+            each sentence's measurements keyed by measurement type
+        lines {Optional[Iterable[int]]} --
+            the line number of each sentence (default = None)
+        stats {Optional[Stats]} --
+            updated with the measurements converted, and those which
+            could not be converted by their unit (default = None)
+
+    Yields:
+        {Union[Measurement, Tuple[Measurement]]} --
+            a labelled measurement, with its provenance
+    """
+
+    converted = {}
+    for key, (_, converter) in pipelines.items():
+        batch = [m for sent in measures for m in sent[key]]
+        if stats is None:
+            converted[key] = iter(converter.convert_batch(batch))
+            continue
+        with stats.stage('convert'):
+            results = converter.convert_batch(batch)
+        for raw, measure in zip(batch, results):
+            # a measurement which cannot be converted is returned
+            # unconverted, or as None
+            if measure is None or measure is raw:
+                parts = raw if isinstance(raw, tuple) else (raw,)
+                stats.failures[join(p.unit for p in parts)] += 1
+            else:
+                stats.counts['conversions'] += 1
+        converted[key] = iter(results)
+
+    numbers = repeat(None) if lines is None else lines
+    for sent, number in zip(measures, numbers):
+        for key in pipelines:
+            for raw in sent[key]:
+                measure = next(converted[key])
+                if measure is not None:
+                    yield label(provenance(measure, raw, number), key)
+
+
+def provenance(measure, raw, line=None):
+    """Record the provenance of a converted measurement: the number
+    of its line, the span of the measurement tagged from the text, and
+    the tagged measurement. A measurement returned unconverted is
+    its own tagged measurement.
+
+    Arguments:
+        measure {Union[Measurement, Tuple[Measurement]]} --
+            a converted measurement
+        raw {Union[Measurement, Tuple[Measurement]]} --
+            the measurement tagged from the text
+        line {Optional[int]} -- the line number (default = None)
+
+    Returns:
+        {Union[Measurement, Tuple[Measurement]]} --
+            the measurement, with its provenance
+    """
+
+    if measure is raw:
+        if isinstance(measure, tuple):
+            return tuple(replace(m, line=line) for m in measure)
+        return replace(measure, line=line)
+    parts = raw if isinstance(raw, tuple) else (raw,)
+    starts = [p.start for p in parts if p.start is not None]
+    ends = [p.end for p in parts if p.end is not None]
+    return replace(measure, line=line, start=min(starts, default=None),
+                   end=max(ends, default=None), raw=raw)
+
+
+def label(measure, measurement_type):
+    """Label a measurement with its measurement type. Measurements
+    of an unnamed type are returned unchanged.
+
+    Arguments:
+        measure {Union[Measurement, Tuple[Measurement]]} -- a measurement
+        measurement_type {Optional[str]} -- the measurement type
+
+    Returns:
+        {Union[Measurement, Tuple[Measurement]]} -- a labelled measurement
+    """
+
+    if measurement_type is None:
+        return measure
+    if isinstance(measure, tuple):
+        return tuple(label(m, measurement_type) for m in measure)
+    return replace(measure, measurement_type=measurement_type)
+
+
+def attribute(measure, source):
+    """Label a measurement with the text it was extracted from.
+
+    Arguments:
+        measure {Union[Measurement, Tuple[Measurement]]} -- a measurement
+        source {str} -- path to the text, or ``-`` for stdin
+
+    Returns:
+        {Union[Measurement, Tuple[Measurement]]} -- an attributed measurement
+    """
+
+    if isinstance(measure, tuple):
+        return tuple(attribute(m, source) for m in measure)
+    return replace(measure, source=source)
@@ -1,18 +1,38 @@
 """Sentence formatter"""
 
 import re
+from bisect import bisect_right
 
 from .utils import join
-from .utils import flatten
 from .utils import map_funcs
-from .utils import strip_list
+
+
+SPLIT_REGEX = re.compile(r'^([0-9]+)([a-z]+)([0-9]+)?$', re.I)
+COMMA_REGEX = re.compile(r'[()0-9,]+')
+FT_IN_REGEX = re.compile(r'(?!$)(\(?[0-9]+\'){1}([0-9]+\x22?\)?)?')
+TOKEN_REGEX = re.compile(r'\S+')
 
 
 class Formatter:
-    """Base class for formatting."""
+    """Base class for formatting.
 
-    def __init__(self):
-        self._replace_funcs = []
+    The tokens each replacement function may change are matched
+    by its ``trigger`` regex. The triggers are compiled into one
+    pattern, so a line is formatted in a single pass which leaves
+    all other tokens untouched.
+
+    Arguments:
+        replace_funcs {List[Callable[[str], str]]} --
+            replacement functions, applied in order to each token
+            (default = ())
+    """
+
+    def __init__(self, replace_funcs=()):
+        self._replace_funcs = list(replace_funcs)
+        triggers = [split_numerals.trigger] + \
+            [func.trigger for func in self._replace_funcs]
+        self._pattern = re.compile(
+            r'(?<!\S)(?:{})\S*'.format('|'.join(triggers)))
 
     def format(self, line):
         """Format line of text for tagging.
@@ -24,60 +44,134 @@ class Formatter:
         Returns:
             line {str} -- formatted line
         """
-        tokens = strip_list(line.lower().split())
-        split_toks = flatten([split_numerals(tok) for tok in tokens])
-        replace_toks = [map_funcs(tok, self._replace_funcs)
-                        for tok in split_toks]
-        return join(replace_toks)
+        return self._pattern.sub(self._replace, join(line.lower().split()))
+
+    def format_offsets(self, line):
+        """Format a line as ``format`` does, and map the formatted
+        line back to the unmodified line. Each original token is
+        formatted on its own, so the characters formatted from it
+        map back to it.
+
+        Arguments:
+            line {str} -- unmodified line
+
+        Returns:
+            {Tuple[str, List[Tuple[int, int, int, int]]]} --
+                the formatted line, and the offset and length of each
+                formatted token in the formatted line, and the (start,
+                end) offsets of its original token in the unmodified line
+        """
+
+        tokens, offsets, pos = [], [], 0
+        for match in TOKEN_REGEX.finditer(line):
+            token = self._pattern.sub(self._replace, match.group().lower())
+            tokens.append(token)
+            offsets.append((pos, len(token), match.start(), match.end()))
+            pos += len(token) + 1
+        return join(tokens), offsets
+
+    def _replace(self, match):
+        """Split and replace a matched token.
+
+        Arguments:
+            match {re.Match} -- a token matching a trigger
+
+        Returns:
+            {str} -- the replaced token
+        """
+        return join(map_funcs(tok, self._replace_funcs)
+                    for tok in split_numerals(match.group()))
 
 
 class DistanceFormatter(Formatter):
     """Format text for distance tagging."""
 
     def __init__(self):
-        super().__init__()
-        self._replace_funcs = [remove_commas,
-                               replace_feet_inches,
-                               replace_ft]
+        super().__init__([remove_commas,
+                          replace_feet_inches,
+                          replace_ft])
 
 
 class MassFormatter(Formatter):
     """Format text for mass tagging."""
 
     def __init__(self):
-        super().__init__()
-        self._replace_funcs = [remove_commas]
+        super().__init__([remove_commas])
 
 
 class TimeFormatter(Formatter):
     """Format text for time tagging."""
 
     def __init__(self):
-        super().__init__()
-        self._replace_funcs = [remove_commas,
-                               remove_quarter,
-                               remove_moon]
+        super().__init__([remove_commas,
+                          remove_quarter,
+                          remove_moon])
 
 
 class VolumeFormatter(Formatter):
     """Format text for volume tagging."""
 
     def __init__(self):
-        super().__init__()
-        self._replace_funcs = [remove_commas,
-                               remove_quarter]
+        super().__init__([remove_commas,
+                          remove_quarter])
 
 
 class EnergyFormatter(Formatter):
     """Format text for energy tagging."""
 
     def __init__(self):
-        super().__init__()
-        self._replace_funcs = [remove_commas]
+        super().__init__([remove_commas])
+
+
+def original_offsets(offsets, start, end):
+    """Map the character offsets of a span of a formatted line
+    to the unmodified line, see ``Formatter.format_offsets``. Offsets
+    in a token which formatting left the same length map to the same
+    characters, and otherwise to the whole original token.
+
+    Arguments:
+        offsets {List[Tuple[int, int, int, int]]} --
+            the offsets of the tokens of the line
+        start {int} -- start of the span in the formatted line
+        end {int} -- end of the span in the formatted line
+
+    Returns:
+        {Tuple[int, int]} -- (start, end) of the span in the
+            unmodified line
+    """
+
+    positions = [pos for pos, _, _, _ in offsets]
+    pos, length, first, last = offsets[
+        max(bisect_right(positions, start) - 1, 0)]
+    if length == last - first:
+        first += min(start - pos, length)
+    pos, length, begin, last = offsets[
+        max(bisect_right(positions, max(end - 1, start)) - 1, 0)]
+    if length == last - begin:
+        last = begin + min(max(end - pos, 0), length)
+    return first, last
+
+
+def trigger(regex):
+    """Attach a regex to a replacement function which matches
+    the start of every token the function may change.
+
+    Arguments:
+        regex {str} -- a regex matched at the start of a token
+
+    Returns:
+        {Callable} -- decorator setting the function's ``trigger``
+    """
+
+    def decorate(func):
+        func.trigger = regex
+        return func
+    return decorate
 
 
 ### GENERAL REPLACEMENT FUNCTIONS ###
 
+@trigger(r'[0-9]')
 def split_numerals(token):
     """Split conjoined alphanumeric strings.
     e.g. "aa1" -> ["aa", "1"]
@@ -89,11 +183,11 @@ def split_numerals(token):
         {List[str]} -- a list of split strings
     """
 
-    split_regex = r'^([0-9]+)([a-z]+)([0-9]+)?$'
-    match = re.match(split_regex, token, re.I)
+    match = SPLIT_REGEX.match(token)
     return [g for g in match.groups() if g] if match else [token]
 
 
+@trigger(r'[()0-9,]')
 def remove_commas(token):
     """Remove commas in numbers.
     e.g. "5,000" -> "5000"
@@ -105,14 +199,14 @@ def remove_commas(token):
         {str} -- string without commas if
                it is numerical
     """
-    comma_regex = r'[()0-9,]+'
-    if re.match(comma_regex, token):
+    if COMMA_REGEX.match(token):
         token = token.replace(',', '')
     return token
 
 
 ### DISTANCE REPLACEMENT FUNCTIONS ###
 
+@trigger(r'\(?[0-9]+\'')
 def replace_feet_inches(token):
     """Replace punctuations marks for feet and inches with words.
     e.g. 5'7" -> 5 foot 7 inch
@@ -124,8 +218,7 @@ def replace_feet_inches(token):
     Returns:
         {str} -- a replaced string
     """
-    ft_in_regex = r'(?!$)(\(?[0-9]+\'){1}([0-9]+\x22?\)?)?'
-    if re.match(ft_in_regex, token):
+    if FT_IN_REGEX.match(token):
         token = token.replace("'", ' foot ')
         if u'\x22' in token:
             token = token.replace(u'\x22', ' inch')
@@ -134,6 +227,7 @@ def replace_feet_inches(token):
     return token
 
 
+@trigger(r'ft(?!\S)')
 def replace_ft(token):
     """Normalise ft tokens.
     e.g. "ft" -> "foot"
@@ -149,6 +243,7 @@ def replace_ft(token):
 
 ### TIME REPLACEMENT FUNCTIONS ###
 
+@trigger(r'moons?(?!\S)')
 def remove_moon(token):
     """Remove `moon`, an archaic unit
     of time which confuses the tagger.
@@ -166,6 +261,7 @@ def remove_moon(token):
 
 ### OTHER REPLACEMENT FUNCTIONS ###
 
+@trigger(r'quarters?(?!\S)|\S*-quarter')
 def remove_quarter(token):
     """Remove `quarter`, a unit
     of volume or time which confuses the tagger.
@@ -0,0 +1,197 @@
+"""Unit index"""
+
+import re
+
+
+# plurals which do not follow the regular rules
+IRREGULAR_PLURALS = {"foot": "feet", "hertz": "hertz"}
+
+
+class UnitIndex:
+    """Precompiled lookup of measurement units, stored as tuples
+    of lemmas and bucketed by their first lemma. A sentence can be
+    matched against the index in one left-to-right pass, probing only
+    the n-gram lengths that exist for the lemma at each position.
+
+    The surface forms of the units (i.e. "miles" for "mile") are
+    indexed in the same way so that units can be found in text which
+    has not been lemmatised.
+
+    Arguments:
+        tags {Iterable[str]} -- lemma tags to index
+        max_gram {int} -- maximum n-gram unit to index
+    """
+
+    def __init__(self, tags, max_gram):
+        self._max_gram = max_gram
+        self._units = {}
+        self._forms = {}
+        for tag in tags:
+            key = tuple(tag.split())
+            if 0 < len(key) <= max_gram:
+                unit = " ".join(key)
+                self._units[key] = unit
+                for form in surface_forms(key):
+                    self._forms.setdefault(form, unit)
+
+        self._lengths = _lengths(self._units)
+        self._form_lengths = _lengths(self._forms)
+        self._pattern = _pattern(self._units, self._forms)
+
+    def candidates(self, lemmas, start):
+        """Find the units beginning at position ``start``,
+        longest first.
+
+        Arguments:
+            lemmas {Sequence[str]} -- lemmas of a sentence
+            start {int} -- index of the first lemma of the unit
+
+        Yields:
+            {Tuple[int, str]} -- (n-gram length, unit) pairs
+        """
+
+        yield from _probe(self._units, self._lengths, lemmas, start)
+
+    def surface_candidates(self, words, start):
+        """Find the units whose surface forms begin at
+        position ``start``, longest first.
+
+        Arguments:
+            words {Sequence[str]} -- words of a formatted line
+            start {int} -- index of the first word of the unit
+
+        Yields:
+            {Tuple[int, str]} -- (n-gram length, unit) pairs
+        """
+
+        yield from _probe(self._forms, self._form_lengths, words, start)
+
+    def mentions(self, text):
+        """Find every mention of a unit in a line of text,
+        including units joined to other words, i.e. "5-mile"
+        or "43.7m".
+
+        Arguments:
+            text {str} -- a formatted line
+
+        Returns:
+            {List[Tuple[int, int]]} -- (start, end) offsets of mentions
+        """
+
+        return [m.span() for m in self._pattern.finditer(text)]
+
+    def mentioned(self, text):
+        """Check if a line of text mentions any unit.
+
+        Arguments:
+            text {str} -- a formatted line
+
+        Returns:
+            {bool} -- whether a unit is mentioned
+        """
+
+        return self._pattern.search(text) is not None
+
+    def __contains__(self, unit):
+        return tuple(unit.split()) in self._units
+
+    def __len__(self):
+        return len(self._units)
+
+    @property
+    def max_gram(self):
+        return self._max_gram
+
+
+def inflections(word):
+    """The inflected forms of a unit word.
+    e.g. "inch" -> {"inch", "inches"}
+
+    Arguments:
+        word {str} -- a unit lemma
+
+    Returns:
+        {Set[str]} -- the word and its plurals
+    """
+
+    if word in IRREGULAR_PLURALS:
+        return {word, IRREGULAR_PLURALS[word]}
+    if re.search(r'[^aeiou]y$', word):
+        return {word, word[:-1] + 'ies'}
+    if re.search(r'(s|x|z|ch|sh)$', word):
+        return {word, word + 'es'}
+    return {word, word + 's'}
+
+
+def surface_forms(key):
+    """The surface forms of a unit which can be matched on
+    whitespace separated words. Units containing punctuation
+    (i.e. "light-year") are split by the tokeniser, so have none.
+
+    Arguments:
+        key {Tuple[str]} -- lemmas of a unit
+
+    Returns:
+        {Set[Tuple[str]]} -- surface forms of the unit
+    """
+
+    if not all(word.isalnum() for word in key):
+        return set()
+    return {key[:-1] + (form,) for form in inflections(key[-1])}
+
+
+def _lengths(table):
+    """Map the first word of each key to its key lengths, longest first"""
+    lengths = {}
+    for key in table:
+        lengths.setdefault(key[0], set()).add(len(key))
+    return {first: tuple(sorted(ns, reverse=True))
+            for first, ns in lengths.items()}
+
+
+def _probe(table, lengths, words, start):
+    """Look up the keys of each length beginning at ``start``"""
+    for n in lengths.get(words[start], ()):
+        key = tuple(words[start: start + n])
+        if len(key) == n and key in table:
+            yield n, table[key]
+
+
+def _pattern(units, forms):
+    """Compile a regex matching any unit or surface form as a
+    whole word, or joined to a number, preferring the longest
+    alternative"""
+    phrases = {" ".join(key) for key in units} | \
+        {" ".join(key) for key in forms}
+    if not phrases:
+        return re.compile(r'(?!)')
+    return re.compile(r'(?<![^\W\d])(?:{})(?!\w)'.format(_trie_regex(phrases)))
+
+
+def _trie_regex(phrases):
+    """Build a regex matching any of the phrases from a character
+    trie, so each position in a text is only scanned once rather
+    than once per phrase"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _trie_node_regex(trie)
+
+
+def _trie_node_regex(node):
+    """Regex for the phrase suffixes below a trie node"""
+    alternatives = [re.escape(char) + _trie_node_regex(child)
+                    for char, child in sorted(node.items()) if char]
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1:
+        body = alternatives[0]
+    else:
+        body = '(?:{})'.format('|'.join(alternatives))
+    if '' in node:
+        # a phrase ends here, but prefer the longer phrases
+        return '(?:{})?'.format(body) if len(alternatives) == 1 else body + '?'
+    return body
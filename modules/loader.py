@@ -1,101 +1,353 @@
 """Sentence iterator"""
 
-import spacy
-from cytoolz import partition_all
-from joblib import Parallel, delayed
+import re
+from bisect import bisect_left
+from collections import deque
 
-from .utils import flatten
+from .pipeline import NLP
+from .pipeline import PROFILES
+from .sentence import ATTRS
+from .sentence import Sentence
 
 
-NLP = spacy.load('en', disable=['tagger', 'ner', 'textcat'])
+# whitespace which does not follow a number
+SPLIT_REGEX = re.compile(r'(?<![0-9]) ')
 
 
-class AbstractLoader:
-    """Base class to load and tokenise sentences from a dataset.
+def parse_lines(formatters, lines, taggers=None, fast_path=False,
+                max_chars=None, stats=None):
+    """Format lines with each formatter and tokenise them with
+    the Spacy tokeniser, parsing each distinct formatted line once.
+
+    If taggers are given, formatted lines which do not mention any
+    of a tagger's units are not parsed, and have no measurements.
+    With ``fast_path``, formatted lines are instead first tagged from
+    their text with ``Tagger.tag_text``, and only parsed if that fails.
+
+    By default each line is parsed as one document, and is one
+    sentence. With ``max_chars``, consecutive lines are parsed together
+    in documents of up to ``max_chars`` characters and split into
+    sentences, see ``_pipe_sentences``. Sentences are converted to
+    compact ``Sentence`` arrays.
+
+    Arguments:
+        formatters {Dict[str, formatter.Formatter]} --
+            Formatter implementations keyed by measurement type
+        lines {Iterable[str]} -- unmodified lines
+        taggers {Optional[Dict[str, tagger.Tagger]]} --
+            Tagger implementations keyed by measurement type
+            (default = None)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        stats {Optional[Stats]} --
+            updated with the lines filtered and documents parsed, and
+            the time spent formatting and prefiltering (default = None)
+
+    Yields:
+        {Tuple[Dict[str, List[Sentence]], Dict[str, List[Measurement]]]} --
+            each line's sentences and measurements tagged from
+            the text, each keyed by measurement type
+    """
+
+    check_max_chars(max_chars)
+    texts = _text_iter(formatters, lines, taggers, fast_path, stats)
+    if max_chars is None:
+        parsed = ((None if doc is None else [Sentence.from_span(doc)],
+                   context) for doc, context in _pipe(texts, stats))
+    else:
+        parsed = _pipe_sentences(texts, max_chars, stats)
+
+    docs = {}
+    for sents, (text, unparsed, tagged, last) in parsed:
+        if sents is not None:
+            docs[text] = sents
+        if last:
+            yield ({key: docs[line] for key, line in unparsed.items()},
+                   tagged)
+            docs = {}
+
+
+def check_max_chars(max_chars):
+    """Check that the Spacy pipeline can split documents of
+    ``max_chars`` characters into sentences, which needs the
+    dependency parser.
+
+    Raises:
+        ValueError -- when max_chars is set and the pipeline
+            profile does not parse
+
+    Arguments:
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document
+    """
+
+    if max_chars is not None and not PROFILES[NLP.profile].parses:
+        raise ValueError("max_chars needs a profile with the parser to "
+                         "split sentences! {}".format(NLP.profile))
+
+
+def cached_lines(formatters, lines, parses, taggers=None, fast_path=False,
+                 stats=None):
+    """Pair lines with their sentences parsed in an earlier run,
+    see ``cache.ParseCache``. If taggers are given, formatted lines
+    are prefiltered, or tagged from their text with ``fast_path``,
+    as in ``parse_lines``, and their sentences are dropped.
 
     Arguments:
-        formatter {formatter.Formatter} -- Formatter implementation
-        filepath {str} -- path to a text file to load
+        formatters {Dict[str, formatter.Formatter]} --
+            Formatter implementations keyed by measurement type
+        lines {Iterable[str]} -- unmodified lines
+        parses {Iterable[Dict[str, List[Sentence]]]} --
+            each line's sentences keyed by measurement type
+        taggers {Optional[Dict[str, tagger.Tagger]]} --
+            Tagger implementations keyed by measurement type
+            (default = None)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        stats {Optional[Stats]} --
+            updated with the lines filtered and tagged from their
+            text, and the time spent prefiltering (default = None)
+
+    Yields:
+        {Tuple[Dict[str, List[Sentence]], Dict[str, List[Measurement]]]} --
+            each line's sentences and measurements tagged from
+            the text, each keyed by measurement type
     """
 
-    def __init__(self, formatter, filepath):
-        self._formatter = formatter
-        self._filepath = filepath
+    # parses are exhausted first, so a ParseCache.write can finish
+    for sentences, line in zip(parses, lines):
+        if stats is not None:
+            stats.enter('prefilter')
+        texts = {key: formatters[key].format(line) for key in taggers or {}}
+        tagged = _tag_text(texts, taggers or {}, fast_path, stats)
+        if stats is not None:
+            stats.exit()
+        yield ({key: sents for key, sents in sentences.items()
+                if key not in tagged}, tagged)
 
-    def _line_iter(self):
-        """Read and format lines in the file.
 
-        Yields:
-            {str} -- a formatted line
-        """
+def _text_iter(formatters, lines, taggers=None, fast_path=False, stats=None):
+    """Format lines with each formatter and pair each distinct
+    formatted line that needs parsing with its context. A line
+    with nothing to parse is paired with None.
+
+    Arguments:
+        formatters {Dict[str, formatter.Formatter]} --
+            Formatter implementations keyed by measurement type
+        lines {Iterable[str]} -- unmodified lines
+        taggers {Optional[Dict[str, tagger.Tagger]]} --
+            Tagger implementations keyed by measurement type
+            (default = None)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        stats {Optional[Stats]} --
+            updated with the lines filtered, and the time spent
+            formatting and prefiltering (default = None)
 
-        with open(self._filepath, 'r') as f:
-            yield from (self._formatter.format(line) for line in f)
+    Yields:
+        {Tuple[Optional[str], Tuple]} --
+            formatted text and (text, formatted lines to parse,
+            measurements tagged from text, last text) context
+    """
 
-    def _tokenise(self):
-        raise NotImplementedError
+    for line in lines:
+        if stats is not None:
+            stats.enter('format')
+        unparsed = {key: formatter.format(line)
+                    for key, formatter in formatters.items()}
+        if stats is not None:
+            stats.exit()
+            stats.enter('prefilter')
+        tagged = _tag_text(unparsed, taggers or {}, fast_path, stats)
+        for key in tagged:
+            del unparsed[key]
+        if stats is not None:
+            stats.exit()
 
-    def __iter__(self):
-        yield from self._tokenise()
+        texts = list(dict.fromkeys(unparsed.values())) or [None]
+        for idx, text in enumerate(texts):
+            yield text, (text, unparsed, tagged, idx == len(texts) - 1)
 
 
-class SentenceLoader(AbstractLoader):
-    """Load and tokenise sentences with the Spacy tokeniser.
+def _tag_text(texts, taggers, fast_path=False, stats=None):
+    """Tag formatted lines which need no parse from their text: those
+    which do not mention any of their tagger's units, and with
+    ``fast_path`` those whose measurements ``Tagger.tag_text`` finds.
 
     Arguments:
-        formatter {formatter.Formatter} -- Formatter implementation
-        filepath {str} -- path to a text file to load
+        texts {Dict[str, str]} --
+            a formatted line keyed by measurement type
+        taggers {Dict[str, tagger.Tagger]} --
+            Tagger implementations keyed by measurement type
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        stats {Optional[Stats]} --
+            updated with the lines filtered and tagged from their
+            text (default = None)
+
+    Returns:
+        {Dict[str, List[Measurement]]} --
+            measurements of the lines tagged, keyed by measurement type
     """
 
-    def __init__(self, formatter, filepath):
-        super().__init__(formatter, filepath)
+    tagged = {}
+    for key, tagger in taggers.items():
+        if fast_path:
+            measures = tagger.tag_text(texts[key])
+        elif not tagger.index.mentioned(texts[key]):
+            measures = []
+        else:
+            measures = None
+        if measures is not None:
+            tagged[key] = measures
+            if stats is not None:
+                stats.counts['fast_path' if measures else 'filtered'] += 1
+    return tagged
+
+
+def _pipe(texts, stats=None):
+    """Parse (text, context) pairs with Spacy in order. Pairs
+    without text are passed through without parsing.
 
-    def _tokenise(self):
-        """Use the Spacy tokeniser to split
-        lines into lists of Spacy Span objects.
+    Arguments:
+        texts {Iterable[Tuple[Optional[str], Any]]} --
+            (text, context) pairs
+        stats {Optional[Stats]} --
+            updated with the documents parsed (default = None)
+
+    Yields:
+        {Tuple[Optional[spacy.tokens.Doc], Any]} --
+            (doc, context) pairs
+    """
+
+    pending = deque()
 
-        Yields:
-            {List[spacy.tokens.Span]} --
-                a list of Spacy tokenised sentences
-        """
+    def text_iter():
+        for text, context in texts:
+            pending.append((text, context))
+            if text is not None:
+                yield text
 
-        lines = self._line_iter()
-        for sent in NLP.pipe(lines):
-            yield [span for span in sent]
+    for doc in NLP.pipe(text_iter()):
+        if stats is not None:
+            stats.counts['docs'] += 1
+        # flush unparsed pairs queued before this doc
+        while pending[0][0] is None:
+            yield None, pending.popleft()[1]
+        yield doc, pending.popleft()[1]
+    while pending:
+        yield None, pending.popleft()[1]
 
 
-class ParallelLoader(AbstractLoader):
-    """Load and tokenise sentences in parallel with joblib and
-    the Spacy tokeniser.
+def _pipe_sentences(texts, max_chars, stats=None):
+    """Parse (text, context) pairs with Spacy in order, joining
+    consecutive texts into documents of up to ``max_chars``
+    characters, and split each text into its sentences. Sentences
+    are cut at the boundaries of the texts, so each sentence belongs
+    to one text. Texts longer than ``max_chars`` are split, and parsed
+    in several documents. Pairs without text are passed through
+    without parsing.
 
     Arguments:
-        formatter {formatter.Formatter} -- Formatter implementation
-        filepath {str} -- path to a text file to load
-        batch_size {int} -- size of each job (default 1000)
-        n_jobs {int} -- number of jobs (default 3)
+        texts {Iterable[Tuple[Optional[str], Any]]} --
+            (text, context) pairs
+        max_chars {int} -- maximum characters in each document
+        stats {Optional[Stats]} --
+            updated with the documents parsed (default = None)
+
+    Yields:
+        {Tuple[Optional[List[Sentence]], Any]} --
+            (sentences, context) pairs
     """
 
-    def __init__(self, formatter, filepath, batch_size, n_jobs):
-        super().__init__(formatter, filepath)
-        self._batch_size = batch_size
-        self._n_jobs = n_jobs
+    # [context, sentences, number of pieces still to parse]
+    pending = deque()
+    chunks = deque()
+
+    def chunk_iter():
+        chunk, size = [], 0
+        for text, context in texts:
+            entry = [context, None, 0]
+            pending.append(entry)
+            if text is None:
+                continue
+            entry[1] = []
+            pos = 0
+            for piece in split_text(text, max_chars):
+                entry[2] += 1
+                if chunk and size + len(piece) > max_chars:
+                    yield _join(chunk, chunks)
+                    chunk, size = [], 0
+                # offset of the piece in its text
+                pos = text.index(piece, pos)
+                chunk.append((piece, entry, pos))
+                pos += len(piece)
+                size += len(piece) + 1
+        if chunk:
+            yield _join(chunk, chunks)
 
-    def _tokenise(self):
-        """Partition the dataset and run tokeniser in parallel."""
+    for doc in NLP.pipe(chunk_iter()):
+        if stats is not None:
+            stats.counts['docs'] += 1
+        chunk = chunks.popleft()
+        starts = doc.to_array('IDX').tolist()
+        sents = list(doc.sents)
+        array = doc.to_array(ATTRS)
+        offset = 0
+        for piece, entry, pos in chunk:
+            start = bisect_left(starts, offset)
+            end = bisect_left(starts, offset + len(piece))
+            spans = (doc[max(sent.start, start): min(sent.end, end)]
+                     for sent in sents
+                     if sent.start < end and sent.end > start)
+            entry[1].extend(Sentence.from_span(span, array, pos - offset)
+                            for span in spans)
+            entry[2] -= 1
+            offset += len(piece) + 1
+        while pending and not pending[0][2]:
+            context, sentences, _ = pending.popleft()
+            yield sentences, context
+    while pending:
+        context, sentences, _ = pending.popleft()
+        yield sentences, context
 
-        partitions = partition_all(self._batch_size, self._line_iter())
-        executor = Parallel(n_jobs=self._n_jobs)
-        tasks = (delayed(subprocess)(NLP, part)
-                 for part in partitions)
-        return flatten(executor(tasks))
 
+def _join(chunk, chunks):
+    """Join the pieces of text of a document, queueing
+    the pieces to be split from the parsed document"""
+    chunks.append(chunk)
+    return '\n'.join(piece for piece, _, _ in chunk)
 
-def subprocess(nlp, part):
-    """Run the nlp pipeline on a subset of the dataset.
+
+def split_text(text, max_chars):
+    """Split a text into pieces of at most ``max_chars`` characters,
+    after the last sentence end (".", "!" or "?") in each piece if
+    there is one, and otherwise at the last whitespace which does not
+    follow a number.
 
     Arguments:
-        nlp {spacy.Pipe} -- a Spacy pipeline
-        part {Tuple[str]} -- a batch of the dataset
+        text {str} -- a formatted line
+        max_chars {int} -- maximum characters in each piece
+
+    Returns:
+        {List[str]} -- pieces of the text
     """
 
-    return [[span for span in sent] for sent in nlp.pipe(part)]
+    pieces = []
+    text = text.strip()
+    while len(text) > max_chars:
+        window = text[:max_chars + 1]
+        cut = max(window.rfind(end + ' ') for end in '.!?') + 1
+        if cut <= 0:
+            # keep numbers with the unit which follows them
+            cut = max((m.start() for m in SPLIT_REGEX.finditer(window)),
+                      default=window.rfind(' '))
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
@@ -0,0 +1,107 @@
+"""Numeral parser"""
+
+import re
+import math
+import unicodedata
+from functools import lru_cache
+from fractions import Fraction
+
+
+ONES = {"zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+        "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+        "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+        "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+        "nineteen": 19}
+
+TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+        "seventy": 70, "eighty": 80, "ninety": 90}
+
+SCALES = {"thousand": 1e3, "million": 1e6, "billion": 1e9, "trillion": 1e12}
+
+# multiply the preceding number, i.e. "three dozen"
+MULTIPLES = {"hundred": 100, "dozen": 12, "score": 20, "gross": 144,
+             "half": 1 / 2, "halves": 1 / 2, "third": 1 / 3, "thirds": 1 / 3,
+             "quarter": 1 / 4, "quarters": 1 / 4}
+
+ARTICLES = frozenset(["a", "an"])
+
+# the number of distinct lemmas whose values are cached
+CACHE_SIZE = 4096
+
+
+def parse_number(text):
+    """Parse the value of a numerical modifier. Supports digits,
+    decimals, fractions and spelled-out numbers.
+    e.g. "5000" -> 5000.0, "1/2" -> 0.5, "two hundred and fifty" -> 250.0,
+         "a dozen" -> 12.0, "one and a half" -> 1.5
+
+    Values are cached, as the same few numerals recur throughout a text.
+
+    Arguments:
+        text {str} -- a numeral
+
+    Raises:
+        ValueError -- when the text is not a number
+
+    Returns:
+        {float} -- the numeral's value
+    """
+
+    value = _cached_parse(text)
+    if value is None:
+        raise ValueError("Not a number: {}".format(text))
+    return value
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_parse(text):
+    """Parse a numeral, returning None when it is not a number
+    so that failures are cached too"""
+    try:
+        value = _parse(text)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _parse(text):
+    """Parse a numeral, summing the parts joined by "and"."""
+    words = re.split(r'[\s-]+', text.strip().lower().replace(',', ''))
+    parts, part = [], []
+    for word in words:
+        if word == 'and':
+            parts.append(part)
+            part = []
+        elif word:
+            part.append(word)
+    parts.append(part)
+    if not all(parts):
+        raise ValueError(text)
+    return float(sum(_parse_words(part) for part in parts))
+
+
+def _parse_words(words):
+    """Parse a sequence of number words, i.e. ["two", "thousand", "five"]"""
+    total, current = 0, None
+    for word in words:
+        if word in ARTICLES:
+            current = 1 if current is None else current
+        elif word in ONES or word in TENS:
+            current = (current or 0) + ONES.get(word, TENS.get(word))
+        elif word in MULTIPLES:
+            current = (1 if current is None else current) * MULTIPLES[word]
+        elif word in SCALES:
+            total += (1 if current is None else current) * SCALES[word]
+            current = None
+        else:
+            current = (current or 0) + _parse_numeric(word)
+    return total + (current or 0)
+
+
+def _parse_numeric(word):
+    """Parse a number written with digits, i.e. "1.5", "3/4" or "½"."""
+    if '/' in word:
+        return float(Fraction(word))
+    if len(word) == 1 and not word.isascii():
+        return unicodedata.numeric(word)
+    return float(word)
@@ -0,0 +1,291 @@
+"""Parallel extraction"""
+
+from collections import deque
+from collections import Counter
+from concurrent.futures import wait
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+
+from cytoolz import partition_all
+
+from .stats import Stats
+from .pipeline import NLP
+from .reader import read_text
+from .extractor import extract_lines
+from .corpus import extract_shards
+
+
+# extraction pipeline of the current worker process,
+# set once by ``_init_worker``
+_FORMATTERS = None
+_PIPELINES = None
+_FAST_PATH = False
+_PREFILTER = True
+_MAX_CHARS = None
+_STATS = False
+
+
+class ParallelEngine:
+    """Run the full extraction pipeline (format, parse, tag and
+    convert) over batches of lines in a pool of worker processes.
+
+    Workers are sent raw text and return only measurements. At most
+    ``queue_depth`` batches are in flight at a time, so the file is
+    only read as fast as batches complete. Results are streamed back
+    as soon as the next batch in order completes or, when unordered,
+    as soon as any batch completes.
+
+    Raises:
+        ValueError -- when checkpointing an unordered extraction
+
+    Arguments:
+        path {str} -- path to text file to extract
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        batch_size {int} -- number of lines sent to each job
+        n_jobs {int} -- number of worker processes
+        queue_depth {int} --
+            maximum number of batches in flight (default = 2 * n_jobs)
+        ordered {bool} --
+            yield measurements in the order of the file (default = True)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        counts {Optional[Counter]} --
+            updated with the number of lines read and skipped by
+            the workers, and of batches completed (default = None)
+        checkpoint {Optional[Checkpoint]} --
+            checkpoint to start from and to advance as batches are
+            returned, only when ordered (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction in the workers (default = None)
+    """
+
+    def __init__(self, path, formatters, pipelines, batch_size, n_jobs,
+                 queue_depth=None, ordered=True, fast_path=False,
+                 prefilter=True, max_chars=None, counts=None,
+                 checkpoint=None, stats=None):
+        if checkpoint is not None and not ordered:
+            raise ValueError("Unordered extraction cannot be checkpointed!")
+
+        self._path = path
+        self._formatters = formatters
+        self._pipelines = pipelines
+        self._batch_size = batch_size
+        self._n_jobs = n_jobs
+        self._queue_depth = queue_depth or 2 * n_jobs
+        self._ordered = ordered
+        self._fast_path = fast_path
+        self._prefilter = prefilter
+        self._max_chars = max_chars
+        self._counts = Counter() if counts is None else counts
+        self._checkpoint = checkpoint
+        self._stats = stats
+        # byte offset after, and number of lines of, each batch in flight
+        self._batches = {}
+
+    def __iter__(self):
+        initargs = (self._formatters, self._pipelines,
+                    self._fast_path, self._prefilter, self._max_chars,
+                    NLP.config, self._stats is not None)
+        with ProcessPoolExecutor(self._n_jobs, initializer=_init_worker,
+                                 initargs=initargs) as pool:
+            pending = deque() if self._ordered else set()
+            submit = pending.append if self._ordered else pending.add
+            checkpoint = self._checkpoint
+            try:
+                for func, args, batch in self._tasks():
+                    future = pool.submit(func, *args)
+                    self._batches[future] = batch
+                    submit(future)
+                    if len(pending) >= self._queue_depth:
+                        yield from self._next(pending)
+                while pending:
+                    yield from self._next(pending)
+            finally:
+                for future in pending:
+                    future.cancel()
+                self._batches.clear()
+            if checkpoint is not None:
+                checkpoint.save()
+
+    def _tasks(self):
+        """The jobs to run in the worker processes, reading the
+        file from the checkpoint in batches of lines.
+
+        Yields:
+            {Tuple[Callable, Tuple, Tuple[int, int]]} --
+                the function and arguments of a job, and the byte
+                offset after and number of lines of its batch
+        """
+
+        checkpoint = self._checkpoint
+        lines = read_text(self._path,
+                          checkpoint.offset if checkpoint is not None else 0,
+                          complete=checkpoint is not None and
+                          checkpoint.incremental)
+        number = checkpoint.lines if checkpoint is not None else 0
+        for batch in partition_all(self._batch_size, lines):
+            batch, offsets = zip(*batch)
+            yield _extract_batch, (batch, number), (offsets[-1], len(batch))
+            number += len(batch)
+
+    def _next(self, pending):
+        """Wait for the next completed batches, remove them from
+        the in-flight batches and return their measurements. Once a
+        batch's measurements have been returned, the checkpoint is
+        advanced past it.
+
+        Arguments:
+            pending {Union[Deque[Future], Set[Future]]} --
+                the batches in flight
+
+        Yields:
+            {Union[Measurement, Tuple[Measurement]]} --
+                a measurement of the completed batches
+        """
+
+        if self._ordered:
+            done = [pending.popleft()]
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+
+        for future in done:
+            batch_measures, batch_counts, batch_stats = future.result()
+            self._counts.update(batch_counts)
+            self._counts['batches'] += 1
+            if batch_stats is not None:
+                self._stats.update(batch_stats)
+            batch = self._batches.pop(future)
+            yield from batch_measures
+            if self._checkpoint is not None:
+                offset, n_lines = batch
+                self._checkpoint.update(offset, n_lines, len(batch_measures))
+
+
+class CorpusEngine(ParallelEngine):
+    """Run the full extraction pipeline over the work items of a
+    corpus in a pool of worker processes. Workers are sent the byte
+    ranges of files to read, or batches of lines from stdin, and
+    return only measurements attributed to their files.
+
+    Arguments:
+        work {Iterable[Tuple[Shard]]} --
+            the shards of each job, see ``schedule``
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        n_jobs {int} -- number of worker processes
+        queue_depth {int} --
+            maximum number of jobs in flight (default = 2 * n_jobs)
+        ordered {bool} --
+            yield measurements in the order of the work (default = True)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        counts {Optional[Counter]} --
+            updated with the number of lines read and skipped by
+            the workers, and of batches completed (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction in the workers (default = None)
+    """
+
+    def __init__(self, work, formatters, pipelines, n_jobs, queue_depth=None,
+                 ordered=True, fast_path=False, prefilter=True,
+                 max_chars=None, counts=None, stats=None):
+        super().__init__(None, formatters, pipelines, None, n_jobs,
+                         queue_depth, ordered, fast_path, prefilter,
+                         max_chars, counts, stats=stats)
+        self._work = work
+
+    def _tasks(self):
+        for shards in self._work:
+            yield _extract_shards, (shards,), None
+
+
+def _init_worker(formatters, pipelines, fast_path, prefilter, max_chars,
+                 nlp_config, stats=False):
+    """Store the extraction pipeline in the worker process, and
+    load the Spacy model once before the first batch arrives.
+
+    Arguments:
+        formatters {Dict[str, Formatter]} --
+            text formatting classes keyed by measurement type
+        pipelines {Dict[str, Tuple[Tagger, Converter]]} --
+            tagging and conversion classes keyed by measurement type
+        fast_path {bool} -- tag measurements from the text where possible
+        prefilter {bool} -- skip parsing lines which do not mention a unit
+        max_chars {Optional[int]} -- maximum characters in each parsed document
+        nlp_config {Tuple[str, str, Tuple[str], Optional[int]]} --
+            (model, profile, disable, batch_size) configuration of the
+            Spacy pipeline
+        stats {bool} --
+            instrument the stages of each batch (default = False)
+    """
+
+    global _FORMATTERS, _PIPELINES, _FAST_PATH, _PREFILTER, _MAX_CHARS, _STATS
+    _FORMATTERS = formatters
+    _PIPELINES = pipelines
+    _FAST_PATH = fast_path
+    _PREFILTER = prefilter
+    _MAX_CHARS = max_chars
+    _STATS = stats
+    NLP.configure(*nlp_config)
+    NLP.load()
+
+
+def _extract_batch(lines, first_line=0):
+    """Extract measurements from a batch of lines
+    in a worker process.
+
+    Arguments:
+        lines {Tuple[str]} -- a batch of unmodified lines
+        first_line {int} --
+            the number of lines of the text before the batch
+            (default = 0)
+
+    Returns:
+        {Tuple[List[Union[Measurement, Tuple[Measurement]]], Counter,
+               Optional[Stats]]} --
+            the batch's measurements, line counts and statistics
+    """
+
+    counts = Counter()
+    stats = Stats() if _STATS else None
+    measures = list(extract_lines(_FORMATTERS, _PIPELINES, lines,
+                                  _FAST_PATH, _PREFILTER, _MAX_CHARS, counts,
+                                  first_line=first_line, stats=stats))
+    return measures, counts, stats
+
+
+def _extract_shards(shards):
+    """Extract measurements from the shards of a job
+    in a worker process.
+
+    Arguments:
+        shards {Tuple[Shard]} -- the shards of the job
+
+    Returns:
+        {Tuple[List[Union[Measurement, Tuple[Measurement]]], Counter,
+               Optional[Stats]]} --
+            the job's attributed measurements, line counts and statistics
+    """
+
+    counts = Counter()
+    stats = Stats() if _STATS else None
+    measures = list(extract_shards(_FORMATTERS, _PIPELINES, shards,
+                                   _FAST_PATH, _PREFILTER, _MAX_CHARS, counts,
+                                   stats))
+    return measures, counts, stats
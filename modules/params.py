@@ -0,0 +1,71 @@
+"""Measurement type parameters"""
+
+import os
+import json
+
+from .tagger import Tagger
+from .cache import TagCache
+from .converter import Converter
+from .utils import get_class
+
+
+# parameters of each measurement type
+PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "params.json")
+
+
+def load_params(path=PARAMS_PATH):
+    """Load the parameters of each measurement type.
+
+    Arguments:
+        path {str} -- path to the parameters (default = PARAMS_PATH)
+
+    Returns:
+        {Dict[str, Dict]} -- parameters keyed by measurement type
+    """
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def build_pipelines(params, measurement_types, max_gram=2, tag_cache=None,
+                    return_unconverted=False):
+    """Set up the tagging, formatting and conversion classes of
+    each measurement type. Units which are not listed in the
+    parameters are tagged from WordNet.
+
+    Raises:
+        KeyError -- when a measurement type is not in the parameters
+
+    Arguments:
+        params {Dict[str, Dict]} --
+            parameters keyed by measurement type, see ``load_params``
+        measurement_types {List[str]} -- the measurement types
+        max_gram {int} -- the maximum n-gram unit to tag (default = 2)
+        tag_cache {Optional[TagCache]} --
+            cache of the unit tags built from WordNet (default = None)
+        return_unconverted {bool} --
+            return measurements which cannot be converted (default = False)
+
+    Returns:
+        {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+    """
+
+    tag_cache = TagCache() if tag_cache is None else tag_cache
+    pipelines = {}
+    for measurement_type in measurement_types:
+        m = params[measurement_type]
+        container = get_class("measurement.measures", m["container"])
+        formatter = get_class("modules.formatter", m["formatter"])
+        converter = Converter(container, return_unconverted)
+
+        tags, index = m["tags"], None
+        if not tags:
+            tags, index = tag_cache.get(m["synset"], max_gram)
+        # parameters written before ambiguous units have none
+        tagger = Tagger(tags, max_gram, m["right_mods"],
+                        m.get("ambiguous", ()), index)
+        pipelines[measurement_type] = (tagger, formatter, converter)
+    return pipelines
@@ -0,0 +1,192 @@
+"""Spacy pipeline"""
+
+import threading
+from dataclasses import dataclass
+
+from typing import Tuple
+
+
+# default Spacy model
+MODEL = 'en'
+
+# components of the English Spacy pipelines, across Spacy versions
+COMPONENTS = ('tok2vec', 'tagger', 'morphologizer', 'attribute_ruler',
+              'lemmatizer', 'parser', 'senter', 'sentencizer', 'ner',
+              'entity_ruler', 'entity_linker', 'textcat')
+
+# components needed for lemmas, by Spacy major version. Spacy 2 falls
+# back to lookup lemmas without a tagger, Spacy 3 lemmatises by rule
+# from the tagger's part-of-speech tags
+LEMMATISERS = {2: (), 3: ('tok2vec', 'tagger', 'attribute_ruler',
+                          'lemmatizer')}
+
+
+@dataclass(frozen=True)
+class Profile:
+    """The pipeline components a tagging strategy needs, and the
+    batch size to parse texts with. Every other component is
+    excluded when the model is loaded."""
+    components: Tuple[str, ...]
+    lemmas: bool = True
+    batch_size: int = 1000
+
+    @property
+    def parses(self):
+        """Whether the profile keeps the dependency parser"""
+        return 'parser' in self.components
+
+    def exclude(self, spacy_version):
+        """The components to exclude from a Spacy pipeline.
+
+        Arguments:
+            spacy_version {int} -- Spacy major version
+
+        Returns:
+            {Tuple[str]} -- names of the components to exclude
+        """
+
+        keep = set(self.components)
+        if self.lemmas:
+            keep.update(LEMMATISERS.get(spacy_version, LEMMATISERS[3]))
+        return tuple(name for name in COMPONENTS if name not in keep)
+
+
+PROFILES = {
+    # every component of the model
+    'full': Profile(COMPONENTS),
+    # lemmas and a dependency parse, all ``Tagger.tag`` reads
+    'parse': Profile(('tok2vec', 'parser')),
+    # lemmas only, for lines which are prefiltered or tagged from
+    # their text, as the rest are tagged by the numbers next to
+    # their units without a parse
+    'lemmas': Profile(()),
+}
+
+DEFAULT_PROFILE = 'parse'
+
+
+class Pipeline:
+    """Process-wide Spacy pipeline, loaded on first use so that
+    importing the package (or running ``main.py --help``) does not
+    import Spacy or load its model. Only the components of the
+    pipeline profile are loaded. The model is loaded once however
+    many threads first use it at once, but Spacy pipelines are not
+    thread-safe, so only one thread should parse with it at a time.
+
+    Arguments:
+        model {str} -- name or path of the Spacy model (default = MODEL)
+        profile {str} --
+            name of the pipeline profile (default = DEFAULT_PROFILE)
+        disable {Iterable[str]} --
+            further components to exclude (default = ())
+        batch_size {Optional[int]} --
+            ``nlp.pipe`` batch size, or None for the profile's
+            (default = None)
+    """
+
+    def __init__(self, model=MODEL, profile=DEFAULT_PROFILE, disable=(),
+                 batch_size=None):
+        self._model = model
+        self._profile = _profile(profile)
+        self._disable = tuple(disable)
+        self._batch_size = batch_size
+        self._nlp = None
+        self._lock = threading.Lock()
+
+    def configure(self, model=None, profile=None, disable=None,
+                  batch_size=None):
+        """Set the model, profile, excluded components and batch size.
+        If the model, profile or components change, a model which has
+        already been loaded is reloaded on next use.
+
+        Raises:
+            KeyError -- when the profile does not exist
+
+        Arguments:
+            model {Optional[str]} --
+                name or path of the Spacy model (default = unchanged)
+            profile {Optional[str]} --
+                name of the pipeline profile (default = unchanged)
+            disable {Optional[Iterable[str]]} --
+                further components to exclude (default = unchanged)
+            batch_size {Optional[int]} --
+                ``nlp.pipe`` batch size (default = unchanged)
+        """
+
+        config = (self._model if model is None else model,
+                  self._profile if profile is None else _profile(profile),
+                  self._disable if disable is None else tuple(disable))
+        if batch_size is not None:
+            self._batch_size = batch_size
+        if config != (self._model, self._profile, self._disable):
+            self._model, self._profile, self._disable = config
+            self._nlp = None
+
+    def load(self):
+        """Load the Spacy model, if it is not already loaded.
+
+        Returns:
+            {spacy.language.Language} -- the Spacy pipeline
+        """
+
+        nlp = self._nlp
+        if nlp is None:
+            with self._lock:
+                nlp = self._nlp
+                if nlp is None:
+                    nlp = self._nlp = self._spacy_load()
+        return nlp
+
+    def _spacy_load(self):
+        """Load the Spacy model, excluding the components of the
+        profile and ``disable``"""
+        import spacy
+
+        version = int(spacy.__version__.split('.')[0])
+        exclude = list(self._profile_exclude(version))
+        if version < 3:
+            return spacy.load(self._model, disable=exclude)
+        return spacy.load(self._model, exclude=exclude)
+
+    def pipe(self, texts, **kwargs):
+        """Process a stream of texts with ``Language.pipe``, in
+        batches of ``batch_size``"""
+        kwargs.setdefault('batch_size', self.batch_size)
+        return self.load().pipe(texts, **kwargs)
+
+    def _profile_exclude(self, spacy_version):
+        """The components excluded by the profile and ``disable``"""
+        exclude = PROFILES[self._profile].exclude(spacy_version)
+        return tuple(dict.fromkeys(exclude + self._disable))
+
+    def __call__(self, text):
+        return self.load()(text)
+
+    @property
+    def loaded(self):
+        return self._nlp is not None
+
+    @property
+    def profile(self):
+        return self._profile
+
+    @property
+    def batch_size(self):
+        """The ``nlp.pipe`` batch size, set or of the profile"""
+        return self._batch_size or PROFILES[self._profile].batch_size
+
+    @property
+    def config(self):
+        """(model, profile, disable, batch_size) tuple, to configure
+        the pipeline of another process"""
+        return self._model, self._profile, self._disable, self._batch_size
+
+
+def _profile(name):
+    """Check a profile name"""
+    if name not in PROFILES:
+        raise KeyError("Unknown pipeline profile! {}".format(name))
+    return name
+
+
+NLP = Pipeline()
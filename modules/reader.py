@@ -0,0 +1,221 @@
+"""Text file reader"""
+
+import io
+import os
+import bz2
+import gzip
+import mmap
+
+
+# bytes of a memory-mapped file copied at a time to count its lines
+COUNT_BLOCK_SIZE = 1 << 24
+# leading bytes of each supported compression format
+MAGIC = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\x28\xb5\x2f\xfd': 'zstd'}
+
+
+class MappedText:
+    """A text file memory-mapped for reading, so that the lines of
+    any byte range can be found without reading the rest of the file,
+    and each line is only decoded as it is read. The lines of one range
+    are read at a time.
+
+    Arguments:
+        path {str} -- path to an uncompressed text file
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._file = None
+        self._map = None
+        self._size = 0
+
+    def __enter__(self):
+        self._file = open(self._path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        # empty files cannot be mapped
+        if self._size:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+            if hasattr(self._map, 'madvise'):
+                self._map.madvise(mmap.MADV_SEQUENTIAL)
+        return self
+
+    def __exit__(self, *exc):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._size
+
+    def align(self, offset):
+        """The offset of the first line which begins at or after
+        ``offset``, or the size of the file if there is none.
+
+        Arguments:
+            offset {int} -- a byte offset
+
+        Returns:
+            {int} -- the offset of the start of a line
+        """
+
+        if offset <= 0:
+            return 0
+        if offset >= self._size:
+            return self._size
+        newline = self._map.find(b'\n', offset - 1)
+        return self._size if newline < 0 else newline + 1
+
+    def count(self, start=0, end=None):
+        """The number of lines which end in the byte range [start, end).
+
+        Arguments:
+            start {int} -- start of the range (default = 0)
+            end {Optional[int]} -- end of the range, or None to count
+                to the end of the file (default = None)
+
+        Returns:
+            {int} -- the number of newlines in the range
+        """
+
+        end = self._size if end is None else min(end, self._size)
+        n = 0
+        # counted in blocks, so the range is not copied at once
+        for pos in range(start, end, COUNT_BLOCK_SIZE):
+            n += self._map[pos: min(pos + COUNT_BLOCK_SIZE, end)].count(b'\n')
+        return n
+
+    def lines(self, start=0, end=None, complete=False):
+        """Decode the lines which begin in the byte range [start, end),
+        with the byte offset after each line.
+
+        Arguments:
+            start {int} -- start of the range (default = 0)
+            end {Optional[int]} -- end of the range, or None to read
+                to the end of the file (default = None)
+            complete {bool} --
+                stop at the first line which does not end with a
+                newline (default = False)
+
+        Yields:
+            {Tuple[str, int]} -- (line, offset after the line) pairs
+        """
+
+        end = self._size if end is None else min(end, self._size)
+        offset = self.align(start)
+        if offset >= end:
+            return
+        self._map.seek(offset)
+        for line in iter(self._map.readline, b''):
+            if complete and not line.endswith(b'\n'):
+                return
+            offset += len(line)
+            yield line.decode('utf-8'), offset
+            if offset >= end:
+                return
+
+
+def compression(path):
+    """The compression format of a file, from its leading bytes.
+
+    Arguments:
+        path {str} -- path to a file
+
+    Returns:
+        {Optional[str]} -- gzip, bz2 or zstd, or None if uncompressed
+    """
+
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    for magic, name in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_binary(path):
+    """Open a text file in binary mode, decompressing gzip, bz2 and
+    zstd files as they are read. Offsets into a compressed file are
+    offsets into its decompressed text.
+
+    Raises:
+        ImportError -- when reading a zstd file without ``zstandard``
+
+    Arguments:
+        path {str} -- path to a text file
+
+    Returns:
+        {BinaryIO} -- the file
+    """
+
+    kind = compression(path)
+    if kind == 'gzip':
+        return gzip.open(path, 'rb')
+    if kind == 'bz2':
+        return bz2.open(path, 'rb')
+    if kind == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Install zstandard to read zstd "
+                              "compressed texts! {}".format(path)) from None
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+        return io.BufferedReader(reader)
+    return open(path, 'rb')
+
+
+def read_text(path, start=0, end=None, complete=False):
+    """Decode the lines of a text file which begin in the byte
+    range [start, end), with the byte offset after each line. An
+    uncompressed file is memory-mapped, and a compressed file is
+    decompressed as a stream from its start.
+
+    Arguments:
+        path {str} -- path to a text file
+        start {int} -- start of the range (default = 0)
+        end {Optional[int]} -- end of the range, or None to read
+            to the end of the file (default = None)
+        complete {bool} --
+            stop at the first line which does not end with a
+            newline (default = False)
+
+    Yields:
+        {Tuple[str, int]} -- (line, offset after the line) pairs
+    """
+
+    if compression(path) is None:
+        with MappedText(path) as text:
+            yield from text.lines(start, end, complete)
+    else:
+        with open_binary(path) as f:
+            # compressed streams cannot seek, so are read from the start
+            begin = 0
+            for line, offset in read_lines(f, complete):
+                if end is not None and begin >= end:
+                    return
+                if begin >= start:
+                    yield line, offset
+                begin = offset
+
+
+def read_lines(f, complete=False):
+    """Read and decode the lines of a binary file from its current
+    position, with the byte offset after each line.
+
+    Arguments:
+        f {BinaryIO} -- a file opened in binary mode
+        complete {bool} --
+            stop at the first line which does not end with a
+            newline (default = False)
+
+    Yields:
+        {Tuple[str, int]} -- (line, offset after the line) pairs
+    """
+
+    offset = f.tell()
+    for raw in f:
+        if complete and not raw.endswith(b'\n'):
+            return
+        offset += len(raw)
+        yield raw.decode('utf-8'), offset
+
@@ -0,0 +1,156 @@
+"""Compact sentence"""
+
+import numpy as np
+
+
+# token attributes stored for each sentence
+ATTRS = ['LEMMA', 'DEP', 'HEAD', 'IDX', 'LENGTH']
+
+
+class Sentence:
+    """A parsed sentence stored as arrays of its token attributes,
+    so it can be tagged without creating Spacy ``Token`` objects, and
+    is cheap to pickle.
+
+    Arguments:
+        lemmas {List[str]} -- lemma of each token
+        deps {np.ndarray} -- dependency label ID of each token
+        heads {np.ndarray} --
+            index of each token's head in the sentence, or -1
+            when the head is outside the sentence
+        labels {Dict[int, str]} -- the dependency labels of the IDs
+        starts {Optional[np.ndarray]} --
+            character offset of each token in its line (default = None)
+        ends {Optional[np.ndarray]} --
+            character offset after each token in its line (default = None)
+    """
+
+    __slots__ = ('lemmas', 'deps', 'heads', 'labels', 'starts', 'ends',
+                 '_children')
+
+    def __init__(self, lemmas, deps, heads, labels, starts=None, ends=None):
+        self.lemmas = lemmas
+        self.deps = deps
+        self.heads = heads
+        self.labels = labels
+        self.starts = starts
+        self.ends = ends
+        self._children = None
+
+    @classmethod
+    def from_span(cls, span, array=None, shift=0):
+        """Convert a Spacy ``Doc`` or ``Span``, or a list of
+        consecutive Spacy tokens, to a ``Sentence``.
+
+        Arguments:
+            span {Union[spacy.tokens.Doc, spacy.tokens.Span,
+                        List[spacy.tokens.Token]]} -- a sentence
+            array {Optional[np.ndarray]} --
+                the ``ATTRS`` of the span's document, from
+                ``Doc.to_array`` (default = None)
+            shift {int} --
+                added to the character offsets of the tokens in the
+                document to give their offsets in the line, when the
+                document is not the line (default = 0)
+
+        Returns:
+            {Sentence} -- the compact sentence
+        """
+
+        if not len(span):
+            return cls([], np.zeros(0, np.uint64), np.zeros(0, np.intp), {},
+                       np.zeros(0, np.int64), np.zeros(0, np.int64))
+        doc = span[0].doc
+        start = span[0].i
+        end = start + len(span)
+        if array is None:
+            array = doc.to_array(ATTRS)
+        rows = array[start: end]
+
+        strings = doc.vocab.strings
+        lemmas = [strings[lemma] if lemma else doc[start + i].lemma_
+                  for i, lemma in enumerate(rows[:, 0].tolist())]
+        deps = rows[:, 1]
+        # heads are stored as offsets from the token
+        heads = np.arange(len(rows)) + rows[:, 2].astype(np.int64)
+        heads[(heads < 0) | (heads >= len(rows))] = -1
+        labels = {dep: strings[dep] for dep in set(deps.tolist())}
+        starts = rows[:, 3].astype(np.int64) + shift
+        ends = starts + rows[:, 4].astype(np.int64)
+        return cls(lemmas, deps, heads, labels, starts, ends)
+
+    @property
+    def parsed(self):
+        """Whether the sentence has a dependency parse, which
+        labels at least its root"""
+        return any(self.labels.values())
+
+    def dep(self, i):
+        """The dependency label of token ``i``"""
+        return self.labels[int(self.deps[i])]
+
+    def offsets(self, tokens):
+        """The character offsets of the span of some tokens
+        in their line.
+
+        Arguments:
+            tokens {Iterable[int]} -- indices of tokens
+
+        Returns:
+            {Tuple[Optional[int], Optional[int]]} --
+                (start, end) offsets, which are None when the
+                sentence has no offsets
+        """
+
+        if self.starts is None:
+            return None, None
+        tokens = list(tokens)
+        return (int(min(self.starts[i] for i in tokens)),
+                int(max(self.ends[i] for i in tokens)))
+
+    def children(self, i):
+        """The indices of the children of token ``i``, from left
+        to right. The children of every token are indexed on first
+        use, so each lookup is independent of the sentence length.
+
+        Arguments:
+            i {int} -- index of a token
+
+        Returns:
+            {np.ndarray} -- indices of its children
+        """
+
+        if self._children is None:
+            # tokens sorted by head, in sentence order for each head
+            order = np.argsort(self.heads, kind='stable')
+            bounds = np.searchsorted(self.heads[order],
+                                     np.arange(len(self) + 1))
+            self._children = order, bounds
+        order, bounds = self._children
+        children = order[bounds[i]: bounds[i + 1]]
+        return children[children != i]
+
+    def lefts(self, i):
+        """The indices of the children to the left of
+        token ``i``, from left to right"""
+        children = self.children(i)
+        return children[children < i].tolist()
+
+    def rights(self, i):
+        """The indices of the children to the right of
+        token ``i``, from left to right"""
+        children = self.children(i)
+        return children[children > i].tolist()
+
+    def __len__(self):
+        return len(self.lemmas)
+
+    def __getstate__(self):
+        return (self.lemmas, self.deps, self.heads, self.labels,
+                self.starts, self.ends)
+
+    def __setstate__(self, state):
+        (self.lemmas, self.deps, self.heads, self.labels,
+         self.starts, self.ends) = state
+        self._children = None
+
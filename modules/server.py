@@ -0,0 +1,255 @@
+"""Extraction server"""
+
+import os
+import json
+import asyncio
+from collections import Counter
+
+from .pipeline import NLP
+from .sinks import record
+from .batcher import Batcher
+from .batcher import BATCH_SIZE
+from .batcher import MAX_LATENCY
+
+
+# maximum bytes of a request body
+MAX_BODY_SIZE = 1 << 24
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class Server:
+    """Long-running extraction service, which keeps the Spacy model
+    and the pipelines of its measurement types loaded between requests.
+
+    The texts of concurrent requests are extracted together in
+    micro-batches by a ``Batcher``, in a background thread, so
+    requests keep being received, and batched, meanwhile.
+
+    The server speaks HTTP/1.1, over TCP or a Unix socket:
+
+        POST /extract {"text": str} or {"texts": [str, ...]},
+            optionally with "types": [measurement type, ...]
+        GET /health
+
+    An extraction responds with the records of the measurements of
+    the text, or a list of the records of each text, see
+    ``sinks.record``. Line numbers are counted from the start of
+    each text.
+
+    Arguments:
+        pipelines {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        batch_size {int} --
+            maximum number of texts extracted together
+            (default = BATCH_SIZE)
+        max_latency {float} --
+            seconds a request waits for other requests to be batched
+            with (default = MAX_LATENCY)
+    """
+
+    def __init__(self, pipelines, fast_path=False, prefilter=True,
+                 max_chars=None, batch_size=BATCH_SIZE,
+                 max_latency=MAX_LATENCY):
+        self._pipelines = pipelines
+        self._batcher_opts = (fast_path, prefilter, max_chars, batch_size,
+                              max_latency)
+        self._counts = Counter()
+        self._batcher = None
+        self._server = None
+        self._path = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Load the Spacy model and start serving.
+
+        Arguments:
+            host {str} -- host to listen on (default = 127.0.0.1)
+            port {int} --
+                port to listen on, or 0 for any free port (default = 0)
+            path {Optional[str]} --
+                path of a Unix socket to listen on instead (default = None)
+
+        Returns:
+            {asyncio.AbstractServer} -- the listening server
+        """
+
+        await asyncio.get_running_loop().run_in_executor(None, NLP.load)
+        self._batcher = Batcher(self._pipelines, *self._batcher_opts)
+        if path is not None:
+            self._path = path
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        """Stop serving, once the requests already received
+        are extracted"""
+        self._server.close()
+        await self._server.wait_closed()
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._batcher.close)
+
+    async def extract(self, texts, types=None):
+        """Extract measurements from texts, in a batch with the
+        texts of other requests.
+
+        Raises:
+            KeyError --
+                when a measurement type is not served, in which
+                case no text is extracted
+
+        Arguments:
+            texts {List[str]} -- the texts
+            types {Optional[List[str]]} --
+                the measurement types to extract, or None for
+                every type served (default = None)
+
+        Returns:
+            {List[List[Union[Measurement, Tuple[Measurement]]]]} --
+                the labelled measurements of each text
+        """
+
+        if types is not None:
+            for key in types:
+                if key not in self._pipelines:
+                    raise KeyError("Invalid measurement type! {}".format(key))
+            types = frozenset(types)
+        futures = []
+        try:
+            for text in texts:
+                futures.append(asyncio.wrap_future(
+                    self._batcher.submit(text, types)))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return list(await asyncio.gather(*futures))
+
+    @property
+    def counts(self):
+        """Counts of the requests, batches and texts extracted,
+        and of the lines read and skipped"""
+        counts = Counter(self._counts)
+        if self._batcher is not None:
+            # copied at once, as the batcher's thread updates them
+            counts.update(dict(self._batcher.counts))
+        return counts
+
+    async def _handle(self, reader, writer):
+        """Serve the HTTP requests of a connection"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self._respond(method, target, body)
+                _write_response(writer, status, payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            _write_response(writer, 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, body):
+        """The status and JSON payload of the response to a request"""
+        if target == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET!"}
+            return 200, {"status": "ok", "types": list(self._pipelines),
+                         "counts": dict(self.counts)}
+        if target != "/extract":
+            return 404, {"error": "Not found! {}".format(target)}
+        if method != "POST":
+            return 405, {"error": "Use POST!"}
+
+        try:
+            request = json.loads(body)
+            single = "text" in request
+            texts = [request["text"]] if single else request["texts"]
+            types = request.get("types")
+            if not isinstance(texts, list) or not all(
+                    isinstance(text, str) for text in texts):
+                raise TypeError
+            if types is not None and not (isinstance(types, list) and all(
+                    isinstance(key, str) for key in types)):
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return 400, {"error": 'Send {"text": str} or {"texts": [str]}, '
+                                  'and optionally {"types": [str]}!'}
+
+        self._counts['requests'] += 1
+        try:
+            results = await self.extract(texts, types)
+        except KeyError as e:
+            return 400, {"error": e.args[0]}
+        except Exception as e:
+            return 500, {"error": repr(e)}
+        records = [[_record(m) for m in measures] for measures in results]
+        return 200, {"measurements": records[0] if single else records}
+
+
+def _record(measure):
+    """The record of a measurement, without the file"""
+    fields = record(measure)
+    del fields["file"]
+    return fields
+
+
+async def _read_request(reader):
+    """Read an HTTP request from a connection.
+
+    Raises:
+        ValueError -- when the request is malformed or too large
+
+    Returns:
+        {Optional[Tuple[str, str, Dict[str, str], bytes]]} --
+            the method, target, headers and body of the request,
+            or None once the connection is closed
+    """
+
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise ValueError("Malformed request line!") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    size = int(headers.get("content-length", 0) or 0)
+    if size > MAX_BODY_SIZE:
+        raise ValueError("Request body is too large!")
+    body = await reader.readexactly(size)
+    return method, target, headers, body
+
+
+def _write_response(writer, status, payload):
+    """Write a JSON HTTP response to a connection"""
+    body = json.dumps(payload).encode("utf-8")
+    head = ("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n"
+            "Content-Length: {}\r\n\r\n").format(status, REASONS[status],
+                                                 len(body))
+    writer.write(head.encode("latin-1") + body)
@@ -0,0 +1,228 @@
+"""Output sinks"""
+
+import csv
+import json
+
+from .utils import join
+
+
+# measurements written to the output at a time
+BATCH_SIZE = 1000
+# fields of each measurement record, with its provenance
+FIELDS = ("file", "line", "start", "end", "measurement_type",
+          "raw_value", "raw_unit", "value", "unit")
+
+
+class Sink:
+    """Base class to write measurements to an output in batches.
+
+    Arguments:
+        f {IO} -- the output file
+        batch_size {int} --
+            number of measurements written at a time
+            (default = BATCH_SIZE)
+    """
+
+    def __init__(self, f, batch_size=BATCH_SIZE):
+        self._f = f
+        self._batch_size = batch_size
+        self._batch = []
+
+    def write(self, measure):
+        """Queue a measurement, writing the batch once it is full.
+
+        Arguments:
+            measure {Union[Measurement, Tuple[Measurement]]} --
+                a measurement
+        """
+
+        self._batch.append(measure)
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the queued measurements, and flush the output"""
+        if self._batch:
+            self._write(self._batch)
+            self._batch = []
+        self._f.flush()
+
+    def close(self):
+        """Write the queued measurements and finish the output.
+        The output file is left open."""
+        self.flush()
+
+    def _write(self, measures):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TextSink(Sink):
+    """Write one measurement per line, as "<value> <unit>",
+    optionally prefixed with its file and measurement type.
+
+    Arguments:
+        f {TextIO} -- the output file
+        batch_size {int} --
+            number of measurements written at a time
+            (default = BATCH_SIZE)
+        sources {bool} -- prefix the file (default = False)
+        types {bool} -- prefix the measurement type (default = False)
+    """
+
+    def __init__(self, f, batch_size=BATCH_SIZE, sources=False, types=False):
+        super().__init__(f, batch_size)
+        self._sources = sources
+        self._types = types
+
+    def _write(self, measures):
+        self._f.write("".join(self._line(m) for m in measures))
+
+    def _line(self, measure):
+        text = join(measure) if isinstance(measure, tuple) else str(measure)
+        first = measure[0] if isinstance(measure, tuple) else measure
+        if self._types:
+            text = join([first.measurement_type, text], sep="\t")
+        if self._sources:
+            text = join([first.source, text], sep="\t")
+        return text + "\n"
+
+
+class RecordSink(Sink):
+    """Base class to write measurements as records, with the
+    fields of ``record``.
+
+    Arguments:
+        f {IO} -- the output file
+        batch_size {int} --
+            number of measurements written at a time
+            (default = BATCH_SIZE)
+        source {Optional[str]} --
+            the file of measurements which are not attributed to
+            one, i.e. extracted from a single text (default = None)
+    """
+
+    def __init__(self, f, batch_size=BATCH_SIZE, source=None):
+        super().__init__(f, batch_size)
+        self._source = source
+
+    def _records(self, measures):
+        return [record(m, self._source) for m in measures]
+
+
+class JsonlSink(RecordSink):
+    """Write one JSON record per line"""
+
+    def _write(self, measures):
+        self._f.write("".join(json.dumps(r) + "\n"
+                              for r in self._records(measures)))
+
+
+class CsvSink(RecordSink):
+    """Write a CSV record per measurement.
+
+    Arguments:
+        f {TextIO} -- the output file
+        batch_size {int} --
+            number of measurements written at a time
+            (default = BATCH_SIZE)
+        source {Optional[str]} --
+            the file of measurements which are not attributed to
+            one (default = None)
+        header {bool} --
+            write a header row first, i.e. unless appending to
+            earlier records (default = True)
+    """
+
+    def __init__(self, f, batch_size=BATCH_SIZE, source=None, header=True):
+        super().__init__(f, batch_size, source)
+        self._writer = csv.DictWriter(f, FIELDS, lineterminator="\n")
+        if header:
+            self._writer.writeheader()
+
+    def _write(self, measures):
+        self._writer.writerows(self._records(measures))
+
+
+class ParquetSink(RecordSink):
+    """Write the records to a Parquet file, one row group
+    per batch. Needs ``pyarrow``.
+
+    Raises:
+        ImportError -- when ``pyarrow`` is not installed
+
+    Arguments:
+        f {BinaryIO} -- the output file
+        batch_size {int} --
+            number of measurements in each row group
+            (default = BATCH_SIZE)
+        source {Optional[str]} --
+            the file of measurements which are not attributed to
+            one (default = None)
+    """
+
+    def __init__(self, f, batch_size=BATCH_SIZE, source=None):
+        super().__init__(f, batch_size, source)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Install pyarrow to write Parquet "
+                              "output!") from None
+
+        integer, string = pyarrow.int64(), pyarrow.string()
+        types = {"line": integer, "start": integer, "end": integer}
+        self._schema = pyarrow.schema(
+            [(name, types.get(name, string)) for name in FIELDS])
+        self._table = pyarrow.Table.from_pylist
+        self._writer = pyarrow.parquet.ParquetWriter(f, self._schema)
+
+    def _write(self, measures):
+        self._writer.write_table(self._table(self._records(measures),
+                                             schema=self._schema))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+
+# sinks keyed by output format
+SINKS = {"text": TextSink, "jsonl": JsonlSink, "csv": CsvSink,
+         "parquet": ParquetSink}
+
+
+def record(measure, source=None):
+    """Flatten a measurement and its provenance to a record. The
+    values and units of the parts of a tuple measurement, e.g. a
+    measurement in feet and inches which was not converted, are
+    space separated.
+
+    Arguments:
+        measure {Union[Measurement, Tuple[Measurement]]} -- a measurement
+        source {Optional[str]} --
+            the file of the measurement, if it is not attributed
+            to one (default = None)
+
+    Returns:
+        {Dict[str, Any]} -- the fields of ``FIELDS``
+    """
+
+    parts = measure if isinstance(measure, tuple) else (measure,)
+    first = parts[0]
+    raw = measure if first.raw is None else first.raw
+    raw_parts = raw if isinstance(raw, tuple) else (raw,)
+    starts = [p.start for p in parts if p.start is not None]
+    ends = [p.end for p in parts if p.end is not None]
+    return {"file": first.source or source, "line": first.line,
+            "start": min(starts, default=None),
+            "end": max(ends, default=None),
+            "measurement_type": first.measurement_type,
+            "raw_value": join(p.value for p in raw_parts),
+            "raw_unit": join(p.unit for p in raw_parts),
+            "value": join(p.value for p in parts),
+            "unit": join(p.unit for p in parts)}
@@ -0,0 +1,286 @@
+"""Extraction statistics"""
+
+import os
+import sys
+import time
+import signal
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+
+# stages of the pipeline, in order
+STAGES = ('read', 'format', 'prefilter', 'parse', 'tag', 'locate', 'convert')
+# seconds of CPU time between the samples of ``sampling``
+SAMPLE_INTERVAL = 0.005
+
+
+class Stats:
+    """Counters and timers of the stages of an extraction.
+
+    Events are counted in ``counts``: formatted lines which were not
+    parsed as they mention no unit (``filtered``), or as they were
+    tagged from their text (``fast_path``), documents parsed
+    (``docs``), token positions probed for units (``probes``),
+    measurements tagged (``matches``) and converted (``conversions``).
+    Measurements which could not be converted are counted by their
+    unit in ``failures``.
+
+    The seconds spent in each stage are summed in ``times``. Stages
+    are nested as the pipeline's generators pull from each other, i.e.
+    parsing pulls formatted lines, and the time of a nested stage is
+    only counted in the nested stage.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.failures = Counter()
+        self.times = Counter()
+        # the stages entered and not yet exited, and when the
+        # innermost was entered or last resumed
+        self._stack = []
+        self._mark = 0.0
+
+    def enter(self, stage):
+        """Start timing a stage, pausing the stage it is nested in.
+
+        Arguments:
+            stage {str} -- name of the stage
+        """
+
+        now = time.perf_counter()
+        if self._stack:
+            self.times[self._stack[-1]] += now - self._mark
+        self._stack.append(stage)
+        self._mark = now
+
+    def exit(self):
+        """Stop timing the innermost stage, resuming the
+        stage it is nested in"""
+        now = time.perf_counter()
+        self.times[self._stack.pop()] += now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def stage(self, stage):
+        """Time a block of code as a stage. The block must
+        not yield from a generator.
+
+        Arguments:
+            stage {str} -- name of the stage
+        """
+
+        self.enter(stage)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def timed(self, iterable, stage):
+        """Time pulling each item from an iterable as a stage.
+
+        Arguments:
+            iterable {Iterable[Any]} -- the items
+            stage {str} -- name of the stage
+
+        Yields:
+            {Any} -- an item
+        """
+
+        items = iter(iterable)
+        while True:
+            self.enter(stage)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+    def update(self, other):
+        """Add the counts and times of another extraction,
+        i.e. of a batch extracted by a worker process.
+
+        Arguments:
+            other {Stats} -- the statistics to add
+        """
+
+        self.counts.update(other.counts)
+        self.failures.update(other.failures)
+        self.times.update(other.times)
+
+    def summary(self, counts=None, elapsed=None):
+        """A summary of the extraction, to print.
+
+        Arguments:
+            counts {Optional[Counter]} --
+                the extractor's counts of the lines read and skipped
+                (default = None)
+            elapsed {Optional[float]} --
+                seconds the whole extraction took (default = None)
+
+        Returns:
+            {str} -- the summary, over several lines
+        """
+
+        c = self.counts
+        lines = []
+        if counts is not None:
+            rate = ""
+            if elapsed:
+                rate = " ({:.0f} lines/s)".format(counts['lines'] / elapsed)
+            lines.append("Lines: {} read{}, {} without a unit".format(
+                counts['lines'], rate, counts['skipped']))
+        lines.append("Formatted lines: {} filtered, {} tagged from text".format(
+            c['filtered'], c['fast_path']))
+        lines.append("Parsing: {} docs, {} probes, {} matches".format(
+            c['docs'], c['probes'], c['matches']))
+        failed = sum(self.failures.values())
+        lines.append("Conversions: {} converted, {} failed{}".format(
+            c['conversions'], failed, "".join(
+                "\n    {}: {}".format(unit, n)
+                for unit, n in self.failures.most_common())))
+
+        total = sum(self.times.values())
+        if total:
+            stages = [s for s in STAGES if s in self.times] + sorted(
+                set(self.times) - set(STAGES))
+            lines.append("Seconds by stage:" + "".join(
+                "\n    {:<10}{:>9.3f} {:>5.1f}%".format(
+                    s, self.times[s], 100 * self.times[s] / total)
+                for s in stages))
+        if elapsed is not None:
+            lines.append("Elapsed: {:.3f}s".format(elapsed))
+        return "\n".join(lines)
+
+    def __getstate__(self):
+        return self.counts, self.failures, self.times
+
+    def __setstate__(self, state):
+        self.counts, self.failures, self.times = state
+        self._stack = []
+        self._mark = 0.0
+
+
+class Progress:
+    """Report the progress of an extraction to stderr every
+    ``interval`` seconds, from a background thread, so that a report
+    is made even while a slow batch is extracted.
+
+    The lines of a parallel extraction are only counted once their
+    batch completes, so its progress is reported in batches, without
+    a line rate which would jump from batch to batch.
+
+    Arguments:
+        counts {Counter} -- the extractor's counts of the lines read
+        interval {float} -- seconds between reports
+        file {TextIO} -- the output of the reports (default = stderr)
+        batches {bool} --
+            report the batches completed, counted in ``counts``,
+            rather than a line rate (default = False)
+    """
+
+    def __init__(self, counts, interval, file=None, batches=False):
+        self._counts = counts
+        self._interval = interval
+        self._file = file
+        self._batches = batches
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = None
+        self.measurements = 0
+
+    def update(self, n=1):
+        """Count measurements returned by the extraction.
+
+        Arguments:
+            n {int} -- the number of measurements (default = 1)
+        """
+
+        self.measurements += n
+
+    def report(self):
+        """Report the lines read and measurements returned so far"""
+        elapsed = time.perf_counter() - self._start
+        lines = self._counts['lines']
+        if self._batches:
+            report = "{:.0f}s: {} batches ({} lines), {} measurements".format(
+                elapsed, self._counts['batches'], lines, self.measurements)
+        else:
+            report = "{:.0f}s: {} lines, {} measurements, {:.0f} lines/s".format(
+                elapsed, lines, self.measurements,
+                lines / elapsed if elapsed else 0)
+        print(report, file=self._file or sys.stderr, flush=True)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.report()
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+@contextmanager
+def profiling(path):
+    """Profile a run with ``cProfile``, writing the profile
+    to a file which can be read with ``pstats``.
+
+    Arguments:
+        path {str} -- path to the profile file
+    """
+
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+
+
+@contextmanager
+def sampling(path, interval=SAMPLE_INTERVAL):
+    """Sample the call stack of the main thread every ``interval``
+    seconds of CPU time while running, writing the stacks to a file
+    in the collapsed format of flame graph tools, one
+    ``file:function;...`` stack per line with its number of samples.
+    Sampling has little overhead, unlike ``profiling``, but only
+    samples the current process, and needs ``SIGPROF``.
+
+    Arguments:
+        path {str} -- path to the stacks file
+        interval {float} --
+            seconds of CPU time between samples (default = SAMPLE_INTERVAL)
+    """
+
+    stacks = Counter()
+
+    def sample(signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append("{}:{}".format(os.path.basename(code.co_filename),
+                                        code.co_name))
+            frame = frame.f_back
+        stacks[";".join(reversed(names))] += 1
+
+    previous = signal.signal(signal.SIGPROF, sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        yield stacks
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+        with open(path, "w") as f:
+            for stack, n in stacks.most_common():
+                f.write("{} {}\n".format(stack, n))
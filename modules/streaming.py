@@ -0,0 +1,194 @@
+"""Asynchronous extraction"""
+
+import asyncio
+from collections import deque
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+
+from .stats import Stats
+from .pipeline import NLP
+from .extractor import extract_lines
+from .loader import check_max_chars
+from .parallel import _init_worker
+from .parallel import _extract_batch
+
+
+# number of lines in each job
+BATCH_SIZE = 256
+
+
+class AsyncExtractor:
+    """Measurement tagging pipeline for asyncio applications. Lines
+    are read from async streams, and extracted in batches in a worker
+    thread or a pool of worker processes, so that the event loop is not
+    blocked while they are parsed, and reading overlaps extracting.
+    Several streams can be extracted at once, sharing the workers.
+
+    The Spacy model is loaded by each worker before it extracts a
+    batch. As a Spacy pipeline is not thread-safe, batches are only
+    extracted by several workers in worker processes.
+
+    Raises:
+        ValueError --
+            when several workers are not processes, when max_chars
+            is set without a parsing profile, or when extracting
+            from a closed extractor
+
+    Arguments:
+        pipelines {Dict[str, Tuple[Tagger, Formatter, Converter]]} --
+            tagging, formatting and conversion classes keyed by
+            measurement type
+        n_jobs {int} --
+            number of worker processes, or 1 for a worker thread
+            (default = 1)
+        processes {bool} --
+            extract in worker processes, which each load the Spacy model,
+            rather than a thread (default = False)
+        concurrency {Optional[int]} --
+            maximum number of batches in flight across all streams
+            (default = 2 * n_jobs)
+        batch_size {int} -- number of lines in each job (default = BATCH_SIZE)
+        fast_path {bool} --
+            tag measurements from the text where possible (default = False)
+        prefilter {bool} --
+            skip parsing lines which do not mention a unit (default = True)
+        max_chars {Optional[int]} --
+            maximum characters in each parsed document (default = None)
+        stats {Optional[Stats]} --
+            updated with the counts and times of the stages of the
+            extraction (default = None)
+    """
+
+    def __init__(self, pipelines, n_jobs=1, processes=False, concurrency=None,
+                 batch_size=BATCH_SIZE, fast_path=False, prefilter=True,
+                 max_chars=None, stats=None):
+        self._pipelines = {key: (tagger, converter)
+                           for key, (tagger, _, converter) in pipelines.items()}
+        self._formatters = {key: formatter
+                            for key, (_, formatter, _) in pipelines.items()}
+        self._fast_path = fast_path
+        self._prefilter = prefilter
+        self._max_chars = max_chars
+        self._batch_size = batch_size
+        self._concurrency = concurrency or 2 * n_jobs
+        self._stats = stats
+        self._counts = Counter()
+        self._slots = None
+
+        if n_jobs > 1 and not processes:
+            raise ValueError("Several workers need processes=True!")
+        check_max_chars(max_chars)
+        if processes:
+            self._executor = ProcessPoolExecutor(
+                n_jobs, initializer=_init_worker,
+                initargs=(self._formatters, self._pipelines, fast_path,
+                          prefilter, max_chars, NLP.config,
+                          stats is not None))
+            self._job = _extract_batch
+        else:
+            self._executor = ThreadPoolExecutor(1, initializer=NLP.load)
+            self._job = self._extract_batch
+
+    async def extract(self, stream):
+        """Extract measurements from the lines of an async stream.
+
+        Arguments:
+            stream {AsyncIterable[Union[str, bytes]]} --
+                lines of text, i.e. an ``asyncio.StreamReader``
+
+        Yields:
+            {Union[Measurement, Tuple[Measurement]]} --
+                a labelled measurement, with its provenance, in
+                the order of the stream
+        """
+
+        if self._executor is None:
+            raise ValueError("Extractor is closed!")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._concurrency)
+
+        # batches of this stream in flight, or not yet returned
+        pending = deque()
+        batch, number = [], 0
+        try:
+            async for line in stream:
+                batch.append(line.decode("utf-8")
+                             if isinstance(line, bytes) else line)
+                if len(batch) < self._batch_size:
+                    continue
+                pending.append(await self._submit(batch, number))
+                number += len(batch)
+                batch = []
+                while pending and (len(pending) >= self._concurrency or
+                                   pending[0].done()):
+                    for measure in await self._result(pending.popleft()):
+                        yield measure
+            if batch:
+                pending.append(await self._submit(batch, number))
+            while pending:
+                for measure in await self._result(pending.popleft()):
+                    yield measure
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def close(self):
+        """Shut down the worker thread or processes, once the
+        batches in flight are extracted"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(
+                None, executor.shutdown)
+
+    @property
+    def counts(self):
+        """Counts of the lines read (``lines``) and the lines
+        skipped as they mention no unit (``skipped``)"""
+        return self._counts
+
+    @property
+    def stats(self):
+        """Counts and times of the stages of the extraction,
+        or None if they are not instrumented"""
+        return self._stats
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _submit(self, batch, first_line):
+        """Wait for a free slot, and extract a batch of lines in the
+        pool. The slot is freed once the batch is extracted
+
+        Returns:
+            {asyncio.Future} -- the future of the batch
+        """
+
+        await self._slots.acquire()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._job, tuple(batch), first_line)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def _result(self, future):
+        """The measurements of a batch, adding its counts"""
+        measures, counts, stats = await future
+        self._counts.update(counts)
+        if stats is not None:
+            self._stats.update(stats)
+        return measures
+
+    def _extract_batch(self, lines, first_line=0):
+        """Extract measurements from a batch of lines in the worker
+        thread, counting into the batch's own counters, as the
+        counters of the extractor are updated by the event loop"""
+        counts = Counter()
+        stats = Stats() if self._stats is not None else None
+        measures = list(extract_lines(self._formatters, self._pipelines,
+                                      lines, self._fast_path, self._prefilter,
+                                      self._max_chars, counts,
+                                      first_line=first_line, stats=stats))
+        return measures, counts, stats
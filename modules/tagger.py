@@ -1,11 +1,19 @@
 """Tagging class"""
 
-from .utils import ints
-from .utils import join
-from .utils import overlapping
+import re
+
+from .index import UnitIndex
+from .sentence import Sentence
+from .numerals import ARTICLES
+from .numerals import parse_number
 from .utils import Measurement
 
 
+TOKEN_REGEX = re.compile(r'\S+')
+NUMBER_REGEX = re.compile(r'\(?[0-9]+(\.[0-9]+)?$')
+TRAILING_PUNCT = '.,;:!?)"\''
+
+
 class Tagger:
     """Use the WordNet graph to extract measurements.
 
@@ -14,94 +22,218 @@ class Tagger:
         max_gram: {int} -- maximum n-gram unit to match
         right_mod_tokens: {Dict[str, str]} --
             tokens mapped to their corresponding right modifier
+        ambiguous_tags: {Iterable[str]} --
+            tags which are only tagged with the dependency parse
+            (default = ())
+        index: {Optional[UnitIndex]} --
+            precompiled index of the tags, i.e. from a ``TagCache``.
+            If None, the index is compiled (default = None)
     """
 
-    def __init__(self, tags, max_gram, right_mod_tokens):
+    def __init__(self, tags, max_gram, right_mod_tokens, ambiguous_tags=(),
+                 index=None):
         self._tags = tags
         self._max_gram = max_gram
+        self._index = index or UnitIndex(tags, max_gram)
         self._right_mod_tokens = right_mod_tokens
+        self._ambiguous_tags = frozenset(ambiguous_tags)
         self._dep_modifiers = frozenset(['nummod', 'quantmod'])
 
     def tag(self, sentence):
-        """Extract measurements from Spacy tokenised sentence.
+        """Extract measurements from a parsed sentence. A sentence
+        without a dependency parse, i.e. of the ``lemmas`` pipeline
+        profile, is tagged with the numbers next to its units.
 
         Arguments:
-            sentence {List[spacy.tokens.Span]} -- a tokenised sentence
+            sentence {Union[Sentence, spacy.tokens.Span,
+                            List[spacy.tokens.Token]]} --
+                a parsed sentence, converted to a ``Sentence``
+                if it is Spacy tokens
 
         Returns:
             {List[Union[Measurement, Tuple[Measurement]]]} --
                 a list of measurements
         """
 
+        if not isinstance(sentence, Sentence):
+            sentence = Sentence.from_span(sentence)
+        lemmas = sentence.lemmas
+        measurements = []
+        idx = 0
+        # single left-to-right pass, preferring the longest unit
+        # at each position which has a numerical modifier
+        while idx < len(lemmas):
+            step = 1
+            for n, unit in self._index.candidates(lemmas, idx):
+                # find numerical modifier on last token in unit
+                measure = self._measurements(sentence, idx + n - 1, unit,
+                                             idx)
+                if measure:
+                    measurements.append(measure)
+                    # skip the unit so its tokens are not tagged again
+                    step = n
+                    break
+            idx += step
+        return measurements
+
+    def tag_text(self, line):
+        """Extract "<number> <unit>" measurements directly from a
+        formatted line, without a dependency parse. A line is left to
+        the dependency parse if any unit in it is ambiguous, takes a
+        right modifier, or is not immediately preceded by a number.
+
+        Arguments:
+            line {str} -- a formatted line
+
+        Returns:
+            {Optional[List[Measurement]]} --
+                a list of measurements, or None if the line
+                must be tagged from its dependency parse
+        """
+
+        mentions = self._index.mentions(line)
+        if not mentions:
+            return []
+
+        tokens = [(m.start(), m.group()) for m in TOKEN_REGEX.finditer(line)]
+        words = [tok.rstrip(TRAILING_PUNCT) for _, tok in tokens]
         measurements = []
-        # iterate over sentence in decreasing n-grams
-        for n in reversed(ints(1, self._max_gram)):
-            for idx, n_gram in enumerate(overlapping(sentence, n)):
-                # check if subset is a valid measurement
-                subset = join([tok.lemma_ for tok in n_gram])
-                if subset in self._tags:
-                    # find numerical modifier on last token in subset
-                    measure = self._measurements(n_gram[-1], subset)
-                    if measure:
-                        measurements.append(measure)
-                        # delete subset so it is ignored by
-                        # subsequent n-gram iterations
-                        del sentence[idx: min(idx + n, len(sentence) - 1)]
+        spans = []
+        idx = 0
+        while idx < len(words):
+            match = next(self._index.surface_candidates(words, idx), None)
+            if not match:
+                idx += 1
+                continue
+            n, unit = match
+            end = idx + n - 1
+            number = tokens[idx - 1][1] if idx else ''
+            # punctuation may only trail the last word of the unit
+            split = any(words[i] != tokens[i][1] for i in range(idx, end))
+            if (unit in self._ambiguous_tags or
+                    unit in self._right_mod_tokens or
+                    not NUMBER_REGEX.match(number) or split):
+                return None
+            spans.append((tokens[idx][0], tokens[end][0] + len(words[end])))
+            value = number.lstrip('(')
+            start = tokens[idx - 1][0] + len(number) - len(value)
+            measurements.append(Measurement(value, unit, start=start,
+                                            end=spans[-1][1]))
+            idx += n
+
+        # every unit in the line must be part of a match
+        for m_start, m_end in mentions:
+            if not any(start <= m_start and m_end <= stop
+                       for start, stop in spans):
+                return None
         return measurements
 
-    def _measurements(self, token, unit):
+    def _measurements(self, sentence, idx, unit, first=None):
         """Given a token, get its left and right modifiers and
         construct a ``Measurement`` class. Tokens with left and right
-        modifiers are returned as a tuple of ``Measurement``.
+        modifiers are returned as a tuple of ``Measurement``. Each
+        measurement records the character offsets of its span in the
+        sentence's line.
 
         Right modifiers are only supported for uni-gram units of
-        measurement.
+        measurement. Without a dependency parse, the modifiers are
+        the numbers either side of the unit.
 
         Arguments:
-            token {spacy.tokens.Token} -- a measurement Token
+            sentence {Sentence} -- a sentence
+            idx {int} -- index of the measurement token
             unit {str} -- string representation of the measurement
+            first {Optional[int]} --
+                index of the first token of the measurement, if
+                it is an n-gram (default = idx)
 
         Returns:
             {Optional[Union[Measurement, Tuple[Measurement]]]} --
                 measurement or None
         """
 
-        left_mod = self._find_mod('l', token)
-        if left_mod:
-            l_measure = Measurement(left_mod, unit)
+        first = idx if first is None else first
+        parsed = sentence.parsed
+        if parsed:
+            left_mod = self._find_mod('l', sentence, idx)
+        else:
+            left_mod = self._adjacent_mod(sentence, first - 1)
+        if left_mod is not None:
+            start, end = sentence.offsets([left_mod, first, idx])
+            l_measure = Measurement(sentence.lemmas[left_mod], unit,
+                                    start=start, end=end)
             # check if token could have numerical modifier to its right
-            if token.lemma_ in self._right_mod_tokens.keys():
-                right_mod = self._find_mod('r', token)
-                if right_mod:
-                    r_unit = self._right_mod_tokens[token.lemma_]
-                    r_measure = Measurement(right_mod, r_unit)
+            lemma = sentence.lemmas[idx]
+            if lemma in self._right_mod_tokens.keys():
+                if parsed:
+                    right_mod = self._find_mod('r', sentence, idx)
+                else:
+                    right_mod = self._adjacent_mod(sentence, idx + 1)
+                if right_mod is not None:
+                    r_unit = self._right_mod_tokens[lemma]
+                    start, end = sentence.offsets([right_mod])
+                    r_measure = Measurement(sentence.lemmas[right_mod],
+                                            r_unit, start=start, end=end)
                     return (l_measure, r_measure)
             return l_measure
         return None
 
-    def _find_mod(self, direction, token):
+    def _find_mod(self, direction, sentence, idx):
         """Given a token, search the dependency tree towards 'direction'
         for its numerical modifier.
 
         Arguments:
-            token {spacy.tokens.Token} -- a measurement Token
             direction {Union['l', 'r']} --
                 the direction to search the tree (left, right)
+            sentence {Sentence} -- a parsed sentence
+            idx {int} -- index of the measurement token
 
         Returns:
-            {Optional[str]} -- the modifier's lemma or None
+            {Optional[int]} -- the modifier's index or None
         """
 
-        children = token.lefts if direction == 'l' else token.rights
-        for adj_tok in children:
-            if adj_tok.dep_ in self._dep_modifiers:
-                return adj_tok.lemma_
+        children = sentence.lefts(idx) if direction == 'l' else \
+            sentence.rights(idx)
+        for child in children:
+            if sentence.dep(child) in self._dep_modifiers:
+                return child
         return None
 
+    def _adjacent_mod(self, sentence, i):
+        """Check that the token next to a unit in a sentence without
+        a dependency parse is a number.
+
+        Arguments:
+            sentence {Sentence} -- an unparsed sentence
+            i {int} -- index of the token before or after the unit
+
+        Returns:
+            {Optional[int]} -- the modifier's index or None
+        """
+
+        if not 0 <= i < len(sentence):
+            return None
+        lemma = sentence.lemmas[i]
+        if lemma.lower() in ARTICLES:
+            return None
+        try:
+            parse_number(lemma)
+        except ValueError:
+            return None
+        return i
+
     @property
     def tags(self):
         return self._tags
 
+    @property
+    def ambiguous_tags(self):
+        return self._ambiguous_tags
+
+    @property
+    def index(self):
+        return self._index
+
     @property
     def dependency_modifiers(self):
         return self._dep_modifiers
@@ -2,19 +2,33 @@
 
 from functools import reduce
 from itertools import chain
+from itertools import islice
 from importlib import import_module
 from collections.abc import Sequence
 
+from dataclasses import field
 from dataclasses import dataclass
 
-from typing import List, Any, Callable, Iterable, Iterator
+from typing import List, Any, Callable, Iterable, Iterator, Optional
 
 
 @dataclass(frozen=True)
 class Measurement:
-    """Dataclass containing measurement value and unit"""
+    """Dataclass containing measurement value and unit,
+    optionally labelled with its measurement type and
+    the text it was extracted from.
+
+    The provenance of a measurement is not compared: the number of
+    its line, the character offsets of its span in the line and the
+    measurement tagged from the text, before it was converted."""
     value: str
     unit: str
+    measurement_type: Optional[str] = None
+    source: Optional[str] = None
+    line: Optional[int] = field(default=None, compare=False)
+    start: Optional[int] = field(default=None, compare=False)
+    end: Optional[int] = field(default=None, compare=False)
+    raw: Any = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return f"{self.value} {self.unit}"
@@ -51,6 +65,12 @@ def overlapping(iterable: Iterable, n: int) -> Iterator:
     yield from (iterable[i: i + n] for i in range(len(iterable) + 1 - n))
 
 
+def partition(iterable: Iterable, n: int) -> Iterator:
+    """Split iterable into tuples of length n, the last may be shorter"""
+    it = iter(iterable)
+    return iter(lambda: tuple(islice(it, n)), ())
+
+
 def strip_list(lst: List[str]) -> List[str]:
     """Strip whitespace from list of strings"""
     return [l.strip() for l in lst if l is not None]
@@ -0,0 +1,93 @@
+"""Extraction server"""
+
+import os
+import asyncio
+import argparse
+
+from modules.pipeline import NLP
+from modules.pipeline import MODEL
+from modules.pipeline import PROFILES
+from modules.pipeline import DEFAULT_PROFILE
+
+from modules.cache import TagCache
+from modules.cache import default_cache_dir
+from modules.params import load_params
+from modules.params import build_pipelines
+from modules.server import Server
+from modules.server import BATCH_SIZE
+from modules.server import MAX_LATENCY
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--measurement_type", default="all",
+                        help="Types of measurement to serve: a comma separated list "
+                        "of d, t, m, e, v or all (default = all)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Host to listen on (default = 127.0.0.1)")
+    parser.add_argument("--port", default=8000, type=int,
+                        help="Port to listen on (default = 8000)")
+    parser.add_argument("--socket", default=None,
+                        help="Unix socket to listen on instead of a port")
+    parser.add_argument("--batch_size", default=BATCH_SIZE, type=int,
+                        help="The maximum number of texts extracted together "
+                        "(default = {})".format(BATCH_SIZE))
+    parser.add_argument("--max_latency", default=MAX_LATENCY, type=float,
+                        help="Seconds a request waits for other requests to be "
+                        "extracted with (default = {})".format(MAX_LATENCY))
+    parser.add_argument("--max_gram", type=int, default=2,
+                        help="The maximum n-gram measurement unit to tag (default = 2)")
+    parser.add_argument("--cache_dir", default=default_cache_dir(),
+                        help="Directory to cache unit tags built from WordNet "
+                        "(default = $MEASUREMENT_TAGGER_CACHE or ~/.cache/measurement_tagger)")
+    parser.add_argument("--model", default=MODEL,
+                        help="Name or path of the Spacy model (default = {})".format(MODEL))
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="Spacy pipeline profile (default = {})".format(DEFAULT_PROFILE))
+    parser.add_argument("--return_unconverted", action="store_true",
+                        help="Return measurements that have not been normalised")
+    parser.add_argument("--fast_path", action="store_true",
+                        help="Tag unambiguous '<number> <unit>' measurements without a dependency parse")
+    parser.add_argument("--no_prefilter", action="store_true",
+                        help="Parse every line, including lines which do not mention a unit")
+    parser.add_argument("--max_chars", type=int, default=None,
+                        help="Parse consecutive lines together in documents of up to max_chars "
+                        "characters (default = parse each line on its own)")
+
+    args = parser.parse_args()
+    NLP.configure(args.model, args.profile)
+    params = load_params(os.path.join(os.getcwd(), "modules/params.json"))
+    if args.measurement_type == "all":
+        measurement_types = list(params)
+    else:
+        measurement_types = args.measurement_type.split(",")
+    try:
+        pipelines = build_pipelines(params, measurement_types, args.max_gram,
+                                    TagCache(args.cache_dir),
+                                    args.return_unconverted)
+    except KeyError:
+        print("Invalid measurement type!")
+        return
+
+    server = Server(pipelines, args.fast_path, not args.no_prefilter,
+                    args.max_chars, args.batch_size, args.max_latency)
+    asyncio.run(serve(server, args.host, args.port, args.socket))
+
+
+async def serve(server, host, port, path=None):
+    """Serve until interrupted"""
+    listening = await server.start(host, port, path)
+    print("Serving on {}".format(path or "http://{}:{}".format(host, port)),
+          flush=True)
+    try:
+        async with listening:
+            await listening.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
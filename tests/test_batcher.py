@@ -0,0 +1,99 @@
+import queue
+import threading
+
+import pytest
+from measurement.measures import Time
+from measurement.measures import Distance
+
+from ..modules import tagger
+from ..modules import formatter
+from ..modules import converter
+from ..modules.batcher import Batcher
+from ..modules.params import load_params
+from ..modules.pipeline import NLP
+
+
+pipelines = {"d": (tagger.Tagger(["mile", "inch", "foot", "fathom"], 2,
+                                 {"foot": "inch"}),
+                   formatter.DistanceFormatter(),
+                   converter.Converter(Distance()))}
+
+
+def test_submit():
+    with Batcher(pipelines) as batcher:
+        future = batcher.submit("The office is 5 miles away\nI was 3 inches away")
+        empty = batcher.submit("")
+        measures = future.result(timeout=10)
+    assert [str(m) for m in measures] == ["8046.72 m", "0.08 m"]
+    assert [(m.line, m.start, m.end) for m in measures] == [(1, 14, 21),
+                                                            (2, 6, 14)]
+    assert measures[0].measurement_type == "d"
+    assert empty.result(timeout=10) == []
+
+
+def test_type_order():
+    time_params = load_params()["t"]
+    both = dict(pipelines, t=(tagger.Tagger(time_params["tags"], 2,
+                                            time_params["right_mods"],
+                                            time_params["ambiguous"]),
+                              formatter.TimeFormatter(),
+                              converter.Converter(Time())))
+    with Batcher(both) as batcher:
+        for types in (["t", "d"], ["d", "t"]):
+            measures = batcher.submit("a walk of 5 miles, or 2 hours",
+                                      types).result(timeout=10)
+            assert [(m.measurement_type, str(m)) for m in measures] == \
+                [("d", "8046.72 m"), ("t", "7200.0 s")]
+
+
+def test_max_chars_needs_parser(monkeypatch):
+    monkeypatch.setattr(NLP, "_profile", "lemmas")
+    with pytest.raises(ValueError):
+        Batcher(pipelines, max_chars=100)
+
+
+def test_micro_batching():
+    with Batcher(pipelines, batch_size=8, max_latency=0.5) as batcher:
+        futures = [batcher.submit("It is {} miles away".format(n))
+                   for n in range(1, 17)]
+        results = [future.result(timeout=10) for future in futures]
+    assert [measures[0].raw.value for measures in results] == \
+        [str(n) for n in range(1, 17)]
+    assert batcher.counts["texts"] == 16
+    assert batcher.counts["batches"] == 2
+
+
+def test_map():
+    texts = ["{} miles".format(n) if n % 3 else "no units" for n in range(20)]
+    with Batcher(pipelines, batch_size=4) as batcher:
+        results = list(batcher.map(texts, window=6))
+    assert [[m.raw.value for m in measures] for measures in results] == \
+        [[str(n)] if n % 3 else [] for n in range(20)]
+
+
+def test_map_queue():
+    documents = queue.Queue()
+
+    def ingest():
+        for n in range(1, 6):
+            documents.put("{} fathoms".format(n))
+        documents.put(None)
+
+    threading.Thread(target=ingest).start()
+    with Batcher(pipelines) as batcher:
+        results = list(batcher.map(iter(documents.get, None)))
+    assert [measures[0].raw.value for measures in results] == \
+        ["1", "2", "3", "4", "5"]
+
+
+def test_errors():
+    batcher = Batcher(pipelines)
+    with pytest.raises(KeyError):
+        batcher.submit("5 miles", ["t"])
+    # a failed batch fails the futures of its texts
+    with pytest.raises(AttributeError):
+        batcher.submit(None).result(timeout=10)
+    assert batcher.submit("5 miles", ["d"]).result(timeout=10)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit("5 miles")
@@ -0,0 +1,114 @@
+import os
+import pickle
+import zipfile
+import pytest
+
+from ..modules import cache as cache_module
+from ..modules.cache import TagCache
+from ..modules.cache import TAG_CACHE_FORMAT
+from ..modules.cache import wordnet_version
+from ..modules.cache import nltk_data_dirs
+
+
+tags = ["mile", "nautical mile", "inch"]
+
+
+def test_tag_cache(tmp_path):
+    cache = TagCache(str(tmp_path))
+    assert cache.load("linear_unit.n.01", "3.0", 2) is None
+
+    cache.put("linear_unit.n.01", "3.0", 2, tags)
+    cached_tags, index = cache.load("linear_unit.n.01", "3.0", 2)
+    assert cached_tags == set(tags)
+    assert "nautical mile" in index
+    assert cache.load("linear_unit.n.01", "3.0", 1) is None
+    assert cache.load("time_unit.n.01", "3.0", 2) is None
+    # only the exact WordNet version is loaded
+    assert cache.load("linear_unit.n.01", "3.1", 2) is None
+    # cached without leaving temporary files behind
+    assert os.listdir(str(tmp_path)) == [
+        "linear_unit.n.01.wn3.0.2gram.v{}.pickle".format(TAG_CACHE_FORMAT)]
+
+
+def test_tag_cache_format(tmp_path):
+    cache = TagCache(str(tmp_path))
+    cache.put("linear_unit.n.01", "3.0", 2, tags)
+    path, = tmp_path.iterdir()
+    with open(str(path), "rb") as f:
+        entry = pickle.load(f)
+    entry["format"] = TAG_CACHE_FORMAT - 1
+    with open(str(path), "wb") as f:
+        pickle.dump(entry, f)
+    assert cache.load("linear_unit.n.01", "3.0", 2) is None
+
+
+def test_tag_cache_get(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "wordnet_version", lambda: "3.0")
+    cache = TagCache(str(tmp_path))
+    cache.put("linear_unit.n.01", "3.0", 1, tags)
+    cached_tags, index = cache.get("linear_unit.n.01", 1)
+    assert cached_tags == set(tags)
+    assert "nautical mile" not in index
+
+
+header = (b"  1 This software and database is being provided to you\n"
+          b"  29 WordNet 3.0 Copyright 2006 by Princeton University.\n"
+          b"00001740 00 a 01 able 0 005 = 05207437 n 0000\n")
+
+
+def test_wordnet_version(tmp_path, monkeypatch):
+    wordnet = tmp_path / "data" / "corpora" / "wordnet"
+    wordnet.mkdir(parents=True)
+    (wordnet / "data.adj").write_bytes(header)
+    assert wordnet_version([str(tmp_path / "missing"),
+                            str(tmp_path / "data")]) == "3.0"
+    assert wordnet_version([str(tmp_path / "missing")]) is None
+
+    zipped = tmp_path / "zipped" / "corpora"
+    zipped.mkdir(parents=True)
+    with zipfile.ZipFile(str(zipped / "wordnet.zip"), "w") as archive:
+        archive.writestr("wordnet/data.adj", header.replace(b"3.0", b"3.1"))
+    assert wordnet_version([str(tmp_path / "zipped")]) == "3.1"
+
+    monkeypatch.setenv("NLTK_DATA", str(tmp_path / "data"))
+    assert nltk_data_dirs()[0] == str(tmp_path / "data")
+    assert wordnet_version() == "3.0"
+
+
+def test_parse_cache(tmp_path):
+    spacy = pytest.importorskip("spacy")
+    from ..modules.cache import ParseCache
+    from ..modules.sentence import Sentence
+    from ..modules.formatter import DistanceFormatter
+    from ..modules.formatter import TimeFormatter
+
+    text = tmp_path / "text.txt"
+    text.write_text("5 miles\n3 feet\n")
+    cache = ParseCache(str(tmp_path / "parses"))
+    formatters = {"d": DistanceFormatter()}
+    key = cache.key(str(text), formatters, ("en", "parse", ()))
+    assert key not in cache
+    assert key != cache.key(str(text), {"d": TimeFormatter()},
+                            ("en", "parse", ()))
+    assert key != cache.key(str(text), formatters, ("en", "full", ()))
+
+    vocab = spacy.blank("en").vocab
+    docs = [spacy.tokens.Doc(vocab, words=["5", "miles"], lemmas=["5", "mile"]),
+            spacy.tokens.Doc(vocab, words=["3", "feet"], lemmas=["3", "foot"])]
+    parses = [{"d": [Sentence.from_span(doc)]} for doc in docs * 1500]
+    # partially written entries are not cached
+    written = cache.write(key, iter(parses))
+    next(written)
+    written.close()
+    assert key not in cache
+    assert os.listdir(cache.cache_dir) == []
+
+    assert len(list(cache.write(key, iter(parses)))) == len(parses)
+    assert key in cache
+    cached = list(cache.read(key))
+    assert [len(p["d"][0]) for p in cached] == [2] * len(parses)
+    assert [p["d"][0].lemmas for p in cached[:2]] == [["5", "mile"],
+                                                      ["3", "foot"]]
+
+    text.write_text("5 miles\n3 inches\n")
+    assert cache.key(str(text), formatters, ("en", "parse", ())) != key
@@ -0,0 +1,44 @@
+import os
+import json
+import pytest
+
+from ..modules.checkpoint import Checkpoint
+
+
+def test_checkpoint(tmp_path):
+    text = tmp_path / "text.txt"
+    text.write_bytes(b"5 miles\n3 feet\n")
+    path = str(tmp_path / "checkpoint.json")
+
+    checkpoint = Checkpoint(path, str(text), every=2)
+    assert not checkpoint.load()
+    checkpoint.update(8, 1, 1)
+    assert not os.path.exists(path)
+    checkpoint.update(15, 1, 2)
+    with open(path) as f:
+        assert json.load(f)["offset"] == 15
+
+    resumed = Checkpoint(path, str(text))
+    assert resumed.load()
+    assert (resumed.offset, resumed.lines, resumed.measurements) == (15, 2, 3)
+
+
+def test_checkpoint_changed_text(tmp_path):
+    text = tmp_path / "text.txt"
+    text.write_bytes(b"5 miles\n3 feet\n")
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = Checkpoint(path, str(text))
+    checkpoint.update(8, 1, 1)
+    checkpoint.save()
+
+    # appending to the text is fine
+    text.write_bytes(b"5 miles\n3 feet\n2 inches\n")
+    assert Checkpoint(path, str(text)).load()
+
+    text.write_bytes(b"6 miles\n3 feet\n")
+    with pytest.raises(ValueError):
+        Checkpoint(path, str(text)).load()
+    other = tmp_path / "other.txt"
+    other.write_bytes(b"5 miles\n3 feet\n")
+    with pytest.raises(ValueError):
+        Checkpoint(path, str(other)).load()
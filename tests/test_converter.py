@@ -4,6 +4,7 @@ from measurement.measures import Distance
 from measurement.measures import Mass
 
 from ..modules.converter import Converter
+from ..modules.utils import two_round
 from ..modules.utils import Measurement
 
 dist_convert = Converter(Distance(), return_unconverted=True)
@@ -19,7 +20,9 @@ def test_convert_distance():
     conversion_compound = list(dist_convert.convert(
         [Measurement('two', 'foot'), Measurement('five', 'inch')]))
     assert conversion_compound == [Measurement(
-        'two', 'foot'), Measurement('five', 'inch')]
+        '0.61', 'm'), Measurement('0.13', 'm')]
+    no_number = list(dist_convert.convert([Measurement('some', 'foot')]))
+    assert no_number == [Measurement('some', 'foot')]
 
 
 mass_convert = Converter(Mass())
@@ -28,3 +31,24 @@ mass_convert = Converter(Mass())
 def test_convert_mass():
     conversion_kg = next(mass_convert.convert([Measurement('5', 'kg')]))
     assert conversion_kg == Measurement('5000.0', 'g')
+
+
+def test_convert_batch():
+    batch = [Measurement('1', 'mile'), Measurement('many', 'foot'),
+             (Measurement('6', 'foot'), Measurement('7', 'inch')),
+             Measurement('1', 'furlong'), Measurement('2', 'Yard')]
+    assert dist_convert.convert_batch(batch) == [
+        Measurement('1609.34', 'm'), Measurement('many', 'foot'),
+        Measurement('2.01', 'm'), Measurement('1', 'furlong'),
+        Measurement('1.83', 'm')]
+    assert mass_convert.convert_batch(
+        [Measurement('5', 'kg'), Measurement('5', 'blorp')]) == [
+            Measurement('5000.0', 'g'), None]
+    assert mass_convert.convert_batch([]) == []
+
+
+def test_factor_tables():
+    for unit in ['mile', 'Mile', 'km', 'kilometer', 'ft', 'yd', 'nm_uk']:
+        measure = Measurement('3.5', unit)
+        assert next(dist_convert.convert([measure])) == \
+            Measurement(two_round(dist_convert._std(measure)), 'm')
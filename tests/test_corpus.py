@@ -0,0 +1,82 @@
+import io
+import gzip
+import pytest
+
+from measurement.measures import Distance
+
+from ..modules import extractor
+from ..modules import tagger
+from ..modules import formatter
+from ..modules import converter
+from ..modules.corpus import Shard
+from ..modules.corpus import schedule
+from ..modules.corpus import expand_inputs
+from ..modules.corpus import CorpusExtractor
+
+
+path = "tests/test.txt"
+tagger = tagger.Tagger(["mile", "inch", "foot", "fathom"], 2, {"foot": "inch"})
+formatter = formatter.DistanceFormatter()
+converter = converter.Converter(Distance())
+
+
+def corpus(tmp_path):
+    """Write a small corpus of texts"""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "b").mkdir()
+    (tmp_path / "a" / "one.txt").write_text("5 miles\n" * 4)
+    (tmp_path / "a" / "b" / "two.txt").write_text("3 feet\n")
+    (tmp_path / "a" / ".hidden").write_text("")
+    (tmp_path / "three.md").write_text("2 inches\n")
+    return tmp_path
+
+
+def test_expand_inputs(tmp_path):
+    root = str(corpus(tmp_path))
+    one, two = root + "/a/one.txt", root + "/a/b/two.txt"
+    three = root + "/three.md"
+    assert expand_inputs([root + "/a"]) == [one, two]
+    assert expand_inputs([root + "/**/*.txt"]) == [two, one]
+    assert expand_inputs([three, "-", root + "/a"]) == [three, "-", one, two]
+    assert expand_inputs([one, root + "/a"]) == [one, two]
+    assert expand_inputs(["three.md"], root) == [three]
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([root + "/*.csv"])
+    with pytest.raises(FileNotFoundError):
+        expand_inputs(["four.txt"], root)
+
+
+def test_schedule(tmp_path):
+    root = str(corpus(tmp_path))
+    one, two = root + "/a/one.txt", root + "/a/b/two.txt"
+    three = root + "/three.md"
+    # large files are sharded and small files packed
+    assert list(schedule([one, two, three], 16)) == [
+        (Shard(one, 0, 16),), (Shard(one, 16, 32, line=2),),
+        (Shard(two, 0, 7), Shard(three, 0, 9))]
+    assert list(schedule([two, one, three], 16, largest_first=True)) == [
+        (Shard(one, 0, 16),), (Shard(one, 16, 32, line=2),),
+        (Shard(three, 0, 9),), (Shard(two, 0, 7),)]
+    # compressed files are never split
+    compressed = tmp_path / "one.gz"
+    compressed.write_bytes(gzip.compress(b"5 miles\n" * 40))
+    assert list(schedule([str(compressed), two], 16)) == [
+        (Shard(str(compressed)),), (Shard(two, 0, 7),)]
+    stdin = io.BytesIO(b"1\n2\n3\n")
+    assert list(schedule([two, "-"], 16, 2, stdin=stdin)) == [
+        (Shard(two, 0, 7),), (Shard("-", lines=("1\n", "2\n")),),
+        (Shard("-", lines=("3\n",), line=2),)]
+
+
+def test_corpus_extractor(tmp_path):
+    root = str(corpus(tmp_path))
+    serial = extractor.Extractor(path, tagger, formatter, converter)
+    expected = [str(m) for m in serial.extract()]
+    for parallel_opts in (None, (2, 2)):
+        corpus_extractor = CorpusExtractor(
+            [path, root + "/three.md"], {None: (tagger, formatter, converter)},
+            parallel_opts, shard_size=32)
+        extracted = list(corpus_extractor.extract())
+        assert [str(m) for m in extracted] == expected + ["0.05 m"]
+        assert {m.source for m in extracted} == {path, root + "/three.md"}
+        assert bool(corpus_extractor.counts["batches"]) == bool(parallel_opts)
@@ -1,5 +1,7 @@
+import os
 import pytest
 
+from measurement.measures import Time
 from measurement.measures import Distance
 
 from ..modules import extractor
@@ -7,6 +9,11 @@ from ..modules import tagger
 from ..modules import formatter
 from ..modules import converter
 from ..modules.utils import Measurement
+from ..modules.params import load_params
+from ..modules.tagger import Tagger
+from ..modules.formatter import TimeFormatter
+from ..modules.converter import Converter
+from ..modules.checkpoint import Checkpoint
 
 
 path = "tests/test.txt"
@@ -26,3 +33,139 @@ def test_extractor():
     pred_extracted = set([Measurement("8046.72", "m"), Measurement("2.01", "m"),
                           Measurement("2.08", "m")])
     assert set(extractor_obj.extract()) == pred_extracted
+
+
+time_params = load_params()["t"]
+time_pipeline = (Tagger(time_params["tags"], max_gram, time_params["right_mods"],
+                        time_params["ambiguous"]),
+                 TimeFormatter(), Converter(Time()))
+
+
+def test_multi_extractor(tmp_path):
+    text = tmp_path / "text.txt"
+    text.write_text(open(path).read() + "It is a walk of 5 miles, or 2 hours\n")
+    multi_extractor_obj = extractor.MultiExtractor(
+        str(text), {"d": (tagger, formatter, converter), "t": time_pipeline})
+    extracted = list(multi_extractor_obj.extract())
+    assert {m.measurement_type for m in extracted} == {"d", "t"}
+    assert {Measurement(m.value, m.unit) for m in extracted
+            if m.measurement_type == "d"} == {Measurement("8046.72", "m"), Measurement("2.01", "m"),
+                                              Measurement("2.08", "m")}
+    # both types are tagged from the line's shared parse
+    assert [(m.measurement_type, m.line, m.value, m.unit) for m in extracted
+            if m.line == 8] == [("d", 8, "8046.72", "m"), ("t", 8, "7200.0", "s")]
+
+
+def test_prefilter():
+    filtered = extractor.Extractor(path, tagger, formatter, converter)
+    unfiltered = extractor.Extractor(
+        path, tagger, formatter, converter, prefilter=False)
+    assert set(unfiltered.extract()) == set(filtered.extract())
+    assert filtered.counts["lines"] == 7
+    assert filtered.counts["skipped"] == 1
+    assert unfiltered.counts["skipped"] == 0
+
+
+def test_parse_cache(tmp_path):
+    from ..modules.cache import ParseCache
+
+    cache = ParseCache(str(tmp_path))
+    parsed = extractor.Extractor(path, tagger, formatter, converter,
+                                 parse_cache=cache)
+    assert list(parsed.extract()) == list(extractor_obj.extract())
+    assert len(os.listdir(str(tmp_path))) == 1
+    cached = extractor.Extractor(path, tagger, formatter, converter,
+                                 parse_cache=cache)
+    assert list(cached.extract()) == list(extractor_obj.extract())
+    assert cached.counts == parsed.counts
+
+
+def test_parse_cache_fast_path(tmp_path):
+    from ..modules.cache import ParseCache
+    from ..modules.stats import Stats
+
+    cache = ParseCache(str(tmp_path))
+    uncached = extractor.Extractor(path, tagger, formatter, converter,
+                                   fast_path=True, stats=Stats())
+    expected = list(uncached.extract())
+    for _ in range(2):
+        cached = extractor.Extractor(path, tagger, formatter, converter,
+                                     fast_path=True, parse_cache=cache,
+                                     stats=Stats())
+        assert list(cached.extract()) == expected
+        assert cached.stats.counts["fast_path"] == \
+            uncached.stats.counts["fast_path"] > 0
+
+
+def test_checkpoint(tmp_path):
+    text = tmp_path / "text.txt"
+    text.write_text("The office is 5 miles away\nI was an inch away")
+    path = str(tmp_path / "checkpoint.json")
+
+    checkpoint = Checkpoint(path, str(text), incremental=True)
+    first = extractor.Extractor(str(text), tagger, formatter, converter,
+                                checkpoint=checkpoint)
+    assert list(first.extract()) == [Measurement("8046.72", "m")]
+    assert checkpoint.lines == 1
+
+    # the incomplete last line is extracted once it is complete
+    with open(str(text), "a") as f:
+        f.write(" from 6 fathoms\n")
+    checkpoint = Checkpoint(path, str(text), incremental=True)
+    assert checkpoint.load()
+    second = extractor.Extractor(str(text), tagger, formatter, converter,
+                                 checkpoint=checkpoint)
+    assert list(second.extract()) == [Measurement("10.97", "m")]
+    assert (checkpoint.lines, checkpoint.measurements) == (2, 2)
+    assert checkpoint.offset == os.path.getsize(str(text))
+
+
+def test_provenance():
+    extracted = list(extractor.Extractor(path, tagger, formatter,
+                                         converter).extract())
+    lines = open(path).read().split("\n")
+    mile = extracted[0]
+    assert (mile.line, mile.start, mile.end) == (1, 14, 21)
+    assert mile.raw == Measurement("5", "mile")
+    assert lines[mile.line - 1][mile.start: mile.end] == "5 miles"
+    fathoms = extracted[-1]
+    assert fathoms.raw == Measurement("6000", "fathom")
+    # "6,000" is changed by formatting, so maps to the whole token
+    assert lines[fathoms.line - 1][fathoms.start: fathoms.end] == \
+        "6,000 fathoms"
+
+
+def test_stats():
+    from ..modules.stats import Stats
+
+    stats = Stats()
+    instrumented = extractor.Extractor(path, tagger, formatter, converter,
+                                       stats=stats)
+    assert list(instrumented.extract()) == list(extractor_obj.extract())
+    assert instrumented.stats is stats
+    assert stats.counts["filtered"] == instrumented.counts["skipped"]
+    assert stats.counts["docs"] == 7 - stats.counts["filtered"]
+    assert stats.counts["probes"] > 0
+    assert stats.counts["matches"] == (stats.counts["conversions"] +
+                                       sum(stats.failures.values()))
+    assert {"read", "format", "prefilter", "parse", "tag",
+            "convert"} <= set(stats.times)
+
+
+def test_extract_texts():
+    texts = ["", "The office is 5 miles away\nI was 3 inches away\n",
+             "nothing", "We're miles away!\n\nIt is 6,000 fathoms deep"]
+    results = extractor.extract_texts({"d": formatter},
+                                      {"d": (tagger, converter)}, texts)
+    assert [[str(m) for m in measures] for measures in results] == \
+        [[], ["8046.72 m", "0.08 m"], [], ["10972.8 m"]]
+    # lines are counted from the start of each text
+    assert [m.line for m in results[1]] == [1, 2]
+    assert results[3][0].line == 3
+    assert results[1][0].measurement_type == "d"
+
+
+def test_split_lines():
+    assert extractor.split_lines("a\nb\n") == ["a\n", "b\n"]
+    assert extractor.split_lines("a\n\nb") == ["a\n", "\n", "b"]
+    assert extractor.split_lines("") == []
@@ -1,6 +1,10 @@
 import pytest
 
 from ..modules import formatter
+from ..modules.utils import join
+from ..modules.utils import flatten
+from ..modules.utils import map_funcs
+from ..modules.utils import strip_list
 
 
 formatter_obj = formatter.DistanceFormatter()
@@ -44,3 +48,53 @@ def test_format():
     assert format_result == "55 miles away 2 times"
     format_result = formatter_obj.format("(3'7)")
     assert format_result == "(3 foot 7)"
+
+
+def reference_format(formatter_obj, line):
+    """The per-token formatting pipeline"""
+    tokens = strip_list(line.lower().split())
+    split_toks = flatten([formatter.split_numerals(tok) for tok in tokens])
+    return join(map_funcs(tok, formatter_obj._replace_funcs)
+                for tok in split_toks)
+
+
+formatters = [formatter.Formatter(), formatter.DistanceFormatter(),
+              formatter.MassFormatter(), formatter.TimeFormatter(),
+              formatter.VolumeFormatter(), formatter.EnergyFormatter()]
+
+edge_cases = ["  3ft  2'11\" (5,000) 12feet12 ft  ", "a 3-quarter moon, 2 moons",
+              "Quarters of (3'7 ,ft 6'", "", "ÉTÉ 5km\t1,000,000 l", "x ft, ft."]
+
+
+def test_format_equivalence():
+    with open("text/wiki.txt") as f:
+        lines = f.readlines()
+    for formatter_obj in formatters:
+        for line in lines + edge_cases:
+            assert formatter_obj.format(line) == \
+                reference_format(formatter_obj, line)
+
+
+def test_format_offsets():
+    with open("text/wiki.txt") as f:
+        lines = f.readlines()
+    for formatter_obj in formatters:
+        for line in lines + edge_cases:
+            assert formatter_obj.format_offsets(line)[0] == \
+                formatter_obj.format(line)
+
+    line = "Ran (5,000 ft then  3KM"
+    formatted, offsets = formatter.DistanceFormatter().format_offsets(line)
+    assert formatted == "ran (5000 foot then 3 km"
+
+    def original(span):
+        start = formatted.index(span)
+        start, end = formatter.original_offsets(
+            offsets, start, start + len(span))
+        return line[start: end]
+
+    # spans of tokens changed by formatting map to the whole token
+    assert original("5000 foot") == "(5,000 ft"
+    assert original("3 km") == "3KM"
+    # and otherwise to the same characters
+    assert original("hen") == "hen"
@@ -0,0 +1,37 @@
+import pytest
+
+from ..modules.index import UnitIndex
+
+
+tags = ["mile", "nautical mile", "inch", "light year", "Admiralty mile"]
+index = UnitIndex(tags, 2)
+
+
+def test_candidates():
+    lemmas = ["5", "nautical", "mile", "away"]
+    assert list(index.candidates(lemmas, 1)) == [(2, "nautical mile")]
+    assert list(index.candidates(lemmas, 2)) == [(1, "mile")]
+    assert list(index.candidates(lemmas, 0)) == []
+    assert list(index.candidates(["light"], 0)) == []
+
+
+def test_max_gram():
+    unigram_index = UnitIndex(tags, 1)
+    assert "nautical mile" not in unigram_index
+    assert "mile" in unigram_index
+    assert len(unigram_index) == 2
+
+
+def test_contains():
+    assert "light year" in index
+    assert "Admiralty mile" in index
+    assert "admiralty mile" not in index
+    assert "yard" not in index
+
+
+def test_mentions():
+    assert index.mentions("5 nautical miles and 3 inches") == [(2, 16), (23, 29)]
+    assert index.mentions("a 5-mile walk, 43.7mile") == [(4, 8), (19, 23)]
+    assert index.mentions("smiles and milestones") == []
+    assert index.mentioned("two inches")
+    assert not index.mentioned("nothing to see here")
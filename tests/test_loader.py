@@ -1,23 +1,53 @@
 import pytest
-import spacy
 
-from ..modules import loader
 from ..modules import formatter
+from ..modules.loader import parse_lines
+from ..modules.loader import split_text
+from ..modules.pipeline import NLP
 
 
 filepath = "tests/test.txt"
-loader = loader.SentenceLoader(formatter.DistanceFormatter(), filepath)
 
 
-def test_loadertype():
-    for sentence in loader:
-        if sentence:
-            assert isinstance(sentence[0], spacy.tokens.Token)
+def test_parse_lines():
+    formatters = {"d": formatter.DistanceFormatter(),
+                  "t": formatter.TimeFormatter()}
+    with open(filepath) as f:
+        lines = f.readlines()
+    parsed = list(parse_lines(formatters, lines))
+    assert len(parsed) == len(lines)
+    for sentences, tagged in parsed:
+        assert set(sentences) == {"d", "t"}
+        assert tagged == {}
+        assert [s.lemmas for s in sentences["d"]] == \
+            [s.lemmas for s in sentences["t"]]
+
+
+def test_split_text():
+    assert split_text("it is 5 miles. then 3 feet", 20) == \
+        ["it is 5 miles.", "then 3 feet"]
+    assert split_text("walk 5 miles now", 8) == ["walk", "5 miles", "now"]
+    assert split_text("5 miles", 8) == ["5 miles"]
+    assert split_text("  ", 8) == []
 
 
-def test_loaderlines():
+def test_document_batching():
+    formatters = {"d": formatter.DistanceFormatter()}
     with open(filepath) as f:
         lines = f.readlines()
-    line_length = len(lines)
-    loader_length = len([l for l in loader])
-    assert loader_length == line_length
+    by_line = list(parse_lines(formatters, lines))
+    by_doc = list(parse_lines(formatters, lines, max_chars=100))
+    assert len(by_doc) == len(by_line)
+    for (line_sents, _), (doc_sents, _) in zip(by_line, by_doc):
+        assert [l for s in doc_sents["d"] for l in s.lemmas] == \
+            [l for s in line_sents["d"] for l in s.lemmas]
+
+
+
+def test_max_chars_needs_parser(monkeypatch):
+    formatters = {"d": formatter.DistanceFormatter()}
+    monkeypatch.setattr(NLP, "_profile", "lemmas")
+    with pytest.raises(ValueError):
+        next(parse_lines(formatters, ["It is 5 miles."], max_chars=100))
+    parsed = next(parse_lines(formatters, ["It is 5 miles."]))
+    assert [s.lemmas for s in parsed[0]["d"]]
@@ -0,0 +1,30 @@
+import pytest
+
+from ..modules.numerals import parse_number
+
+
+def test_parse_digits():
+    assert parse_number("5000") == 5000.0
+    assert parse_number("1.5") == 1.5
+    assert parse_number("5,000") == 5000.0
+    assert parse_number("3/4") == 0.75
+    assert parse_number("½") == 0.5
+
+
+def test_parse_words():
+    assert parse_number("two") == 2.0
+    assert parse_number("twenty-five") == 25.0
+    assert parse_number("two hundred and fifty") == 250.0
+    assert parse_number("two thousand five hundred") == 2500.0
+    assert parse_number("1.5 million") == 1.5e6
+    assert parse_number("half") == 0.5
+    assert parse_number("three quarters") == 0.75
+    assert parse_number("one and a half") == 1.5
+    assert parse_number("a dozen") == 12.0
+    assert parse_number("half a dozen") == 6.0
+
+
+def test_parse_invalid():
+    for text in ["some", "", "and", "nan", "inf", "1/0", "two miles"]:
+        with pytest.raises(ValueError):
+            parse_number(text)
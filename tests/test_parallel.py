@@ -0,0 +1,41 @@
+import pytest
+
+from measurement.measures import Distance
+
+from ..modules import extractor
+from ..modules import tagger
+from ..modules import formatter
+from ..modules import converter
+
+
+path = "tests/test.txt"
+tagger = tagger.Tagger(["mile", "inch", "foot", "fathom"], 2, {"foot": "inch"})
+formatter = formatter.DistanceFormatter()
+converter = converter.Converter(Distance())
+
+
+def test_parallel_extractor():
+    serial = extractor.Extractor(path, tagger, formatter, converter)
+    parallel = extractor.Extractor(path, tagger, formatter, converter, (2, 2))
+    assert list(parallel.extract()) == list(serial.extract())
+
+
+def test_unordered_parallel_extractor():
+    serial = extractor.Extractor(path, tagger, formatter, converter)
+    unordered = extractor.Extractor(
+        path, tagger, formatter, converter, (1, 2, 1, False))
+    assert sorted(map(str, unordered.extract())) == \
+        sorted(map(str, serial.extract()))
+
+
+def test_parallel_stats():
+    from ..modules.stats import Stats
+
+    serial, parallel = Stats(), Stats()
+    list(extractor.Extractor(path, tagger, formatter, converter,
+                             stats=serial).extract())
+    list(extractor.Extractor(path, tagger, formatter, converter, (2, 2),
+                             stats=parallel).extract())
+    assert parallel.counts == serial.counts
+    assert parallel.failures == serial.failures
+    assert parallel.times["parse"] > 0
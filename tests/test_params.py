@@ -0,0 +1,16 @@
+from ..modules.params import load_params
+from ..modules.params import build_pipelines
+
+
+def test_build_pipelines():
+    params = load_params()
+    (tagger, formatter, converter), = build_pipelines(params, ["d"]).values()
+    assert tagger.ambiguous_tags == frozenset(params["d"]["ambiguous"])
+    assert type(formatter).__name__ == params["d"]["formatter"]
+
+
+def test_build_pipelines_without_ambiguous():
+    params = load_params()
+    del params["t"]["ambiguous"]
+    (tagger, _, _), = build_pipelines(params, ["t"]).values()
+    assert tagger.ambiguous_tags == frozenset()
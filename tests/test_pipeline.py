@@ -0,0 +1,70 @@
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from ..modules.pipeline import Profile
+from ..modules.pipeline import PROFILES
+from ..modules.pipeline import Pipeline
+
+
+def test_profile_exclude():
+    parse = Profile(("tok2vec", "parser"))
+    assert "ner" in parse.exclude(2)
+    assert "tagger" in parse.exclude(2)
+    assert "tagger" not in parse.exclude(3)
+    assert "parser" not in parse.exclude(3)
+    assert "lemmatizer" in Profile(("parser",), lemmas=False).exclude(3)
+    lemmas = PROFILES["lemmas"]
+    assert not lemmas.parses and PROFILES["parse"].parses
+    assert "parser" in lemmas.exclude(3)
+    assert "lemmatizer" not in lemmas.exclude(3)
+
+
+def test_pipeline_config():
+    nlp = Pipeline()
+    assert not nlp.loaded
+    nlp.configure(disable=["ner"])
+    assert nlp.config == ("en", "parse", ("ner",), None)
+    assert nlp.batch_size == PROFILES["parse"].batch_size
+    nlp.configure("en_core_web_sm", "full", batch_size=64)
+    assert nlp.config == ("en_core_web_sm", "full", ("ner",), 64)
+    assert nlp.batch_size == 64
+    assert not nlp.loaded
+    with pytest.raises(KeyError):
+        nlp.configure(profile="fastest")
+
+
+def test_pipeline_load_once(monkeypatch):
+    nlp = Pipeline()
+    loads = []
+
+    def spacy_load():
+        time.sleep(0.05)
+        loads.append(object())
+        return loads[-1]
+
+    monkeypatch.setattr(nlp, "_spacy_load", spacy_load)
+    with ThreadPoolExecutor(4) as executor:
+        models = list(executor.map(lambda _: nlp.load(), range(4)))
+    assert len(loads) == 1
+    assert models == loads * 4
+
+
+def test_pipeline_load(tmp_path):
+    spacy = pytest.importorskip("spacy")
+    if int(spacy.__version__.split(".")[0]) < 3:
+        pytest.skip("Spacy 3 pipeline")
+    model = spacy.blank("en")
+    model.add_pipe("sentencizer")
+    model.add_pipe("entity_ruler")
+    model.to_disk(tmp_path)
+
+    full = Pipeline(str(tmp_path), "full")
+    assert full.load().pipe_names == ["sentencizer", "entity_ruler"]
+    parse = Pipeline(str(tmp_path), "parse")
+    assert parse.load().pipe_names == []
+    parse.configure(profile="full", disable=["entity_ruler"])
+    assert not parse.loaded
+    assert parse.load().pipe_names == ["sentencizer"]
+    assert [doc.text for doc in parse.pipe(["5 miles", "2 feet"])] == \
+        ["5 miles", "2 feet"]
@@ -0,0 +1,68 @@
+import bz2
+import gzip
+import pytest
+
+from ..modules.reader import MappedText
+from ..modules.reader import compression
+from ..modules.reader import open_binary
+from ..modules.reader import read_text
+from ..modules.reader import read_lines
+
+
+def test_read_lines(tmp_path):
+    text = tmp_path / "text.txt"
+    text.write_bytes("5 miles\n3 f\u00e9et\n2 inch".encode("utf-8"))
+    with open(str(text), "rb") as f:
+        assert list(read_lines(f)) == [("5 miles\n", 8), ("3 f\u00e9et\n", 16),
+                                       ("2 inch", 22)]
+    with open(str(text), "rb") as f:
+        f.seek(8)
+        assert list(read_lines(f, complete=True)) == [("3 f\u00e9et\n", 16)]
+
+
+def test_mapped_text(tmp_path):
+    text = tmp_path / "text.txt"
+    data = "5 miles\n3 f\u00e9et\n\n2 inch".encode("utf-8")
+    text.write_bytes(data)
+    with MappedText(str(text)) as mapped:
+        assert len(mapped) == len(data)
+        assert [mapped.align(i) for i in (0, 1, 8, 9, 17, 30)] == \
+            [0, 8, 8, 16, 17, 23]
+        assert list(mapped.lines()) == [("5 miles\n", 8), ("3 f\u00e9et\n", 16),
+                                        ("\n", 17), ("2 inch", 23)]
+        assert list(mapped.lines(complete=True))[-1] == ("\n", 17)
+        assert list(mapped.lines(3, 9)) == [("3 f\u00e9et\n", 16)]
+        assert list(mapped.lines(8, 16)) == [("3 f\u00e9et\n", 16)]
+        assert list(mapped.lines(9, 10)) == []
+        # ranges which tile the file read each line once
+        for size in range(1, len(data) + 1):
+            lines = [line for start in range(0, len(data), size)
+                     for line, _ in mapped.lines(start, start + size)]
+            assert "".join(lines) == data.decode("utf-8")
+    (tmp_path / "empty.txt").write_bytes(b"")
+    assert list(read_text(str(tmp_path / "empty.txt"))) == []
+
+
+def test_compressed(tmp_path):
+    data = "5 miles\n3 f\u00e9et\n2 inch\n".encode("utf-8")
+    (tmp_path / "text.txt").write_bytes(data)
+    (tmp_path / "text.gz").write_bytes(gzip.compress(data))
+    (tmp_path / "text.bz2").write_bytes(bz2.compress(data))
+    expected = list(read_text(str(tmp_path / "text.txt")))
+    assert compression(str(tmp_path / "text.txt")) is None
+    for name, kind in (("text.gz", "gzip"), ("text.bz2", "bz2")):
+        path = str(tmp_path / name)
+        assert compression(path) == kind
+        with open_binary(path) as f:
+            assert f.read() == data
+        assert list(read_text(path)) == expected
+        assert list(read_text(path, 1, 9)) == expected[1:2]
+
+
+def test_zstd_compressed(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    data = b"5 miles\n3 feet\n"
+    path = tmp_path / "text.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(data))
+    assert compression(str(path)) == "zstd"
+    assert list(read_text(str(path))) == [("5 miles\n", 8), ("3 feet\n", 15)]
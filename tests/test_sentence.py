@@ -0,0 +1,76 @@
+import pickle
+
+import pytest
+
+from ..modules.sentence import Sentence
+from ..modules.tagger import Tagger
+from ..modules.utils import Measurement
+
+
+spacy = pytest.importorskip("spacy")
+tokens = pytest.importorskip("spacy.tokens")
+
+words = ["he", "is", "6", "foot", "7", "and", "walked", "5", "miles"]
+lemmas = ["he", "be", "6", "foot", "7", "and", "walk", "5", "mile"]
+heads = [1, 1, 3, 1, 3, 1, 1, 8, 6]
+deps = ["nsubj", "ROOT", "nummod", "attr", "nummod", "cc", "conj", "nummod",
+        "dobj"]
+doc = tokens.Doc(spacy.blank("en").vocab, words=words, heads=heads,
+                 deps=deps, lemmas=lemmas)
+
+
+def test_from_span():
+    sentence = Sentence.from_span(doc)
+    assert sentence.lemmas == lemmas
+    assert [sentence.dep(i) for i in range(len(sentence))] == deps
+    assert sentence.lefts(3) == [2]
+    assert sentence.rights(3) == [4]
+    assert sentence.rights(1) == [3, 5, 6]
+
+
+def test_offsets():
+    sentence = Sentence.from_span(doc[6:], shift=10)
+    assert sentence.offsets([1, 2]) == (36, 43)
+    assert pickle.loads(pickle.dumps(sentence)).offsets([0]) == (29, 35)
+    assert Sentence(["mile"], None, None, {}).offsets([0]) == (None, None)
+
+
+def test_from_subspan():
+    sentence = Sentence.from_span(doc[6:])
+    assert sentence.lemmas == ["walk", "5", "mile"]
+    # heads outside the span are dropped
+    assert sentence.heads.tolist() == [-1, 2, 0]
+    assert len(Sentence.from_span(doc[0:0])) == 0
+
+
+def test_pickle():
+    sentence = pickle.loads(pickle.dumps(Sentence.from_span(doc)))
+    assert sentence.lemmas == lemmas
+    assert sentence.lefts(8) == [7]
+
+
+def test_tag_sentence():
+    tagger = Tagger(["mile", "foot", "inch"], 2, {"foot": "inch"})
+    expected = [(Measurement("6", "foot"), Measurement("7", "inch")),
+                Measurement("5", "mile")]
+    assert tagger.tag(Sentence.from_span(doc)) == expected
+    assert tagger.tag(doc) == expected
+    assert tagger.tag(list(doc)) == expected
+    # measurements record their spans in the line
+    (foot, inch), mile = tagger.tag(doc)
+    assert [(m.start, m.end) for m in (foot, inch, mile)] == \
+        [(6, 12), (13, 14), (26, 33)]
+
+
+def test_tag_unparsed():
+    # lemmas without a dependency parse, as of the lemmas profile
+    unparsed = tokens.Doc(spacy.blank("en").vocab, words=words, lemmas=lemmas)
+    sentence = Sentence.from_span(unparsed)
+    assert Sentence.from_span(doc).parsed and not sentence.parsed
+    tagger = Tagger(["mile", "foot", "inch"], 2, {"foot": "inch"})
+    assert tagger.tag(sentence) == [
+        (Measurement("6", "foot"), Measurement("7", "inch")),
+        Measurement("5", "mile")]
+    walk = tokens.Doc(spacy.blank("en").vocab, words=["a", "mile", "walk"],
+                      lemmas=["a", "mile", "walk"])
+    assert tagger.tag(Sentence.from_span(walk)) == []
@@ -0,0 +1,136 @@
+import json
+import asyncio
+
+from measurement.measures import Distance
+
+from ..modules import tagger
+from ..modules import formatter
+from ..modules import converter
+from ..modules.server import Server
+
+
+pipelines = {"d": (tagger.Tagger(["mile", "inch", "foot", "fathom"], 2,
+                                 {"foot": "inch"}),
+                   formatter.DistanceFormatter(),
+                   converter.Converter(Distance()))}
+
+
+async def request(reader, writer, method, target, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write("{} {} HTTP/1.1\r\nContent-Length: {}\r\n\r\n".format(
+        method, target, len(body)).encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, json.loads(body)
+
+
+def run(test, **kwargs):
+    async def main():
+        server = Server(pipelines, **kwargs)
+        listening = await server.start()
+        port = listening.sockets[0].getsockname()[1]
+        try:
+            return await test(server, port)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_extract():
+    async def test(server, port):
+        connection = await asyncio.open_connection("127.0.0.1", port)
+        status, response = await request(
+            *connection, "POST", "/extract",
+            {"text": "The office is 5 miles away\nI was 3 inches away"})
+        assert status == 200
+        assert [(m["line"], m["start"], m["end"], m["value"], m["unit"],
+                 m["raw_value"], m["raw_unit"], m["measurement_type"])
+                for m in response["measurements"]] == [
+            (1, 14, 21, "8046.72", "m", "5", "mile", "d"),
+            (2, 6, 14, "0.08", "m", "3", "inch", "d")]
+
+        # several requests on one connection
+        status, response = await request(
+            *connection, "POST", "/extract",
+            {"texts": ["6,000 fathoms", "", "no units"], "types": ["d"]})
+        assert status == 200
+        assert [[m["value"] for m in measures]
+                for measures in response["measurements"]] == [
+            ["10972.8"], [], []]
+        connection[1].close()
+
+    run(test)
+
+
+def test_micro_batching():
+    async def test(server, port):
+        async def extract(n):
+            connection = await asyncio.open_connection("127.0.0.1", port)
+            response = await request(*connection, "POST", "/extract",
+                                     {"text": "It is {} miles away".format(n)})
+            connection[1].close()
+            return response
+
+        responses = await asyncio.gather(*(extract(n) for n in range(1, 9)))
+        assert [r["measurements"][0]["raw_value"] for _, r in responses] == \
+            [str(n) for n in range(1, 9)]
+        assert server.counts["requests"] == 8
+        assert server.counts["texts"] == 8
+        assert server.counts["batches"] < 8
+
+    run(test, max_latency=0.2)
+
+
+def test_errors():
+    async def test(server, port):
+        connection = await asyncio.open_connection("127.0.0.1", port)
+        status, response = await request(*connection, "GET", "/health")
+        assert (status, response["types"]) == (200, ["d"])
+        status, _ = await request(*connection, "POST", "/extract",
+                                  {"texts": "not a list"})
+        assert status == 400
+        status, response = await request(*connection, "POST", "/extract",
+                                         {"text": "5 miles", "types": ["t"]})
+        assert status == 400
+        assert "Invalid measurement type" in response["error"]
+        for types in (["d", "t"], [["d"]], [{"d": 1}], [1], "d"):
+            status, _ = await request(*connection, "POST", "/extract",
+                                      {"texts": ["5 miles"], "types": types})
+            assert status == 400
+        # nothing was submitted by the rejected requests
+        assert server.counts["texts"] == 0
+        status, _ = await request(*connection, "GET", "/extract")
+        assert status == 405
+        status, _ = await request(*connection, "GET", "/missing")
+        assert status == 404
+        connection[1].close()
+
+    run(test)
+
+
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / "server.sock")
+
+    async def main():
+        server = Server(pipelines)
+        await server.start(path=path)
+        try:
+            connection = await asyncio.open_unix_connection(path)
+            status, response = await request(*connection, "POST", "/extract",
+                                             {"text": "5 miles"})
+            connection[1].close()
+            return status, response
+        finally:
+            await server.close()
+
+    status, response = asyncio.run(main())
+    assert status == 200
+    assert response["measurements"][0]["value"] == "8046.72"
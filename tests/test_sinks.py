@@ -0,0 +1,73 @@
+import io
+import csv
+import json
+import pytest
+
+from ..modules.sinks import record
+from ..modules.sinks import CsvSink
+from ..modules.sinks import TextSink
+from ..modules.sinks import JsonlSink
+from ..modules.sinks import ParquetSink
+from ..modules.utils import Measurement
+
+
+mile = Measurement("8046.72", "m", "d", "a.txt", 3, 4, 11,
+                   Measurement("5", "mile"))
+feet = (Measurement("6", "foot", "d", "b.txt", 1, 0, 6),
+        Measurement("7", "inch", "d", "b.txt", 1, 7, 8))
+
+
+def test_record():
+    assert record(mile) == {
+        "file": "a.txt", "line": 3, "start": 4, "end": 11,
+        "measurement_type": "d", "raw_value": "5", "raw_unit": "mile",
+        "value": "8046.72", "unit": "m"}
+    # an unconverted measurement is its own raw measurement
+    assert record(feet) == {
+        "file": "b.txt", "line": 1, "start": 0, "end": 8,
+        "measurement_type": "d", "raw_value": "6 7", "raw_unit": "foot inch",
+        "value": "6 7", "unit": "foot inch"}
+    assert record(Measurement("1", "m"), "c.txt")["file"] == "c.txt"
+
+
+def test_text_sink():
+    output = io.StringIO()
+    with TextSink(output, 2, sources=True) as sink:
+        sink.write(mile)
+        assert output.getvalue() == ""
+        sink.write(feet)
+        # written a batch at a time
+        assert output.getvalue() == "a.txt\t8046.72 m\nb.txt\t6 foot 7 inch\n"
+        sink.write(mile)
+    assert output.getvalue().count("\n") == 3
+
+
+def test_jsonl_sink():
+    output = io.StringIO()
+    with JsonlSink(output) as sink:
+        sink.write(mile)
+        sink.write(feet)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert records == [record(mile), record(feet)]
+
+
+def test_csv_sink():
+    output = io.StringIO()
+    with CsvSink(output) as sink:
+        sink.write(mile)
+    with CsvSink(output, header=False) as sink:
+        sink.write(feet)
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [row["raw_unit"] for row in rows] == ["mile", "foot inch"]
+    assert rows[0]["line"] == "3"
+
+
+def test_parquet_sink(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "measurements.parquet")
+    with open(path, "wb") as f, ParquetSink(f, 1) as sink:
+        sink.write(mile)
+        sink.write(feet)
+    table = parquet.read_table(path)
+    assert table.to_pylist() == [record(mile), record(feet)]
+    assert parquet.ParquetFile(path).num_row_groups == 2
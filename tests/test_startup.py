@@ -0,0 +1,35 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+package = __package__.rsplit(".", 1)[0]
+
+
+def test_lazy_import():
+    code = ("import sys; import {}.modules.extractor; "
+            "assert 'spacy' not in sys.modules; "
+            "assert 'cytoolz' not in sys.modules".format(package))
+    subprocess.run([sys.executable, "-c", code], check=True,
+                   cwd=os.path.dirname(root))
+
+
+
+def test_cached_tags(tmp_path):
+    wordnet = tmp_path / "corpora" / "wordnet"
+    wordnet.mkdir(parents=True)
+    (wordnet / "data.adj").write_bytes(
+        b"  29 WordNet 3.0 Copyright 2006 by Princeton University.\n")
+    code = ("import sys; from {0}.modules.cache import TagCache; "
+            "cache = TagCache({1!r}); "
+            "cache.put('linear_unit.n.01', '3.0', 2, ['mile']); "
+            "tags, _ = cache.get('linear_unit.n.01', 2); "
+            "assert tags == {{'mile'}}; "
+            "assert 'nltk' not in sys.modules".format(
+                package, str(tmp_path / "cache")))
+    env = dict(os.environ, NLTK_DATA=str(tmp_path))
+    subprocess.run([sys.executable, "-c", code], check=True,
+                   cwd=os.path.dirname(root), env=env)
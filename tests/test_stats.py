@@ -0,0 +1,98 @@
+import time
+import pickle
+
+from ..modules.stats import Stats
+from ..modules.stats import Progress
+from ..modules.stats import sampling
+from ..modules.stats import profiling
+
+
+def test_nested_stages():
+    stats = Stats()
+    with stats.stage("parse"):
+        time.sleep(0.01)
+        with stats.stage("format"):
+            time.sleep(0.02)
+    assert set(stats.times) == {"parse", "format"}
+    assert 0.01 <= stats.times["parse"] < 0.02
+    assert stats.times["format"] >= 0.02
+
+
+def test_timed():
+    stats = Stats()
+
+    def slow():
+        for n in range(3):
+            time.sleep(0.01)
+            yield n
+
+    items = []
+    for n in stats.timed(slow(), "read"):
+        time.sleep(0.01)
+        items.append(n)
+    assert items == [0, 1, 2]
+    # the time between items is not counted
+    assert 0.03 <= stats.times["read"] < 0.05
+
+
+def test_update():
+    stats, other = Stats(), Stats()
+    stats.counts["docs"] += 2
+    other.counts["docs"] += 3
+    other.failures["cubit"] += 1
+    other.times["parse"] += 1.5
+    # stats are pickled from worker processes
+    stats.update(pickle.loads(pickle.dumps(other)))
+    assert stats.counts["docs"] == 5
+    assert stats.failures == {"cubit": 1}
+    assert stats.times == {"parse": 1.5}
+
+
+def test_summary():
+    stats = Stats()
+    stats.counts.update({"docs": 4, "matches": 3, "conversions": 2})
+    stats.failures["cubit"] += 1
+    stats.times.update({"parse": 3.0, "tag": 1.0})
+    summary = stats.summary({"lines": 10, "skipped": 6}, 2.0)
+    assert "10 read (5 lines/s), 6 without a unit" in summary
+    assert "4 docs" in summary
+    assert "2 converted, 1 failed\n    cubit: 1" in summary
+    assert "parse         3.000  75.0%" in summary
+
+
+def test_progress(capsys):
+    counts = {"lines": 0}
+    with Progress(counts, 0.01) as progress:
+        counts["lines"] = 5
+        progress.update(2)
+        time.sleep(0.05)
+    assert "5 lines, 2 measurements" in capsys.readouterr().err
+
+    counts = {"lines": 0, "batches": 0}
+    with Progress(counts, 0.01, batches=True):
+        counts.update(lines=1000, batches=1)
+        time.sleep(0.05)
+    err = capsys.readouterr().err
+    assert "1 batches (1000 lines)" in err
+    assert "lines/s" not in err
+
+
+def test_profiling(tmp_path):
+    import pstats
+
+    path = str(tmp_path / "run.prof")
+    with profiling(path):
+        sorted(range(1000))
+    assert pstats.Stats(path).total_calls
+
+
+def test_sampling(tmp_path):
+    path = tmp_path / "stacks.txt"
+    with sampling(str(path), interval=0.001):
+        end = time.process_time() + 0.1
+        while time.process_time() < end:
+            pass
+    stacks = path.read_text().splitlines()
+    assert stacks
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert any("test_sampling" in line for line in stacks)
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+
+from measurement.measures import Distance
+
+from ..modules import tagger
+from ..modules import formatter
+from ..modules import converter
+from ..modules.stats import Stats
+from ..modules.extractor import Extractor
+from ..modules.streaming import AsyncExtractor
+
+
+path = "tests/test.txt"
+pipelines = {"d": (tagger.Tagger(["mile", "inch", "foot", "fathom"], 2,
+                                 {"foot": "inch"}),
+                   formatter.DistanceFormatter(),
+                   converter.Converter(Distance()))}
+
+
+async def lines(path):
+    with open(path) as f:
+        for line in f:
+            await asyncio.sleep(0)
+            yield line
+
+
+def serial():
+    extractor = Extractor(path, *pipelines["d"])
+    return [(str(m), m.line, m.start, m.end) for m in extractor.extract()]
+
+
+def provenance(measures):
+    return [(str(m), m.line, m.start, m.end) for m in measures]
+
+
+def test_async_extractor():
+    async def main():
+        async with AsyncExtractor(pipelines, batch_size=2) as extractor:
+            measures = [m async for m in extractor.extract(lines(path))]
+        return measures, extractor.counts
+
+    measures, counts = asyncio.run(main())
+    assert provenance(measures) == serial()
+    assert {m.measurement_type for m in measures} == {"d"}
+    assert counts["lines"] == 7
+
+
+def test_stream_reader():
+    async def main():
+        reader = asyncio.StreamReader()
+        with open(path, "rb") as f:
+            reader.feed_data(f.read())
+        reader.feed_eof()
+        async with AsyncExtractor(pipelines, batch_size=3) as extractor:
+            return [m async for m in extractor.extract(reader)]
+
+    assert provenance(asyncio.run(main())) == serial()
+
+
+def test_concurrent_streams():
+    stats = Stats()
+
+    async def main():
+        async with AsyncExtractor(pipelines, concurrency=2, batch_size=1,
+                                  stats=stats) as extractor:
+            async def extract():
+                return [m async for m in extractor.extract(lines(path))]
+            return await asyncio.gather(*(extract() for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert [provenance(measures) for measures in results] == [serial()] * 4
+    assert stats.counts["matches"] == 4 * len(serial())
+
+
+def test_process_pool():
+    async def main():
+        async with AsyncExtractor(pipelines, n_jobs=2, processes=True,
+                                  batch_size=2) as extractor:
+            return [m async for m in extractor.extract(lines(path))]
+
+    assert provenance(asyncio.run(main())) == serial()
+
+
+def test_threads():
+    with pytest.raises(ValueError):
+        AsyncExtractor(pipelines, n_jobs=2)
@@ -2,6 +2,7 @@ import pytest
 import spacy
 
 from ..modules import tagger
+from ..modules.tagger import Tagger
 from ..modules.utils import hyponyms
 from ..modules.utils import Measurement
 
@@ -20,3 +21,73 @@ def test_distance_tags():
     assert 'mile' in tagger._tags
     assert 'cubic meter' not in tagger._tags
     assert 'joule' not in tagger._tags
+
+
+text_tagger = Tagger(
+    ["mile", "nautical mile", "inch", "foot", "in"], 2, {"foot": "inch"}, ["in"])
+
+
+def test_tag_text():
+    assert text_tagger.tag_text("nothing to see here") == []
+    assert text_tagger.tag_text("it is 5 miles away.") == [
+        Measurement("5", "mile")]
+    assert text_tagger.tag_text("sail 2.5 nautical miles, then (3 inches)") == [
+        Measurement("2.5", "nautical mile"), Measurement("3", "inch")]
+
+
+def test_tag_text_needs_parse():
+    # no adjacent number
+    assert text_tagger.tag_text("the number of miles") is None
+    # ambiguous unit
+    assert text_tagger.tag_text("1 in 5 people") is None
+    # unit with right modifier
+    assert text_tagger.tag_text("6 foot 7") is None
+    # unit joined to a number
+    assert text_tagger.tag_text("a 5-mile walk and 3 inches") is None
+
+
+def parse(words, lemmas, heads, deps):
+    """Build a parsed Spacy Doc"""
+    vocab = spacy.blank("en").vocab
+    return spacy.tokens.Doc(vocab, words=words, lemmas=lemmas,
+                            heads=heads, deps=deps)
+
+
+def test_tag_adjacent_units():
+    doc = parse(["5", "miles", "3", "miles", "4", "miles"],
+                ["5", "mile", "3", "mile", "4", "mile"],
+                [1, 1, 3, 1, 5, 1],
+                ["nummod", "ROOT", "nummod", "conj", "nummod", "conj"])
+    assert text_tagger.tag(doc) == [Measurement("5", "mile"),
+                                    Measurement("3", "mile"),
+                                    Measurement("4", "mile")]
+
+
+def test_tag_after_ngram():
+    # deleting the matched bigram from the sentence shifted the
+    # unigram windows, so "3 miles" was tagged twice
+    doc = parse(["2", "nautical", "miles", "and", "3", "miles"],
+                ["2", "nautical", "mile", "and", "3", "mile"],
+                [2, 2, 2, 2, 5, 2],
+                ["nummod", "amod", "ROOT", "cc", "nummod", "conj"])
+    assert text_tagger.tag(doc) == [Measurement("2", "nautical mile"),
+                                    Measurement("3", "mile")]
+
+
+def test_tag_order():
+    # measurements are returned in sentence order
+    doc = parse(["1", "mile", "2", "nautical", "miles", "6", "foot", "7"],
+                ["1", "mile", "2", "nautical", "mile", "6", "foot", "7"],
+                [1, 1, 4, 4, 1, 6, 1, 6],
+                ["nummod", "ROOT", "nummod", "amod", "conj", "nummod",
+                 "conj", "nummod"])
+    assert text_tagger.tag(doc) == [
+        Measurement("1", "mile"), Measurement("2", "nautical mile"),
+        (Measurement("6", "foot"), Measurement("7", "inch"))]
+
+
+def test_tag_without_modifier():
+    doc = parse(["miles", "away"], ["mile", "away"], [0, 0],
+                ["ROOT", "advmod"])
+    assert text_tagger.tag(doc) == []
+    assert text_tagger.tag([]) == []